@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("client_app", "0002_clientprofile_alter_citypostalcode_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="clientsupplier",
+            name="iban",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                help_text="Račun s kojeg klijent plaća; koristi se za automatsko usklađivanje uplata.",
+                max_length=34,
+                verbose_name="IBAN",
+            ),
+        ),
+    ]
@@ -55,6 +55,14 @@ class ClientSupplier(models.Model):
             )
         ],
     )
+    iban = models.CharField(
+        max_length=34,
+        blank=True,
+        default="",
+        db_index=True,
+        verbose_name=_("IBAN"),
+        help_text=_("Račun s kojeg klijent plaća; koristi se za automatsko usklađivanje uplata."),
+    )
     country = models.CharField(max_length=100, verbose_name=_("Država"), default="Hrvatska")
     city = models.CharField(max_length=100, verbose_name=_("Grad"))
     postal_code = models.CharField(max_length=10, verbose_name=_("Poštanski broj"))
@@ -0,0 +1,133 @@
+"""Mapiranje uloga knjiženja (kupci, prihodi, PDV po stopi...) na konta.
+
+Mapa uloga -> broj konta je konfigurabilna kroz postavke::
+
+    FINANCIJE_ACCOUNT_MAP = {"revenue": "7500", "vat_payable_13": "2401"}
+    FINANCIJE_TENANT_ACCOUNT_MAP = {<tenant_id>: {"revenue": "7510"}}
+
+Razriješena mapa (uloga -> Account.id) drži se u memoriji procesa po tenantu.
+Svaka promjena konta podiže verziju u Django cacheu, pa svi procesi kod
+sljedećeg čitanja ponovno učitaju mapu jednim upitom.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from financije.models.accounting import Account
+
+RECEIVABLES = "receivables"
+REVENUE = "revenue"
+VAT_PAYABLE = "vat_payable"
+INPUT_VAT = "input_vat"
+PAYABLES = "payables"
+
+DEFAULT_ACCOUNT_MAP = {
+    RECEIVABLES: "1200",  # Kupci
+    REVENUE: "4000",  # Prihodi
+    VAT_PAYABLE: "4700",  # PDV obveze (sve stope, osim ako nije zadano vat_payable_<stopa>)
+    INPUT_VAT: "1400",  # Pretporez (sve stope, osim ako nije zadano input_vat_<stopa>)
+    PAYABLES: "2200",  # Dobavljači
+}
+
+VERSION_CACHE_KEY = "financije:account_map:version"
+
+_resolved = {}
+
+
+def vat_role(role, rate):
+    """``vat_payable`` + 25.00 -> ``vat_payable_25``."""
+    return f"{role}_{Decimal(rate).normalize():f}"
+
+
+class AccountMap:
+    """Razriješena mapa uloga na Account.id za jednog tenanta."""
+
+    def __init__(self, tenant_id, account_ids):
+        self.tenant_id = tenant_id
+        self.account_ids = account_ids
+
+    def __getitem__(self, role):
+        try:
+            return self.account_ids[role]
+        except KeyError:
+            raise ValidationError(
+                _("Konto za ulogu knjiženja '%(role)s' nije definiran.") % {"role": role}
+            ) from None
+
+    def vat_payable(self, rate):
+        return self.account_ids.get(vat_role(VAT_PAYABLE, rate)) or self[VAT_PAYABLE]
+
+    def input_vat_accounts(self):
+        """Konta pretporeza: ``{Account.id: stopa}``, stopa je ``None`` za zajedničko konto."""
+        accounts = {}
+        for role, account_id in self.account_ids.items():
+            if role == INPUT_VAT:
+                accounts.setdefault(account_id, None)
+            elif role.startswith(f"{INPUT_VAT}_"):
+                accounts[account_id] = Decimal(role[len(INPUT_VAT) + 1 :])
+        return accounts
+
+
+def configured_numbers(tenant_id=None):
+    numbers = dict(DEFAULT_ACCOUNT_MAP)
+    numbers.update(getattr(settings, "FINANCIJE_ACCOUNT_MAP", {}))
+    if tenant_id is not None:
+        numbers.update(getattr(settings, "FINANCIJE_TENANT_ACCOUNT_MAP", {}).get(tenant_id, {}))
+    return numbers
+
+
+def current_version():
+    return cache.get(VERSION_CACHE_KEY, 0)
+
+
+def invalidate():
+    """Poništi razriješene mape u svim procesima (nova verzija u cacheu)."""
+    _resolved.clear()
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+
+
+def resolve(tenant=None):
+    """Vrati AccountMap za tenanta; Account se čita samo kod prvog poziva nakon promjene."""
+    tenant_id = getattr(tenant, "pk", tenant)
+    version = current_version()
+    cached = _resolved.get(tenant_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    numbers = configured_numbers(tenant_id)
+    ids_by_number = dict(
+        Account.objects.filter(number__in=set(numbers.values())).values_list("number", "id")
+    )
+    account_map = AccountMap(
+        tenant_id,
+        {
+            role: ids_by_number[number]
+            for role, number in numbers.items()
+            if number in ids_by_number
+        },
+    )
+    _resolved[tenant_id] = (version, account_map)
+    return account_map
+
+
+class TenantAccountMaps(dict):
+    """``{tenant_id: AccountMap}`` za seriju računa više tenanata; svaki se razrješava jednom."""
+
+    def __missing__(self, tenant_id):
+        self[tenant_id] = resolve(tenant_id)
+        return self[tenant_id]
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def invalidate_on_account_change(sender, **kwargs):
+    invalidate()
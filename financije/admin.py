@@ -1,4 +1,5 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
 
 from financije.models.taxconfig import Municipality
 
@@ -8,20 +9,29 @@ from .forms import (
     DebtForm,
     FinancialReportForm,
     InvoiceForm,
+    JournalItemInlineFormSet,
     MonthlyOverheadForm,
     OverheadForm,
     TaxConfigurationForm,
     VariablePayRuleForm,
 )
 from .models import (
+    AccountingPeriod,
+    BankSyncState,
     BankTransaction,
     Budget,
     CashFlow,
+    CashPosition,
     Debt,  # New models
     FinancialDetails,
     FinancialReport,
     Invoice,
+    InvoicePosting,
+    InvoiceSequence,
+    JournalEntry,
+    JournalItem,
     MonthlyOverhead,
+    OutgoingEmail,
     Overhead,
     OverheadCategory,
     Salary,
@@ -31,6 +41,8 @@ from .models import (
     TaxConfiguration,
     VariablePayRule,
 )
+from .models.periods import close_period, reopen_period
+from .services import InvoiceService
 
 # financije/admin.py
 
@@ -38,10 +50,29 @@ from .models import (
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
     form = InvoiceForm
-    list_display = ["invoice_number", "client", "amount", "issue_date", "paid"]
+    list_display = [
+        "invoice_number",
+        "client",
+        "net_amount",
+        "vat_amount",
+        "gross_amount",
+        "issue_date",
+        "paid",
+    ]
+    list_select_related = ["client"]
     list_filter = ["paid", "status_fakture", "issue_date"]
     search_fields = ["invoice_number", "client__name"]
     date_hierarchy = "issue_date"
+    actions = ["approve_selected"]
+
+    @admin.action(description="Odobri i pošalji na knjiženje odabrane račune")
+    def approve_selected(self, request, queryset):
+        try:
+            approved = InvoiceService.approve_invoices(queryset)
+        except ValidationError as e:
+            self.message_user(request, "; ".join(e.messages), messages.ERROR)
+            return
+        self.message_user(request, f"Odobreno računa: {approved} (knjiženje je u redu čekanja)")
 
 
 @admin.register(FinancialDetails)
@@ -162,6 +193,22 @@ class BankTransactionAdmin(admin.ModelAdmin):
     ordering = ("-datum",)
 
 
+@admin.register(BankSyncState)
+class BankSyncStateAdmin(admin.ModelAdmin):
+    list_display = ("bank_account_number", "bank_name", "tenant", "is_active", "last_synced_at")
+    list_filter = ("is_active",)
+    search_fields = ("bank_account_number", "bank_name")
+    readonly_fields = ("cursor", "last_synced_at", "last_error")
+
+
+@admin.register(CashPosition)
+class CashPositionAdmin(admin.ModelAdmin):
+    list_display = ("bank_account_number", "date", "inflow", "outflow", "balance", "tenant")
+    list_filter = ("bank_account_number",)
+    date_hierarchy = "date"
+    readonly_fields = ("tenant", "bank_account_number", "date", "inflow", "outflow", "balance")
+
+
 @admin.register(OverheadCategory)
 class OverheadCategoryAdmin(admin.ModelAdmin):
     list_display = ("name", "description")
@@ -199,3 +246,107 @@ class SalesContractAdmin(admin.ModelAdmin):
     list_display = ("contract_number", "client")
     search_fields = ("contract_number", "client__name")
     list_filter = ("client",)  # Changed from 'client__country' to 'client'
+
+
+@admin.register(AccountingPeriod)
+class AccountingPeriodAdmin(admin.ModelAdmin):
+    list_display = ("year", "month", "tenant", "is_closed", "closed_at", "closed_by")
+    list_filter = ("is_closed", "tenant", "year")
+    ordering = ("-year", "-month")
+    readonly_fields = ("is_closed", "closed_at", "closed_by")
+    actions = ["close_selected", "reopen_selected"]
+
+    @admin.action(description="Zaključi odabrana razdoblja")
+    def close_selected(self, request, queryset):
+        try:
+            for period in queryset.order_by("year", "month"):
+                close_period(period.year, period.month, period.tenant_id, user=request.user)
+        except ValidationError as e:
+            self.message_user(request, "; ".join(e.messages), messages.ERROR)
+
+    @admin.action(description="Ponovno otvori odabrana razdoblja")
+    def reopen_selected(self, request, queryset):
+        try:
+            for period in queryset.order_by("-year", "-month"):
+                reopen_period(period.year, period.month, period.tenant_id)
+        except ValidationError as e:
+            self.message_user(request, "; ".join(e.messages), messages.ERROR)
+
+
+class JournalItemInline(admin.TabularInline):
+    model = JournalItem
+    formset = JournalItemInlineFormSet
+    extra = 2
+
+
+@admin.register(JournalEntry)
+class JournalEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "date",
+        "description",
+        "tenant",
+        "debit_total",
+        "credit_total",
+        "balanced",
+    )
+    list_filter = ("tenant", "date")
+    search_fields = ("description",)
+    date_hierarchy = "date"
+    inlines = [JournalItemInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_totals().select_related("tenant")
+
+    @admin.display(description="Duguje", ordering="debit_total")
+    def debit_total(self, obj):
+        return obj.debit_total
+
+    @admin.display(description="Potražuje", ordering="credit_total")
+    def credit_total(self, obj):
+        return obj.credit_total
+
+    @admin.display(description="Uravnoteženo", boolean=True, ordering="balanced")
+    def balanced(self, obj):
+        return obj.balanced
+
+
+@admin.register(InvoicePosting)
+class InvoicePostingAdmin(admin.ModelAdmin):
+    list_display = (
+        "invoice",
+        "version",
+        "status",
+        "journal_entry",
+        "reversal_entry",
+        "processed_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("invoice__invoice_number",)
+    list_select_related = ("invoice",)
+    readonly_fields = (
+        "invoice",
+        "version",
+        "status",
+        "journal_entry",
+        "reversal_entry",
+        "error",
+        "processed_at",
+    )
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ("recipient", "subject", "kind", "status", "attempts", "sent_at")
+    list_filter = ("status", "kind")
+    search_fields = ("recipient", "subject", "invoice__invoice_number")
+    list_select_related = ("invoice",)
+    readonly_fields = ("attempts", "next_attempt_at", "claimed_at", "sent_at", "error")
+
+
+@admin.register(InvoiceSequence)
+class InvoiceSequenceAdmin(admin.ModelAdmin):
+    list_display = ("tenant", "year", "series", "last_number")
+    list_filter = ("tenant", "year")
+    # Brojač se mijenja samo kroz allocate_invoice_numbers (inače nastaju rupe).
+    readonly_fields = ("tenant", "year", "series", "last_number")
@@ -0,0 +1,188 @@
+"""Starosna struktura potraživanja (nedospjelo, 1-30, 31-60, 61-90, 90+ dana).
+
+Otvoreni iznos računa (ukupno - uplate) i razvrstavanje po danima kašnjenja
+računaju se u bazi jednim upitom grupiranim po klijentu. Izvještaj se drži u
+cacheu za tekući dan, po tenantu; promjena računa ili uplate nakon commita
+preračuna samo retke pogođenih klijenata u već spremljenim izvještajima.
+"""
+
+import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from financije.models.invoice import Invoice, Payment, invoices_changed
+
+ZERO = Decimal("0.00")
+CACHE_TIMEOUT = 60 * 60 * 24
+ALL_TENANTS = "all"
+
+BUCKETS = ("current", "days_1_30", "days_31_60", "days_61_90", "days_90_plus")
+HEADER = ["Klijent", "OIB", "Nedospjelo", "1-30", "31-60", "61-90", "90+", "Ukupno"]
+MONEY_COLUMNS = (2, 3, 4, 5, 6, 7)
+
+
+def bucket_conditions(today):
+    """Uvjeti po razredu kašnjenja; dani kašnjenja su ``today - due_date``."""
+
+    def overdue(days):
+        return today - datetime.timedelta(days=days)
+
+    return {
+        "current": Q(due_date__gte=today),
+        "days_1_30": Q(due_date__lt=today, due_date__gte=overdue(30)),
+        "days_31_60": Q(due_date__lt=overdue(30), due_date__gte=overdue(60)),
+        "days_61_90": Q(due_date__lt=overdue(60), due_date__gte=overdue(90)),
+        "days_90_plus": Q(due_date__lt=overdue(90)),
+    }
+
+
+def _sum(condition=None):
+    return Coalesce(
+        Sum("outstanding", filter=condition),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=18, decimal_places=2),
+    )
+
+
+def open_invoices(tenant=None):
+    """Odobreni računi s otvorenim iznosom (anotacija ``outstanding``)."""
+    invoices = Invoice.objects.with_outstanding().filter(
+        status_fakture="odobreno", outstanding__gt=0
+    )
+    if tenant is not None:
+        invoices = invoices.filter(tenant=tenant)
+    return invoices
+
+
+def compute_aging(tenant=None, today=None, client_ids=None):
+    """Retci po klijentu (jedan upit); ``client_ids`` ograničava na zadane klijente."""
+    today = today or timezone.localdate()
+    invoices = open_invoices(tenant)
+    if client_ids is not None:
+        invoices = invoices.filter(client_id__in=client_ids)
+    annotations = {name: _sum(condition) for name, condition in bucket_conditions(today).items()}
+    return list(
+        invoices.values("client_id", "client__name", "client__oib")
+        .annotate(**annotations, total=_sum())
+        .order_by()
+    )
+
+
+def _cache_key(tenant_id, today):
+    return f"financije:aging:{ALL_TENANTS if tenant_id is None else tenant_id}:{today}"
+
+
+def aging_report(tenant=None, today=None):
+    """
+    Starosna struktura za dan: ``{"date", "clients": [retci po klijentu], "totals"}``.
+
+    Retci se čitaju iz cachea dana; bez cachea računaju se jednim upitom.
+    """
+    tenant_id = getattr(tenant, "pk", tenant)
+    today = today or timezone.localdate()
+    key = _cache_key(tenant_id, today)
+    rows = cache.get(key)
+    if rows is None:
+        rows = {row["client_id"]: row for row in compute_aging(tenant_id, today)}
+        cache.set(key, rows, CACHE_TIMEOUT)
+    clients = sorted(rows.values(), key=lambda row: (row["client__name"], row["client_id"]))
+    totals = {name: sum((row[name] for row in clients), ZERO) for name in (*BUCKETS, "total")}
+    return {"date": today, "clients": clients, "totals": totals}
+
+
+def aging_rows(report):
+    """Retci za CSV/XLSX izvoz (``HEADER``)."""
+    for row in report["clients"]:
+        yield [
+            row["client__name"],
+            row["client__oib"],
+            *(row[name] for name in BUCKETS),
+            row["total"],
+        ]
+
+
+def refresh_clients(tenant_id, client_ids, today=None):
+    """Preračunaj retke klijenata u spremljenim izvještajima dana (tenant i svi tenanti)."""
+    today = today or timezone.localdate()
+    client_ids = set(client_ids)
+    for report_tenant in {tenant_id, None}:
+        key = _cache_key(report_tenant, today)
+        rows = cache.get(key)
+        if rows is None:
+            continue  # izvještaj se izračuna cijeli kod sljedećeg čitanja
+        for client_id in client_ids:
+            rows.pop(client_id, None)
+        rows.update(
+            (row["client_id"], row) for row in compute_aging(report_tenant, today, client_ids)
+        )
+        cache.set(key, rows, CACHE_TIMEOUT)
+
+
+def refresh_on_commit(clients):
+    """``clients`` su parovi (tenant_id, client_id); preračun nakon commita."""
+    by_tenant = {}
+    for tenant_id, client_id in clients:
+        by_tenant.setdefault(tenant_id, set()).add(client_id)
+    for tenant_id, client_ids in by_tenant.items():
+        transaction.on_commit(
+            lambda tenant_id=tenant_id, client_ids=client_ids: refresh_clients(
+                tenant_id, client_ids
+            )
+        )
+
+
+# --- Osvježavanje kod promjene računa i uplata ---
+
+
+@receiver(pre_save, sender=Invoice)
+def remember_invoice_client(sender, instance, raw=False, **kwargs):
+    instance._previous_aging_client = None
+    if instance.pk and not raw:
+        instance._previous_aging_client = (
+            Invoice.objects.filter(pk=instance.pk).values_list("tenant_id", "client_id").first()
+        )
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def refresh_on_invoice_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    clients = {(instance.tenant_id, instance.client_id)}
+    previous = getattr(instance, "_previous_aging_client", None)
+    if previous:
+        clients.add(previous)
+    refresh_on_commit(clients)
+
+
+@receiver(invoices_changed)
+def refresh_on_invoices_changed(sender, invoice_ids, **kwargs):
+    invoice_ids = list(invoice_ids)
+
+    def refresh():
+        clients = {}
+        for tenant_id, client_id in Invoice.objects.filter(pk__in=invoice_ids).values_list(
+            "tenant_id", "client_id"
+        ):
+            clients.setdefault(tenant_id, set()).add(client_id)
+        for tenant_id, client_ids in clients.items():
+            refresh_clients(tenant_id, client_ids)
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_on_payment_change(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or isinstance(origin, Invoice) or getattr(origin, "model", None) is Invoice:
+        return  # uplate se brišu zajedno s računom
+    refresh_on_commit(
+        Invoice.objects.filter(pk=instance.related_invoice_id).values_list("tenant_id", "client_id")
+    )
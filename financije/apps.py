@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class FinancijeConfig(AppConfig):
     name = "financije"
+
+    def ready(self):
+        # Registrira poništavanje/osvježavanje keševa (mapa konta, PDV, starost potraživanja)
+        # i dnevnih pozicija novca.
+        from . import account_map, aging, cash_position, vat_return  # noqa: F401
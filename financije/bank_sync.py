@@ -0,0 +1,339 @@
+"""Sinkronizacija bankovnih transakcija po IBAN-u (BankSyncState) s watermarkom.
+
+Protokol bankovnog API-ja: ``GET api_url?iban=...&cursor=...`` vraća JSON niz
+transakcija nakon ``cursor`` i zaglavlje ``X-Next-Cursor`` s pozicijom iza
+zadnje vraćene. Stranice se traže dok banka ne vrati prazan niz, a watermark
+se sprema tek kad je stranica upisana, pa prekinuta sinkronizacija nastavlja
+od zadnje cijele stranice. Neispravna transakcija (bez reference, tipa, datuma
+ili iznosa) se preskače i bilježi u log i ``last_error``, pa ne zaustavlja
+ostatak stranice ni watermark.
+
+Odgovor se parsira kao tok (bez učitavanja cijele stranice), a transakcije se
+upisuju u serijama: jedan upsert po ``referenca`` i CashFlow zapisi novih
+transakcija u istoj transakciji baze. Računi se dohvaćaju istovremeno (dretva
+po IBAN-u), a u bazu piše samo pozivajuća dretva.
+"""
+
+import datetime
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from financije.models.bank import BankSyncState, BankTransaction, derive_cash_flows
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+CHUNK_SIZE = 64 * 1024
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TIMEOUT = 15
+UPDATE_FIELDS = [
+    "bank_account_number",
+    "bank_name",
+    "tip_transakcije",
+    "iznos",
+    "valuta",
+    "opis",
+    "datum",
+    "datum_valute",
+    "saldo",
+    "poziv_na_broj",
+    "protustrana_iban",
+]
+# Izvor bez naziva banke (npr. datoteka izvoda) ne briše već upisani naziv.
+UPDATE_FIELDS_WITHOUT_BANK_NAME = [field for field in UPDATE_FIELDS if field != "bank_name"]
+CENT = Decimal("0.01")
+TRANSACTION_TYPES = {kind for kind, _label in BankTransaction.TRANSACTION_TYPES}
+
+
+class TransactionError(ValueError):
+    """Neispravna transakcija u odgovoru banke."""
+
+
+def _session(api_key):
+    retry_strategy = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+    adapter = HTTPAdapter(max_retries=retry_strategy)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Authorization": f"Bearer {api_key}", "Accept": "application/json"})
+    return session
+
+
+def _api_key():
+    return getattr(settings, "FINANCIJE_BANK_API_KEY", "")
+
+
+def iter_json_array(chunks):
+    """Elementi JSON niza iz toka tekstualnih dijelova, jedan po jedan."""
+    decoder = json.JSONDecoder(parse_float=Decimal)
+    buffer = ""
+    started = finished = False
+    for chunk in chunks:
+        buffer += chunk
+        pos = 0
+        while not finished:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Odgovor banke nije JSON niz.")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                finished = True
+                break
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element još nije cijeli u spremniku
+            yield item
+        buffer = buffer[pos:]
+    if not finished:
+        raise ValueError("Nepotpun JSON niz u odgovoru banke.")
+
+
+def _money(value, field="amount", reference=None):
+    try:
+        amount = Decimal(str(value if value is not None else "0.00"))
+    except InvalidOperation:
+        amount = None
+    if amount is None or not amount.is_finite():
+        raise TransactionError(f"Transakcija {reference}: neispravan iznos '{field}': {value!r}")
+    return amount.quantize(CENT, ROUND_HALF_UP)
+
+
+def _iso_date(value, field, reference, required=True):
+    if not value:
+        if required:
+            raise TransactionError(f"Transakcija {reference}: nedostaje datum '{field}'.")
+        return None
+    try:
+        datetime.date.fromisoformat(str(value))
+    except ValueError as e:
+        raise TransactionError(
+            f"Transakcija {reference}: neispravan datum '{field}': {value!r}"
+        ) from e
+    return value
+
+
+def transaction_fields(item, iban="", bank_name=None):
+    """
+    Polja ``BankTransaction`` iz jedne transakcije u odgovoru banke.
+
+    Obavezni su ``reference``, ``type`` (priljev/odljev), ``transaction_date`` i
+    ``amount``; neispravna transakcija diže ``TransactionError``.
+    """
+    if not isinstance(item, dict) or not item.get("reference"):
+        raise TransactionError(f"Transakcija bez reference: {str(item)[:100]}")
+    reference = item["reference"]
+    if item.get("type") not in TRANSACTION_TYPES:
+        raise TransactionError(
+            f"Transakcija {reference}: neispravan tip transakcije: {item.get('type')!r}"
+        )
+    if item.get("amount") is None:
+        raise TransactionError(f"Transakcija {reference}: nedostaje iznos 'amount'.")
+    return {
+        "referenca": reference,
+        "tip_transakcije": item["type"],
+        "iznos": _money(item["amount"], "amount", reference),
+        "opis": (item.get("description") or "")[:255],
+        "datum": _iso_date(item.get("transaction_date"), "transaction_date", reference),
+        "datum_valute": _iso_date(item.get("value_date"), "value_date", reference, False),
+        "saldo": _money(item.get("balance"), "balance", reference),
+        "bank_account_number": item.get("iban") or iban,
+        "bank_name": item.get("bank_name") or bank_name,
+        "valuta": item.get("currency", "EUR"),
+        "poziv_na_broj": item.get("payment_reference") or "",
+        "protustrana_iban": item.get("counterparty_iban") or "",
+    }
+
+
+def valid_transactions(items, skipped, iban="", bank_name=None):
+    """Polja ispravnih transakcija; neispravne se preskaču i dodaju u ``skipped``."""
+    rows = []
+    for item in items:
+        try:
+            rows.append(transaction_fields(item, iban, bank_name))
+        except TransactionError as e:
+            logger.warning(f"Preskočena transakcija računa {iban or '-'}: {e}")
+            skipped.append(str(e))
+    return rows
+
+
+@transaction.atomic
+def upsert_transactions(rows):
+    """
+    Upiši seriju transakcija (dictovi polja) jednim upsertom po ``referenca``.
+
+    Retci bez naziva banke upisuju se zasebnim upsertom koji naziv ne mijenja.
+    CashFlow zapisi serije izvode se u istoj transakciji baze
+    (``derive_cash_flows``; ``post_save`` se kod bulk upisa ne šalje).
+    Vraća broj transakcija.
+    """
+    by_reference = {row["referenca"]: row for row in rows}  # zadnja verzija iste reference
+    if not by_reference:
+        return 0
+    known, unknown = [], []
+    for row in by_reference.values():
+        (known if row.get("bank_name") else unknown).append(BankTransaction(**row))
+    for transactions, update_fields in (
+        (known, UPDATE_FIELDS),
+        (unknown, UPDATE_FIELDS_WITHOUT_BANK_NAME),
+    ):
+        if transactions:
+            BankTransaction.objects.bulk_create(
+                transactions,
+                update_conflicts=True,
+                unique_fields=["referenca"],
+                update_fields=update_fields,
+            )
+    derive_cash_flows(BankTransaction.objects.filter(referenca__in=by_reference))
+    return len(by_reference)
+
+
+def in_batches(items, size=BATCH_SIZE):
+    """Liste od najviše ``size`` elemenata iz iterabla, bez učitavanja cijelog."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fetch_pages(session, state, batch_size=BATCH_SIZE, skipped=None):
+    """
+    Transakcije računa nakon watermarka kao ``(retci, watermark)``.
+
+    Watermark je postavljen samo na zadnjoj seriji stranice (inače ``None``).
+    Poruke preskočenih (neispravnih) transakcija dodaju se u ``skipped``.
+    """
+    skipped = [] if skipped is None else skipped
+    cursor = state.cursor
+    while True:
+        params = {"iban": state.bank_account_number}
+        if cursor:
+            params["cursor"] = cursor
+        with session.get(state.api_url, params=params, stream=True, timeout=TIMEOUT) as response:
+            response.raise_for_status()
+            response.encoding = response.encoding or "utf-8"
+            items = iter_json_array(response.iter_content(CHUNK_SIZE, decode_unicode=True))
+            count = 0
+            for batch in in_batches(items, batch_size):
+                count += len(batch)
+                rows = valid_transactions(
+                    batch, skipped, state.bank_account_number, state.bank_name
+                )
+                yield rows, None
+            next_cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not count or not next_cursor:
+            return
+        yield [], next_cursor
+        cursor = next_cursor
+
+
+_DONE = object()
+
+
+def _produce(state, api_key, out, stop, batch_size, skipped):
+    try:
+        with _session(api_key) as session:
+            for rows, watermark in fetch_pages(session, state, batch_size, skipped):
+                if stop.is_set():
+                    break
+                out.put((state, rows, watermark))
+    except Exception as e:  # svaka greška mora završiti račun, inače potrošač čeka zauvijek
+        out.put((state, _DONE, e))
+    else:
+        out.put((state, _DONE, None))
+
+
+def sync_accounts(states=None, batch_size=BATCH_SIZE):
+    """
+    Sinkroniziraj zadane (zadano: sve aktivne) račune; vraća ``{IBAN: broj transakcija}``.
+
+    Greška jednog računa sprema se u ``last_error`` i ne prekida ostale; u
+    ``last_error`` se bilježe i preskočene neispravne transakcije.
+    """
+    states = list(BankSyncState.objects.filter(is_active=True) if states is None else states)
+    if not states:
+        return {}
+    counts = {state.bank_account_number: 0 for state in states}
+    skipped = {state.bank_account_number: [] for state in states}
+    # Ograničen red zadržava dretve koje dohvaćaju brže nego što se upisuje.
+    out = queue.Queue(maxsize=4 * len(states))
+    workers = getattr(settings, "FINANCIJE_BANK_SYNC_WORKERS", 4)
+    stop = threading.Event()
+    pending = len(states)
+    with ThreadPoolExecutor(max_workers=min(workers, len(states))) as pool:
+        for state in states:
+            pool.submit(
+                _produce,
+                state,
+                _api_key(),
+                out,
+                stop,
+                batch_size,
+                skipped[state.bank_account_number],
+            )
+        try:
+            while pending:
+                state, rows, extra = out.get()
+                if rows is _DONE:
+                    pending -= 1
+                    _finish(state, extra, skipped[state.bank_account_number])
+                    continue
+                counts[state.bank_account_number] += upsert_transactions(rows)
+                if extra is not None:
+                    state.cursor = extra
+                    state.save(update_fields=["cursor"])
+        finally:
+            if pending:  # greška pri upisu: zaustavi dretve i isprazni red
+                stop.set()
+                while pending:
+                    pending -= out.get()[1] is _DONE
+    return counts
+
+
+def _finish(state, error, skipped=()):
+    state.last_error = str(error) if error else ""
+    if not error and skipped:
+        state.last_error = f"Preskočeno neispravnih transakcija: {len(skipped)}. {skipped[0]}"
+    fields = ["last_error"]
+    if error is None:
+        state.last_synced_at = timezone.now()
+        fields.append("last_synced_at")
+    else:
+        logger.error(f"Greška pri sinkronizaciji računa {state.bank_account_number}: {error}")
+    state.save(update_fields=fields)
+
+
+def import_statement(api_url, api_key, batch_size=BATCH_SIZE):
+    """Jednokratni uvoz cijelog izvoda (JSON niz) s ``api_url``; vraća broj transakcija."""
+    imported = 0
+    with (
+        _session(api_key) as session,
+        session.get(api_url, stream=True, timeout=TIMEOUT) as response,
+    ):
+        response.raise_for_status()
+        response.encoding = response.encoding or "utf-8"
+        items = iter_json_array(response.iter_content(CHUNK_SIZE, decode_unicode=True))
+        for batch in in_batches(items, batch_size):
+            imported += upsert_transactions(valid_transactions(batch, []))
+    return imported
@@ -0,0 +1,111 @@
+"""Izvještaji toka novca (FinancialReport) za sva razdoblja godine odjednom.
+
+Priljev i odljev za 12 mjeseci, 4 kvartala i godinu računaju se jednim upitom
+nad CashFlow zapisima godine (uvjetna agregacija, ``Sum(..., filter=...)`` po
+razdoblju). Retci FinancialReport se zatim upisuju skupno: postojeći se
+ažuriraju jednim ``bulk_update``, a nedostajući kreiraju jednim ``bulk_create``.
+
+Izvještaj tenanta obuhvaća transakcije njegovih bankovnih računa
+(``BankSyncState.tenant``); izvještaj bez tenanta obuhvaća sve CashFlow zapise.
+"""
+
+import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from financije.models.bank import BankSyncState, CashFlow
+from financije.models.finreports import FinancialReport
+
+ZERO = Decimal("0.00")
+QUARTERS = {1: (1, 2, 3), 2: (4, 5, 6), 3: (7, 8, 9), 4: (10, 11, 12)}
+REPORT_FIELDS = ("priljev_ukupno", "odljev_ukupno", "neto_cash_flow")
+
+
+def report_periods():
+    """Ključevi ``(period, month, kvartal)`` za sve mjesece, kvartale i godinu."""
+    periods = [("monthly", month, None) for month in range(1, 13)]
+    periods += [("quarterly", None, kvartal) for kvartal in QUARTERS]
+    periods.append(("yearly", None, None))
+    return periods
+
+
+def period_months(period, month=None, kvartal=None):
+    if period == "monthly":
+        return (month,) if month else ()
+    if period == "quarterly":
+        return QUARTERS.get(kvartal, ())
+    return tuple(range(1, 13))
+
+
+def tenant_cash_flows(tenant=None):
+    cash_flows = CashFlow.objects.all()
+    if tenant is not None:
+        accounts = BankSyncState.objects.filter(tenant=getattr(tenant, "pk", tenant)).values(
+            "bank_account_number"
+        )
+        cash_flows = cash_flows.filter(bank_transaction__bank_account_number__in=accounts)
+    return cash_flows
+
+
+def _sum(kind, months):
+    return Coalesce(
+        Sum("iznos", filter=Q(tip_transakcije=kind, datum__month__in=months)),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=18, decimal_places=2),
+    )
+
+
+def cash_flow_totals(year, tenant=None, periods=None):
+    """
+    ``{(period, month, kvartal): (priljev, odljev)}`` za godinu, jednim upitom.
+
+    Razdoblje bez mjeseci (mjesečni bez ``month``, kvartalni bez ``kvartal``) ima nule.
+    """
+    periods = report_periods() if periods is None else periods
+    aggregates = {}
+    for n, key in enumerate(periods):
+        months = period_months(*key)
+        if months:
+            aggregates[f"priljev_{n}"] = _sum("priljev", months)
+            aggregates[f"odljev_{n}"] = _sum("odljev", months)
+    totals = {}
+    if aggregates:
+        totals = (
+            tenant_cash_flows(tenant)
+            .filter(datum__range=(datetime.date(year, 1, 1), datetime.date(year, 12, 31)))
+            .aggregate(**aggregates)
+        )
+    return {
+        key: (totals.get(f"priljev_{n}", ZERO), totals.get(f"odljev_{n}", ZERO))
+        for n, key in enumerate(periods)
+    }
+
+
+@transaction.atomic
+def generate_reports(year, tenant=None):
+    """Izračunaj i upiši FinancialReport za sva razdoblja godine; vraća broj redaka."""
+    tenant_id = getattr(tenant, "pk", tenant)
+    totals = cash_flow_totals(year, tenant_id)
+    existing = {}
+    for report in FinancialReport.objects.filter(tenant_id=tenant_id, year=year).order_by("pk"):
+        existing.setdefault((report.period, report.month, report.kvartal), report)
+
+    created, updated = [], []
+    for (period, month, kvartal), (priljev, odljev) in totals.items():
+        report = existing.get((period, month, kvartal))
+        if report is None:
+            report = FinancialReport(
+                tenant_id=tenant_id, period=period, year=year, month=month, kvartal=kvartal
+            )
+            created.append(report)
+        else:
+            updated.append(report)
+        report.priljev_ukupno = priljev
+        report.odljev_ukupno = odljev
+        report.neto_cash_flow = priljev - odljev
+    FinancialReport.objects.bulk_create(created)
+    FinancialReport.objects.bulk_update(updated, REPORT_FIELDS)
+    return len(totals)
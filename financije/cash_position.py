@@ -0,0 +1,241 @@
+"""Dnevna pozicija novca po bankovnom računu i prognoza za sljedećih 90 dana.
+
+``CashPosition`` ima redak po (IBAN, dan s prometom) s priljevom, odljevom i
+kumulativnim saldom. Nakon promjene CashFlow zapisa preračunava se samo
+razdoblje od najranijeg promijenjenog dana nadalje, po računu: početni saldo je
+zadnji redak prije tog dana, a dnevni promet čita se jednim grupiranim upitom.
+
+Prognoza se računa vektorski (numpy, iznosi u centima) nad nizom dana:
+
+* priljevi: otvoreni računi na dan dospijeća (dospjeli na današnji dan);
+* odljevi: otvoreni saldo konta dobavljača (uloga ``payables``) ravnomjerno kroz
+  ``FINANCIJE_PAYABLES_TERM_DAYS`` dana i mjesečni fiksni troškovi (zadnji
+  ``MonthlyOverhead`` mjesec) prvog dana svakog mjeseca.
+"""
+
+import datetime
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, OuterRef, Q, Subquery, Sum
+from django.dispatch import receiver
+from django.utils import timezone
+
+from financije import account_map
+from financije.aging import open_invoices
+from financije.models.balances import AccountBalance
+from financije.models.bank import (
+    BankSyncState,
+    CashFlow,
+    CashPosition,
+    cash_flows_changed,
+    earliest_dates,
+)
+from financije.models.overhead import MonthlyOverhead
+
+ZERO = Decimal("0.00")
+HORIZON_DAYS = 90
+BATCH_SIZE = 1000
+SERIES_DAYS = 365
+
+
+def payables_term_days():
+    return getattr(settings, "FINANCIJE_PAYABLES_TERM_DAYS", 30)
+
+
+def _tenant_filter(queryset, tenant):
+    return queryset if tenant is None else queryset.filter(tenant=getattr(tenant, "pk", tenant))
+
+
+def _cents(amounts):
+    return np.fromiter((int(amount * 100) for amount in amounts), dtype=np.int64)
+
+
+def _decimals(cents):
+    return [Decimal(int(value)).scaleb(-2) for value in cents]
+
+
+@transaction.atomic
+def refresh_cash_positions(starts=None):
+    """
+    Preračunaj dnevne pozicije od ``starts`` (``{IBAN: datum}``) nadalje.
+
+    ``None`` ponovno gradi cijelu tablicu iz CashFlow zapisa. CashFlow bez
+    bankovne transakcije (npr. iz uvoza računa) nije promet bankovnog računa.
+    Vraća broj zapisanih redaka.
+    """
+    cash_flows = CashFlow.objects.filter(bank_transaction__isnull=False)
+    if starts is None:
+        CashPosition.objects.all().delete()
+        starts = earliest_dates(
+            cash_flows.values_list("bank_transaction__bank_account_number")
+            .annotate(start=Min("datum"))
+            .order_by()
+        )
+    tenants = dict(
+        BankSyncState.objects.filter(bank_account_number__in=starts).values_list(
+            "bank_account_number", "tenant_id"
+        )
+    )
+    written = 0
+    for iban, start in starts.items():
+        balance = (
+            CashPosition.objects.filter(bank_account_number=iban, date__lt=start)
+            .order_by("-date")
+            .values_list("balance", flat=True)
+            .first()
+        ) or ZERO
+        days = (
+            cash_flows.filter(bank_transaction__bank_account_number=iban, datum__gte=start)
+            .values("datum")
+            .annotate(
+                inflow=Sum("iznos", filter=Q(tip_transakcije="priljev")),
+                outflow=Sum("iznos", filter=Q(tip_transakcije="odljev")),
+            )
+            .order_by("datum")
+        )
+        positions = []
+        for day in days:
+            inflow, outflow = day["inflow"] or ZERO, day["outflow"] or ZERO
+            balance += inflow - outflow
+            positions.append(
+                CashPosition(
+                    tenant_id=tenants.get(iban),
+                    bank_account_number=iban,
+                    date=day["datum"],
+                    inflow=inflow,
+                    outflow=outflow,
+                    balance=balance,
+                )
+            )
+        CashPosition.objects.filter(bank_account_number=iban, date__gte=start).delete()
+        written += len(CashPosition.objects.bulk_create(positions, batch_size=BATCH_SIZE))
+    return written
+
+
+@receiver(cash_flows_changed)
+def refresh_on_cash_flows_changed(sender, starts, **kwargs):
+    starts = dict(starts)
+    transaction.on_commit(lambda: refresh_cash_positions(starts))
+
+
+def cash_position_series(tenant=None, start=None, end=None):
+    """
+    Dnevni niz ``{"date", "inflow", "outflow", "balance"}`` od ``start`` do ``end``.
+
+    Zbroj svih računa tenanta; dani bez prometa nose saldo prethodnog dana.
+    Čita se jednim upitom: retci razdoblja i zadnji redak prije razdoblja po računu.
+    """
+    end = end or timezone.localdate()
+    start = start or end - datetime.timedelta(days=SERIES_DAYS - 1)
+    days = (end - start).days + 1
+    opening = CashPosition.objects.filter(
+        bank_account_number=OuterRef("bank_account_number"), date__lt=start
+    ).order_by("-date")
+    rows = list(
+        _tenant_filter(CashPosition.objects, tenant)
+        .filter(Q(date__range=(start, end)) | Q(pk=Subquery(opening.values("pk")[:1])))
+        .order_by("bank_account_number", "date")
+        .values_list("bank_account_number", "date", "inflow", "outflow", "balance")
+    )
+    inflow = np.zeros(days, dtype=np.int64)
+    outflow = np.zeros(days, dtype=np.int64)
+    balance = np.zeros(days, dtype=np.int64)
+    if rows:
+        ibans, dates, inflows, outflows, balances = zip(*rows, strict=True)
+        offsets = (np.array(dates, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(
+            np.int64
+        )
+        in_range = offsets >= 0
+        np.add.at(inflow, offsets[in_range], _cents(inflows)[in_range])
+        np.add.at(outflow, offsets[in_range], _cents(outflows)[in_range])
+        balances = _cents(balances)
+        accounts = np.array(ibans)
+        for iban in np.unique(accounts):
+            mine = accounts == iban
+            # Saldo računa na dan svog retka, prenesen na sljedeće dane bez prometa.
+            daily = np.full(days, -1, dtype=np.int64)
+            daily[np.maximum(offsets[mine], 0)] = np.arange(mine.sum())
+            daily = np.maximum.accumulate(daily)
+            balance += np.where(daily >= 0, balances[mine][daily], 0)
+    return {
+        "date": [start + datetime.timedelta(days=n) for n in range(days)],
+        "inflow": _decimals(inflow),
+        "outflow": _decimals(outflow),
+        "balance": _decimals(balance),
+    }
+
+
+def current_balance(tenant=None, today=None):
+    """Zbroj zadnjih salda svih računa tenanta zaključno s ``today``."""
+    today = today or timezone.localdate()
+    latest = CashPosition.objects.filter(
+        bank_account_number=OuterRef("bank_account_number"), date__lte=today
+    ).order_by("-date")
+    return (
+        _tenant_filter(CashPosition.objects, tenant)
+        .filter(pk=Subquery(latest.values("pk")[:1]))
+        .aggregate(total=Sum("balance"))["total"]
+        or ZERO
+    )
+
+
+def open_payables(tenant=None):
+    """Otvoreni saldo konta dobavljača (potražno - dugovno) iz tablice prometa."""
+    account_id = account_map.resolve(tenant).account_ids.get(account_map.PAYABLES)
+    if account_id is None:
+        return ZERO
+    totals = (
+        _tenant_filter(AccountBalance.objects, tenant)
+        .filter(account_id=account_id)
+        .aggregate(debit=Sum("debit"), credit=Sum("credit"))
+    )
+    return max((totals["credit"] or ZERO) - (totals["debit"] or ZERO), ZERO)
+
+
+def monthly_fixed_costs():
+    """Ukupni fiksni troškovi zadnjeg mjeseca unesenog u ``MonthlyOverhead``."""
+    latest = MonthlyOverhead.objects.order_by("-year", "-month").values("year", "month").first()
+    if latest is None:
+        return ZERO
+    return MonthlyOverhead.objects.filter(**latest).aggregate(total=Sum("amount"))["total"]
+
+
+def forecast(tenant=None, today=None, days=HORIZON_DAYS):
+    """
+    Prognoza pozicije novca za ``days`` dana od ``today`` (uključivo).
+
+    Vraća ``{"date", "inflow", "outflow", "balance"}``; ``balance`` kreće od
+    trenutnog salda računa tenanta.
+    """
+    today = today or timezone.localdate()
+    origin = np.datetime64(today, "D")
+    dates = origin + np.arange(days)
+
+    inflow = np.zeros(days, dtype=np.int64)
+    receivables = list(open_invoices(tenant).values_list("due_date", "outstanding").order_by())
+    if receivables:
+        due_dates, amounts = zip(*receivables, strict=True)
+        offsets = np.maximum(
+            (np.array(due_dates, dtype="datetime64[D]") - origin).astype(np.int64), 0
+        )
+        in_horizon = offsets < days
+        np.add.at(inflow, offsets[in_horizon], _cents(amounts)[in_horizon])
+
+    outflow = np.zeros(days, dtype=np.int64)
+    term = min(payables_term_days(), days)
+    payables = int(open_payables(tenant) * 100)
+    outflow[:term] += payables // term
+    outflow[: payables % term] += 1
+    month_starts = dates.astype("datetime64[M]").astype("datetime64[D]") == dates
+    outflow[month_starts] += int(monthly_fixed_costs() * 100)
+
+    balance = int(current_balance(tenant, today) * 100) + np.cumsum(inflow - outflow)
+    return {
+        "date": [today + datetime.timedelta(days=n) for n in range(days)],
+        "inflow": _decimals(inflow),
+        "outflow": _decimals(outflow),
+        "balance": _decimals(balance),
+    }
@@ -0,0 +1,208 @@
+"""Renderiranje dokumenata (PDF računa i ostalih predložaka) s cacheom po sadržaju.
+
+PDF se renderira WeasyPrintom u process poolu, pa ni zahtjev ni batch ne
+čekaju jedan dokument za drugim. Izlaz se sprema u storage pod imenom iz
+hasha verzije predloška i podataka dokumenta: nepromijenjen dokument se ne
+renderira ponovno, a izmjena računa ili predloška daje novo ime.
+
+Kontekst dokumenta su samo stringovi, liste i dictovi, pa se može hashirati
+i poslati u drugi proces bez pristupa bazi.
+"""
+
+import functools
+import hashlib
+import json
+import multiprocessing
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+from django.template.loader import get_template, render_to_string
+from django.utils import formats
+
+from financije.models.invoice import Invoice, InvoiceLine, InvoiceVatBreakdown
+
+DOCUMENT_DIR = "documents"
+BATCH_DIR = f"{DOCUMENT_DIR}/batches"
+# Povećati kod promjene načina renderiranja koja nije vidljiva u predlošku.
+RENDER_VERSION = "1"
+INVOICE_TEMPLATE = "financije/pdf/invoice.html"
+BATCH_CHUNK_SIZE = 200
+
+_pool = None
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def worker_pool():
+    """Zajednički process pool (``FINANCIJE_PDF_WORKERS`` procesa, zadano broj CPU-a)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, "FINANCIJE_PDF_WORKERS", None),
+            initializer=_init_worker,
+        )
+    return _pool
+
+
+@functools.cache
+def template_version(template_name):
+    source = get_template(template_name).template.source
+    return hashlib.sha256(f"{RENDER_VERSION}:{template_name}:{source}".encode()).hexdigest()
+
+
+def content_hash(template_name, context):
+    payload = json.dumps(context, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{template_version(template_name)}:{payload}".encode()).hexdigest()
+
+
+def document_name(digest):
+    return f"{DOCUMENT_DIR}/{digest[:2]}/{digest}.pdf"
+
+
+def render_pdf(template_name, context):
+    """Renderiraj jedan PDF i vrati bajtove; izvodi se u procesu poola."""
+    from weasyprint import HTML
+
+    return HTML(string=render_to_string(template_name, context)).write_pdf()
+
+
+def _save(name, content):
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+
+
+def render_documents(template_name, contexts):
+    """
+    Vrati storage imena PDF-ova za ``contexts`` (istim redom).
+
+    Renderiraju se samo dokumenti kojih još nema. Unutar Celery workera
+    (daemon proces ne smije imati djecu) renderira se u samom workeru.
+    """
+    contexts = list(contexts)
+    names = [document_name(content_hash(template_name, context)) for context in contexts]
+    missing = {}
+    for name, context in zip(names, contexts, strict=True):
+        if name not in missing and not default_storage.exists(name):
+            missing[name] = context
+    if not missing:
+        return names
+    if multiprocessing.current_process().daemon:
+        for name, context in missing.items():
+            _save(name, render_pdf(template_name, context))
+        return names
+    pool = worker_pool()
+    futures = {
+        name: pool.submit(render_pdf, template_name, context) for name, context in missing.items()
+    }
+    for name, future in futures.items():
+        _save(name, future.result())
+    return names
+
+
+# --- Računi ---
+
+
+def _date(value):
+    return formats.date_format(value, "d.m.Y.")
+
+
+def invoice_context(invoice):
+    """Podaci računa za predložak; stavke i rekapitulacija moraju biti dohvaćeni unaprijed."""
+    client = invoice.client
+    return {
+        "number": invoice.invoice_number,
+        "issue_date": _date(invoice.issue_date),
+        "due_date": _date(invoice.due_date),
+        "payment_method": invoice.get_payment_method_display(),
+        "reverse_charge": invoice.reverse_charge,
+        "client": {
+            "name": client.name,
+            "address": client.address,
+            "postal_code": client.postal_code,
+            "city": client.city,
+            "oib": client.oib,
+        },
+        "lines": [
+            {
+                "description": line.description,
+                "quantity": f"{line.quantity:f}",
+                "unit_price": f"{line.unit_price:.2f}",
+                "tax_rate": f"{line.tax_rate.normalize():f}",
+                "total": f"{line.line_total:.2f}",
+            }
+            for line in invoice.lines.all()
+        ],
+        "vat_breakdown": [
+            {"rate": f"{row.rate.normalize():f}", "base": f"{row.base}", "vat": f"{row.vat}"}
+            for row in invoice.vat_breakdown.all()
+        ],
+        "net_amount": f"{invoice.net_amount}",
+        "vat_amount": f"{invoice.vat_amount}",
+        "gross_amount": f"{invoice.gross_amount}",
+    }
+
+
+def invoices_for_documents(invoices=None):
+    invoices = Invoice.objects.all() if invoices is None else invoices
+    return invoices.select_related("client").prefetch_related(
+        Prefetch("lines", queryset=InvoiceLine.objects.order_by("pk")),
+        Prefetch("vat_breakdown", queryset=InvoiceVatBreakdown.objects.order_by("rate")),
+    )
+
+
+def invoice_pdf(invoice_id):
+    """Storage ime PDF-a računa; nepromijenjen račun vraća se iz storagea bez renderiranja."""
+    invoice = invoices_for_documents().get(pk=invoice_id)
+    return render_documents(INVOICE_TEMPLATE, [invoice_context(invoice)])[0]
+
+
+def _archive_name(invoice_number):
+    return re.sub(r"[^\w.-]+", "_", invoice_number) + ".pdf"
+
+
+def invoice_pdf_batch(year, month, tenant=None):
+    """
+    PDF-ovi svih izdanih računa mjeseca u jednoj zip arhivi; vraća storage ime.
+
+    Računi se čitaju i renderiraju u serijama od ``BATCH_CHUNK_SIZE``.
+    """
+    invoices = invoices_for_documents(
+        Invoice.objects.filter(issue_date__year=year, issue_date__month=month).exclude(
+            status_fakture="draft"
+        )
+    ).order_by("issue_date", "pk")
+    if tenant is not None:
+        invoices = invoices.filter(tenant=tenant)
+
+    with tempfile.TemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED) as archive:
+            chunk = []
+            for invoice in invoices.iterator(chunk_size=BATCH_CHUNK_SIZE):
+                chunk.append((invoice.invoice_number, invoice_context(invoice)))
+                if len(chunk) == BATCH_CHUNK_SIZE:
+                    _archive_chunk(archive, chunk)
+                    chunk = []
+            _archive_chunk(archive, chunk)
+        tmp.seek(0)
+        tenant_id = getattr(tenant, "pk", tenant)
+        suffix = f"_{tenant_id}" if tenant_id is not None else ""
+        name = f"{BATCH_DIR}/racuni_{year}_{month:02d}{suffix}.zip"
+        return default_storage.save(name, File(tmp, name=name))
+
+
+def _archive_chunk(archive, chunk):
+    names = render_documents(INVOICE_TEMPLATE, [context for _number, context in chunk])
+    for (number, _context), name in zip(chunk, names, strict=True):
+        with default_storage.open(name) as pdf:
+            archive.writestr(_archive_name(number), pdf.read())
@@ -0,0 +1,364 @@
+"""E-račun u UBL 2.1 formatu (EN 16931) za izdane račune.
+
+XML se piše odmah u izlaz (``XMLGenerator``), bez DOM-a u memoriji. Obavezna
+polja provjeravaju se prije pisanja (``einvoice_errors``), s oznakama
+poslovnih pojmova (BT) iz EN 16931. Svaki dokument se drži u cacheu pod
+hashom svojih podataka, pa vrijedi dok se račun ne promijeni. Skupni izvoz
+piše zip arhivu u serijama računa.
+
+Podaci prodavatelja dolaze iz postavki::
+
+    FINANCIJE_SELLER = {"name": "...", "oib": "...", "address": "...",
+                        "city": "...", "postal_code": "...", "country": "HR"}
+    FINANCIJE_TENANT_SELLER = {<tenant_id>: {...}}
+
+Shema za offline provjeru je u ``financije/schemas/ubl`` (``SCHEMA_PATH``).
+"""
+
+import hashlib
+import io
+import json
+import re
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+from xml.sax.saxutils import XMLGenerator
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils.translation import gettext as _
+
+from financije.documents import BATCH_DIR, invoices_for_documents
+from financije.models.invoice import Invoice
+
+# Povećati kod promjene generiranog XML-a (poništava cache dokumenata).
+GENERATOR_VERSION = "1"
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+BATCH_CHUNK_SIZE = 500
+SCHEMA_PATH = Path(__file__).resolve().parent / "schemas" / "ubl" / "UBL-Invoice-2.1-subset.xsd"
+
+INVOICE_NS = "urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+CAC_NS = "urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+CBC_NS = "urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2"
+CUSTOMIZATION_ID = "urn:cen.eu:en16931:2017"
+CURRENCY = "EUR"
+INVOICE_TYPE_CODE = "380"  # komercijalni račun (UNCL1001)
+UNIT_CODE = "H87"  # komad (UN/ECE Rec. 20)
+OIB_SCHEME = "9934"  # hrvatski PDV identifikator (ISO 6523 ICD)
+PAYMENT_MEANS = {"gotovina": "10", "kartica": "48", "virman": "30"}  # UNCL4461
+COUNTRY_CODES = {"hrvatska": "HR", "republika hrvatska": "HR", "croatia": "HR"}
+
+STANDARD, EXEMPT, REVERSE_CHARGE = "S", "E", "AE"  # UNCL5305
+EXEMPTION_REASONS = {
+    EXEMPT: ("VATEX-EU-O", "Oslobođeno PDV-a"),
+    REVERSE_CHARGE: ("VATEX-EU-AE", "Prijenos porezne obveze"),
+}
+
+CENT = Decimal("0.01")
+
+
+def _money(value):
+    return f"{Decimal(value).quantize(CENT, ROUND_HALF_UP):f}"
+
+
+def country_code(value):
+    value = (value or "").strip()
+    if len(value) == 2 and value.isalpha():
+        return value.upper()
+    return COUNTRY_CODES.get(value.lower())
+
+
+def seller_party(tenant_id=None):
+    seller = dict(getattr(settings, "FINANCIJE_SELLER", {}))
+    if tenant_id is not None:
+        seller.update(getattr(settings, "FINANCIJE_TENANT_SELLER", {}).get(tenant_id, {}))
+    return seller
+
+
+def _oib_valid(value):
+    return bool(re.fullmatch(r"\d{11}", value or ""))
+
+
+def einvoice_errors(invoice, seller):
+    """Poruke za obavezna polja koja nedostaju (prazna lista ako se račun može poslati)."""
+    errors = []
+    if invoice.status_fakture != "odobreno":
+        errors.append(_("Šalje se samo odobren račun."))
+    if not invoice.invoice_number:
+        errors.append(_("BT-1: broj računa je obavezan."))
+    if not invoice.issue_date:
+        errors.append(_("BT-2: datum izdavanja je obavezan."))
+    if not seller.get("name"):
+        errors.append(_("BT-27: naziv prodavatelja nije zadan (FINANCIJE_SELLER)."))
+    if not _oib_valid(seller.get("oib")):
+        errors.append(_("BT-31: OIB prodavatelja mora imati 11 znamenki."))
+    if not country_code(seller.get("country", "HR")):
+        errors.append(_("BT-40: nepoznata država prodavatelja."))
+    client = invoice.client
+    if not client.name:
+        errors.append(_("BT-44: naziv kupca je obavezan."))
+    if not _oib_valid(client.oib):
+        errors.append(_("BT-48: OIB kupca mora imati 11 znamenki."))
+    if not country_code(client.country):
+        errors.append(
+            _("BT-55: nepoznata država kupca '%(country)s'.") % {"country": client.country}
+        )
+    lines = invoice.lines.all()
+    if not lines:
+        errors.append(_("BG-25: račun mora imati barem jednu stavku."))
+    if any(not line.description for line in lines):
+        errors.append(_("BT-153: svaka stavka mora imati naziv."))
+    return errors
+
+
+def _category(rate, reverse_charge):
+    if reverse_charge:
+        return REVERSE_CHARGE
+    return STANDARD if rate else EXEMPT
+
+
+def _party(name, oib, address, city, postal_code, country):
+    return {
+        "name": name,
+        "oib": oib,
+        "address": address or "",
+        "city": city or "",
+        "postal_code": postal_code or "",
+        "country": country_code(country),
+    }
+
+
+def einvoice_data(invoice, seller):
+    """Podaci dokumenta (stringovi, liste, dictovi); ulaz za hash i za pisanje XML-a."""
+    vat_by_rate = {row.rate: row.vat for row in invoice.vat_breakdown.all()}
+    lines, subtotals = [], {}
+    for number, line in enumerate(invoice.lines.all(), start=1):
+        category = _category(line.tax_rate, invoice.reverse_charge)
+        percent = Decimal(0) if category == REVERSE_CHARGE else line.tax_rate
+        amount = line.line_total.quantize(CENT, ROUND_HALF_UP)
+        lines.append(
+            {
+                "id": str(number),
+                "name": line.description,
+                "quantity": f"{line.quantity.normalize():f}",
+                "amount": _money(amount),
+                "price": _money(line.unit_price),
+                "category": category,
+                "percent": f"{percent.normalize():f}",
+            }
+        )
+        key = (category, percent)
+        subtotals[key] = subtotals.get(key, Decimal("0.00")) + amount
+
+    tax_subtotals = []
+    for (category, percent), taxable in sorted(subtotals.items()):
+        tax = vat_by_rate.get(percent, Decimal("0.00")) if category == STANDARD else Decimal(0)
+        tax_subtotals.append(
+            {
+                "category": category,
+                "percent": f"{percent.normalize():f}",
+                "taxable": _money(taxable),
+                "tax": _money(tax),
+            }
+        )
+    line_total = sum(subtotals.values(), Decimal("0.00"))
+    tax_total = sum((Decimal(row["tax"]) for row in tax_subtotals), Decimal("0.00"))
+    client = invoice.client
+    return {
+        "id": invoice.invoice_number,
+        "issue_date": invoice.issue_date.isoformat(),
+        "due_date": invoice.due_date.isoformat() if invoice.due_date else "",
+        "note": EXEMPTION_REASONS[REVERSE_CHARGE][1] if invoice.reverse_charge else "",
+        "payment_means": PAYMENT_MEANS.get(invoice.payment_method, ""),
+        "seller": _party(
+            seller.get("name"),
+            seller.get("oib"),
+            seller.get("address"),
+            seller.get("city"),
+            seller.get("postal_code"),
+            seller.get("country", "HR"),
+        ),
+        "buyer": _party(
+            client.name,
+            client.oib,
+            client.address,
+            client.city,
+            client.postal_code,
+            client.country,
+        ),
+        "tax_total": _money(tax_total),
+        "tax_subtotals": tax_subtotals,
+        "line_total": _money(line_total),
+        "payable": _money(line_total + tax_total),
+        "lines": lines,
+    }
+
+
+class UblWriter:
+    """Piše elemente odmah u izlaz; prefiksi ``cac``/``cbc`` deklarirani su na korijenu."""
+
+    def __init__(self, out):
+        self.xml = XMLGenerator(out, encoding="utf-8", short_empty_elements=True)
+
+    @contextmanager
+    def element(self, tag, **attrs):
+        self.xml.startElement(tag, attrs)
+        yield
+        self.xml.endElement(tag)
+
+    def text(self, tag, value, **attrs):
+        self.xml.startElement(tag, attrs)
+        self.xml.characters(value)
+        self.xml.endElement(tag)
+
+    def amount(self, tag, value):
+        self.text(tag, value, currencyID=CURRENCY)
+
+    def tax_category(self, tag, category, percent):
+        with self.element(tag):
+            self.text("cbc:ID", category)
+            self.text("cbc:Percent", percent)
+            if category in EXEMPTION_REASONS:
+                code, reason = EXEMPTION_REASONS[category]
+                self.text("cbc:TaxExemptionReasonCode", code)
+                self.text("cbc:TaxExemptionReason", reason)
+            with self.element("cac:TaxScheme"):
+                self.text("cbc:ID", "VAT")
+
+    def party(self, tag, party):
+        with self.element(tag), self.element("cac:Party"):
+            self.text("cbc:EndpointID", party["oib"], schemeID=OIB_SCHEME)
+            with self.element("cac:PostalAddress"):
+                for child, key in (
+                    ("cbc:StreetName", "address"),
+                    ("cbc:CityName", "city"),
+                    ("cbc:PostalZone", "postal_code"),
+                ):
+                    if party[key]:
+                        self.text(child, party[key])
+                with self.element("cac:Country"):
+                    self.text("cbc:IdentificationCode", party["country"])
+            with self.element("cac:PartyTaxScheme"):
+                self.text("cbc:CompanyID", f"{party['country']}{party['oib']}")
+                with self.element("cac:TaxScheme"):
+                    self.text("cbc:ID", "VAT")
+            with self.element("cac:PartyLegalEntity"):
+                self.text("cbc:RegistrationName", party["name"])
+                self.text("cbc:CompanyID", party["oib"])
+
+    def invoice(self, data):
+        self.xml.startDocument()
+        root = {"xmlns": INVOICE_NS, "xmlns:cac": CAC_NS, "xmlns:cbc": CBC_NS}
+        with self.element("Invoice", **root):
+            self.text("cbc:CustomizationID", CUSTOMIZATION_ID)
+            self.text("cbc:ID", data["id"])
+            self.text("cbc:IssueDate", data["issue_date"])
+            if data["due_date"]:
+                self.text("cbc:DueDate", data["due_date"])
+            self.text("cbc:InvoiceTypeCode", INVOICE_TYPE_CODE)
+            if data["note"]:
+                self.text("cbc:Note", data["note"])
+            self.text("cbc:DocumentCurrencyCode", CURRENCY)
+            self.party("cac:AccountingSupplierParty", data["seller"])
+            self.party("cac:AccountingCustomerParty", data["buyer"])
+            if data["payment_means"]:
+                with self.element("cac:PaymentMeans"):
+                    self.text("cbc:PaymentMeansCode", data["payment_means"])
+            with self.element("cac:TaxTotal"):
+                self.amount("cbc:TaxAmount", data["tax_total"])
+                for subtotal in data["tax_subtotals"]:
+                    with self.element("cac:TaxSubtotal"):
+                        self.amount("cbc:TaxableAmount", subtotal["taxable"])
+                        self.amount("cbc:TaxAmount", subtotal["tax"])
+                        self.tax_category(
+                            "cac:TaxCategory", subtotal["category"], subtotal["percent"]
+                        )
+            with self.element("cac:LegalMonetaryTotal"):
+                self.amount("cbc:LineExtensionAmount", data["line_total"])
+                self.amount("cbc:TaxExclusiveAmount", data["line_total"])
+                self.amount("cbc:TaxInclusiveAmount", data["payable"])
+                self.amount("cbc:PayableAmount", data["payable"])
+            for line in data["lines"]:
+                with self.element("cac:InvoiceLine"):
+                    self.text("cbc:ID", line["id"])
+                    self.text("cbc:InvoicedQuantity", line["quantity"], unitCode=UNIT_CODE)
+                    self.amount("cbc:LineExtensionAmount", line["amount"])
+                    with self.element("cac:Item"):
+                        self.text("cbc:Name", line["name"])
+                        self.tax_category(
+                            "cac:ClassifiedTaxCategory", line["category"], line["percent"]
+                        )
+                    with self.element("cac:Price"):
+                        self.amount("cbc:PriceAmount", line["price"])
+        self.xml.endDocument()
+
+
+def _render(data):
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    key = (
+        "financije:einvoice:"
+        + hashlib.sha256(f"{GENERATOR_VERSION}:{payload}".encode()).hexdigest()
+    )
+    document = cache.get(key)
+    if document is None:
+        out = io.BytesIO()
+        UblWriter(out).invoice(data)
+        document = out.getvalue()
+        cache.set(key, document, CACHE_TIMEOUT)
+    return document
+
+
+def einvoice_xml(invoice):
+    """UBL XML računa (bajtovi); ``invoice`` s dohvaćenim stavkama i rekapitulacijom."""
+    seller = seller_party(invoice.tenant_id)
+    errors = einvoice_errors(invoice, seller)
+    if errors:
+        raise ValidationError(errors)
+    return _render(einvoice_data(invoice, seller))
+
+
+def einvoice_for(invoice_id):
+    return einvoice_xml(invoices_for_documents().get(pk=invoice_id))
+
+
+def _archive_name(invoice_number):
+    return re.sub(r"[^\w.-]+", "_", invoice_number) + ".xml"
+
+
+def einvoice_batch(year, month, tenant=None):
+    """
+    E-računi izdanih računa mjeseca u zip arhivi.
+
+    Vraća ``{"name": storage ime, "created": broj, "errors": [{"invoice_number", "errors"}]}``;
+    račun s greškom ne prekida izvoz.
+    """
+    invoices = invoices_for_documents(
+        Invoice.objects.filter(
+            issue_date__year=year, issue_date__month=month, status_fakture="odobreno"
+        )
+    ).order_by("issue_date", "pk")
+    tenant_id = getattr(tenant, "pk", tenant)
+    if tenant_id is not None:
+        invoices = invoices.filter(tenant_id=tenant_id)
+
+    created, errors = 0, []
+    with tempfile.TemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as archive:
+            for invoice in invoices.iterator(chunk_size=BATCH_CHUNK_SIZE):
+                try:
+                    document = einvoice_xml(invoice)
+                except ValidationError as e:
+                    errors.append({"invoice_number": invoice.invoice_number, "errors": e.messages})
+                    continue
+                archive.writestr(_archive_name(invoice.invoice_number), document)
+                created += 1
+        tmp.seek(0)
+        suffix = f"_{tenant_id}" if tenant_id is not None else ""
+        name = f"{BATCH_DIR}/e-racuni_{year}_{month:02d}{suffix}.zip"
+        name = default_storage.save(name, File(tmp, name=name))
+    return {"name": name, "created": created, "errors": errors}
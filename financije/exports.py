@@ -0,0 +1,62 @@
+"""Streaming CSV/XLSX izvoz za izvještaje koji se ne smiju držati u memoriji."""
+
+import csv
+import datetime
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class Echo:
+    """Pseudo-buffer: csv.writer vraća redak umjesto da ga sprema."""
+
+    def write(self, value):
+        return value
+
+
+def csv_rows(header, rows):
+    writer = csv.writer(Echo(), delimiter=";")
+    yield "﻿" + writer.writerow(header)  # BOM da Excel prepozna UTF-8
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(filename, header, rows):
+    response = StreamingHttpResponse(csv_rows(header, rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_xlsx(fileobj, header, rows, sheet_name="Izvještaj", money_columns=()):
+    """
+    Zapiši retke u XLSX u ``constant_memory`` načinu (redak po redak na disk).
+
+    ``money_columns`` su indeksi stupaca koji se formatiraju kao iznosi.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True, "in_memory": False})
+    worksheet = workbook.add_worksheet(sheet_name)
+    bold = workbook.add_format({"bold": True})
+    money = workbook.add_format({"num_format": "#,##0.00"})
+    date = workbook.add_format({"num_format": "dd.mm.yyyy."})
+    worksheet.write_row(0, 0, header, bold)
+    money_columns = set(money_columns)
+    for row_index, row in enumerate(rows, start=1):
+        for col_index, value in enumerate(row):
+            if col_index in money_columns and value is not None:
+                worksheet.write_number(row_index, col_index, float(value), money)
+            elif isinstance(value, datetime.date):
+                worksheet.write_datetime(row_index, col_index, value, date)
+            else:
+                worksheet.write(row_index, col_index, value)
+    workbook.close()
+
+
+def xlsx_response(filename, header, rows, money_columns=()):
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(tmp, header, rows, money_columns=money_columns)
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
@@ -27,6 +27,7 @@ from .models import (
     TaxConfiguration,
     VariablePayRule,
 )
+from .models.accounting import ensure_balanced
 
 
 #############################################
@@ -378,3 +379,20 @@ class InvoiceLineForm(forms.ModelForm):
             "unit_price": forms.NumberInput(attrs={"class": "form-control", "step": "0.01"}),
             "tax_rate": forms.NumberInput(attrs={"class": "form-control", "step": "0.01"}),
         }
+
+
+#############################################
+# 22) JournalItem inline formset
+#############################################
+class JournalItemInlineFormSet(forms.BaseInlineFormSet):
+    """Provjera uravnoteženosti temeljnice nad poslanim stavkama, prije zapisa."""
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        ensure_balanced(
+            (form.cleaned_data.get("debit"), form.cleaned_data.get("credit"))
+            for form in self.forms
+            if form.cleaned_data and not form.cleaned_data.get("DELETE")
+        )
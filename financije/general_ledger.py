@@ -0,0 +1,130 @@
+"""Kartica konta (general ledger) s tekućim saldom i keyset straničenjem.
+
+Tekući saldo računa baza prozorskom funkcijom (SUM ... OVER) nad stavkama
+poredanim po (datum, id). Stranice se ne preskaču OFFSET-om nego se nastavljaju
+od zadnjeg (datum, id) prethodne stranice; kursor nosi i saldo na kraju te
+stranice, pa kasnije stranice ne zbrajaju ništa što je već prikazano.
+Početno stanje prve stranice dolazi iz snimke zaključenog razdoblja i prometa
+nakon nje (bruto bilanca na dan prije početka).
+"""
+
+import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import DecimalField, F, Q, Sum, Window
+from django.db.models.expressions import RowRange
+from django.utils.translation import gettext_lazy as _
+
+from financije.models.accounting import Account, JournalItem
+from financije.trial_balance import balances_as_of
+
+ZERO = Decimal("0.00")
+
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+CURSOR_SALT = "financije.general_ledger"
+
+
+def ledger_accounts(number_from, number_to=None):
+    """Konta od ``number_from`` do ``number_to`` (uključivo); bez ``number_to`` samo jedno."""
+    return Account.objects.filter(number__gte=number_from, number__lte=number_to or number_from)
+
+
+def opening_balance(account_ids, tenant=None, start=None):
+    """Neto saldo (duguje - potražuje) konta na kraju dana prije ``start``."""
+    if start is None:
+        return ZERO
+    as_of = balances_as_of(tenant, start - datetime.timedelta(days=1))
+    return sum((as_of.get(account_id, ZERO) for account_id in account_ids), ZERO)
+
+
+def encode_cursor(date, item_id, balance):
+    return signing.dumps([date.isoformat(), item_id, str(balance)], salt=CURSOR_SALT)
+
+
+def decode_cursor(token):
+    try:
+        date, item_id, balance = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise ValidationError(_("Neispravan kursor kartice konta.")) from None
+    return datetime.date.fromisoformat(date), item_id, Decimal(balance)
+
+
+def general_ledger(
+    number_from,
+    number_to=None,
+    tenant=None,
+    start=None,
+    end=None,
+    cursor=None,
+    limit=PAGE_SIZE,
+):
+    """
+    Jedna stranica kartice konta (ili raspona konta).
+
+    Vraća ``{"opening", "lines", "next"}``; ``lines`` su dictovi s ``balance``
+    nakon svake stavke, a ``next`` je kursor sljedeće stranice (ili None).
+    ``tenant=None`` znači svi tenanti, kao i kod bruto bilance.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    account_ids = list(ledger_accounts(number_from, number_to).values_list("pk", flat=True))
+
+    items = JournalItem.objects.filter(account_id__in=account_ids)
+    if tenant is not None:
+        items = items.filter(entry__tenant=tenant)
+    if start is not None:
+        items = items.filter(entry__date__gte=start)
+    if end is not None:
+        items = items.filter(entry__date__lte=end)
+
+    if cursor:
+        after_date, after_id, opening = decode_cursor(cursor)
+        items = items.filter(
+            Q(entry__date__gt=after_date) | Q(entry__date=after_date, pk__gt=after_id)
+        )
+    else:
+        opening = opening_balance(account_ids, tenant, start)
+
+    ordering = [F("entry__date").asc(), F("pk").asc()]
+    rows = list(
+        items.annotate(
+            running=Window(
+                Sum(F("debit") - F("credit")),
+                order_by=ordering,
+                frame=RowRange(start=None, end=0),
+                output_field=DecimalField(max_digits=18, decimal_places=2),
+            )
+        )
+        .order_by(*ordering)
+        .values(
+            "pk",
+            "entry_id",
+            "entry__date",
+            "entry__description",
+            "account__number",
+            "debit",
+            "credit",
+            "running",
+        )[: limit + 1]
+    )
+
+    lines = [
+        {
+            "id": row["pk"],
+            "entry": row["entry_id"],
+            "date": row["entry__date"],
+            "description": row["entry__description"],
+            "account": row["account__number"],
+            "debit": row["debit"],
+            "credit": row["credit"],
+            "balance": opening + row["running"],
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = lines[-1]
+        next_cursor = encode_cursor(last["date"], last["id"], last["balance"])
+    return {"opening": opening, "lines": lines, "next": next_cursor}
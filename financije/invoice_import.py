@@ -0,0 +1,257 @@
+"""Skupni uvoz izlaznih računa (JSON/CSV) sa stavkama i CashFlow zapisima.
+
+Računi se najprije validiraju u memoriji (OIB klijenta, datumi, stope PDV-a,
+duplikati brojeva), a ispravni se zapisuju ``bulk_create``-om u serijama.
+Neispravan redak ne prekida uvoz; greške se vraćaju po retku.
+
+JSON: lista računa ``{"invoice_number", "series", "client_oib",
+"issue_date", "due_date", "payment_method", "status", "lines":
+[{"description", "quantity", "unit_price", "tax_rate"}]}``. Računi bez broja
+dobivaju brojeve iz brojača serije, rezervirane u bloku po seriji.
+CSV (``;``): jedan redak po stavci, zaglavlje računa ponavlja se u svakom
+retku (stupci ``CSV_COLUMNS``); uzastopni retci istog broja su jedan račun.
+"""
+
+import csv
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils.translation import gettext as _
+
+from client_app.models import ClientSupplier
+from financije.models.bank import CashFlow
+from financije.models.invoice import Invoice, InvoiceLine
+from financije.models.numbering import (
+    allocate_invoice_numbers,
+    default_series,
+    format_invoice_number,
+)
+from financije.models.posting import request_posting
+
+CHUNK_SIZE = 500
+DEFAULT_VAT_RATES = ("0", "5", "13", "25")
+IMPORT_STATUSES = ("draft", "odobreno")
+
+CSV_COLUMNS = [
+    "invoice_number",
+    "series",
+    "client_oib",
+    "issue_date",
+    "due_date",
+    "payment_method",
+    "status",
+    "description",
+    "quantity",
+    "unit_price",
+    "tax_rate",
+]
+LINE_FIELDS = ("description", "quantity", "unit_price", "tax_rate")
+
+
+def allowed_vat_rates():
+    return {
+        Decimal(str(rate)) for rate in getattr(settings, "FINANCIJE_VAT_RATES", DEFAULT_VAT_RATES)
+    }
+
+
+def invoices_from_csv(lines, delimiter=";"):
+    """Grupiraj CSV retke (jedna stavka po retku) u dictove računa."""
+    invoices = []
+    for row in csv.DictReader(lines, delimiter=delimiter):
+        row = {key.strip(): (value or "").strip() for key, value in row.items() if key}
+        line = {field: row.pop(field, "") for field in LINE_FIELDS}
+        if invoices and invoices[-1]["invoice_number"] == row.get("invoice_number"):
+            invoices[-1]["lines"].append(line)
+        else:
+            invoices.append({**row, "lines": [line]})
+    return invoices
+
+
+def _date(value, field, errors):
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value))
+    except ValueError:
+        errors.append(_("Neispravan datum u polju '%(field)s'.") % {"field": field})
+        return None
+
+
+def _decimal(value, field, errors):
+    try:
+        number = Decimal(str(value).replace(",", "."))
+    except (InvalidOperation, ValueError):
+        number = None
+    if number is None or not number.is_finite():
+        errors.append(_("Neispravan iznos u polju '%(field)s'.") % {"field": field})
+        return None
+    return number
+
+
+class InvoiceImport:
+    """Validacija i zapis jedne serije računa; ``run()`` vraća rezultat s greškama po retku."""
+
+    def __init__(self, rows, chunk_size=CHUNK_SIZE, user=None, tenant=None):
+        self.rows = list(rows)
+        self.chunk_size = chunk_size
+        self.user = user
+        self.tenant_id = getattr(tenant, "pk", tenant)
+        self.vat_rates = allowed_vat_rates()
+        self.payment_methods = {key for key, _label in Invoice.PAYMENT_METHODS}
+
+    def run(self):
+        valid, errors = self.validate()
+        created = 0
+        for start in range(0, len(valid), self.chunk_size):
+            chunk = valid[start : start + self.chunk_size]
+            try:
+                created += self.write(chunk)
+            except DatabaseError as e:
+                errors.extend(
+                    {"row": index, "invoice_number": invoice.invoice_number, "errors": [str(e)]}
+                    for index, invoice, _lines in chunk
+                )
+        errors.sort(key=lambda error: error["row"])
+        return {"created": created, "errors": errors}
+
+    def validate(self):
+        """Provjeri sve retke uz dva upita (klijenti po OIB-u i postojeći brojevi)."""
+        rows = [row for row in self.rows if isinstance(row, dict)]
+        oibs = {str(row.get("client_oib", "")) for row in rows}
+        clients = dict(ClientSupplier.objects.filter(oib__in=oibs).values_list("oib", "pk"))
+        numbers = [str(row.get("invoice_number") or "") for row in rows]
+        taken = set(
+            Invoice.objects.filter(
+                tenant_id=self.tenant_id, invoice_number__in=numbers
+            ).values_list("invoice_number", flat=True)
+        )
+
+        valid, errors, seen = [], [], set()
+        for index, row in enumerate(self.rows, start=1):
+            if not isinstance(row, dict):
+                errors.append(
+                    {"row": index, "invoice_number": "", "errors": [_("Redak nije račun.")]}
+                )
+                continue
+            row_errors = []
+            invoice = self.build_invoice(row, clients, row_errors)
+            lines = self.build_lines(row.get("lines") or [], row_errors)
+            number = invoice.invoice_number
+            if number in taken:
+                row_errors.append(_("Račun s tim brojem već postoji."))
+            elif number in seen:
+                row_errors.append(_("Broj računa se ponavlja u uvozu."))
+            if number:
+                seen.add(number)
+            if row_errors:
+                errors.append({"row": index, "invoice_number": number, "errors": row_errors})
+            else:
+                valid.append((index, invoice, lines))
+        return valid, errors
+
+    def build_invoice(self, row, clients, errors):
+        number = str(row.get("invoice_number") or "").strip()
+        client_id = clients.get(str(row.get("client_oib", "")))
+        if client_id is None:
+            errors.append(
+                _("Klijent s OIB-om '%(oib)s' ne postoji.") % {"oib": row.get("client_oib")}
+            )
+        issue_date = _date(row.get("issue_date", ""), "issue_date", errors)
+        due_date = _date(row.get("due_date", ""), "due_date", errors)
+        if issue_date and due_date and due_date < issue_date:
+            errors.append(_("Datum dospijeća ne može biti prije datuma izdavanja"))
+        payment_method = row.get("payment_method") or "virman"
+        if payment_method not in self.payment_methods:
+            errors.append(_("Nepoznat način plaćanja '%(value)s'.") % {"value": payment_method})
+        status = row.get("status") or "draft"
+        if status not in IMPORT_STATUSES:
+            errors.append(_("Uvezeni račun može biti samo draft ili odobren."))
+        return Invoice(
+            tenant_id=self.tenant_id,
+            invoice_number=number,
+            number_series=str(row.get("series") or ""),
+            client_id=client_id,
+            issue_date=issue_date,
+            due_date=due_date,
+            payment_method=payment_method,
+            status_fakture=status,
+            user=self.user,
+        )
+
+    def build_lines(self, rows, errors):
+        if not isinstance(rows, list):
+            errors.append(_("Stavke računa moraju biti lista."))
+            return []
+        if not rows:
+            errors.append(_("Račun mora imati barem jednu stavku."))
+        lines = []
+        for line in rows:
+            if not isinstance(line, dict):
+                errors.append(_("Neispravna stavka računa."))
+                continue
+            quantity = _decimal(line.get("quantity", ""), "quantity", errors)
+            unit_price = _decimal(line.get("unit_price", ""), "unit_price", errors)
+            tax_rate = _decimal(line.get("tax_rate") or "25", "tax_rate", errors)
+            if tax_rate is not None and tax_rate not in self.vat_rates:
+                errors.append(_("Stopa PDV-a %(rate)s nije dopuštena.") % {"rate": tax_rate})
+            lines.append(
+                InvoiceLine(
+                    description=str(line.get("description", ""))[:255],
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    tax_rate=tax_rate,
+                )
+            )
+        return lines
+
+    @transaction.atomic
+    def write(self, chunk):
+        """Zapiši seriju: računi, stavke (zbrojevi se preračunaju skupno), CashFlow.
+
+        CashFlow nosi osnovicu računa, kao ``InvoiceService.create_invoice``.
+        """
+        self.assign_numbers([invoice for _index, invoice, _lines in chunk])
+        invoices = Invoice.objects.bulk_create([invoice for _index, invoice, _lines in chunk])
+        lines = []
+        for invoice, (_index, _invoice, invoice_lines) in zip(invoices, chunk, strict=True):
+            for line in invoice_lines:
+                line.invoice = invoice
+                lines.append(line)
+        InvoiceLine.objects.bulk_create(lines)
+        net = dict(
+            Invoice.objects.filter(pk__in=[invoice.pk for invoice in invoices]).values_list(
+                "pk", "net_amount"
+            )
+        )
+        CashFlow.objects.bulk_create(
+            [
+                CashFlow(
+                    tip_transakcije="priljev",
+                    iznos=net[invoice.pk],
+                    opis=f"Invoice {invoice.invoice_number}",
+                    datum=invoice.issue_date,
+                )
+                for invoice in invoices
+            ]
+        )
+        request_posting(invoice.pk for invoice in invoices if invoice.status_fakture == "odobreno")
+        return len(invoices)
+
+    def assign_numbers(self, invoices):
+        """Računima bez broja dodijeli brojeve jednim blokom po (godina, serija)."""
+        unnumbered = {}
+        for invoice in invoices:
+            if not invoice.invoice_number:
+                invoice.number_series = invoice.number_series or default_series()
+                key = (invoice.issue_date.year, invoice.number_series)
+                unnumbered.setdefault(key, []).append(invoice)
+        for (year, series), group in unnumbered.items():
+            numbers = allocate_invoice_numbers(year, series, self.tenant_id, count=len(group))
+            for invoice, number in zip(group, numbers, strict=True):
+                invoice.invoice_number = format_invoice_number(number, series, year)
+
+
+def import_invoices(rows, chunk_size=CHUNK_SIZE, user=None, tenant=None):
+    return InvoiceImport(rows, chunk_size=chunk_size, user=user, tenant=tenant).run()
@@ -0,0 +1,156 @@
+"""Skupno knjiženje temeljnica (bulk posting engine).
+
+Temeljnice se validiraju u memoriji (duguje = potražuje) i zapisuju s nekoliko
+``bulk_create`` naredbi unutar jedne transakcije, zajedno s prometima u
+AccountBalance. Pojedinačni ``JournalEntry.save`` (s ``full_clean``) i signali
+po stavci se pri tome ne pozivaju.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from financije import account_map
+from financije.models.accounting import JournalEntry, JournalItem, ensure_balanced
+from financije.models.balances import add_delta, apply_balance_deltas, balance_key
+from financije.models.periods import locked_periods
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def to_amount(value):
+    return Decimal(str(value or "0")).quantize(CENT, ROUND_HALF_UP)
+
+
+class LedgerEntry:
+    """Temeljnica prije zapisa: datum, opis i stavke ``(account, debit, credit)``."""
+
+    def __init__(self, date, description, lines, tenant=None, user=None, division=""):
+        self.date = date
+        self.description = description
+        self.division = division
+        self.tenant_id = getattr(tenant, "pk", tenant)
+        self.user_id = getattr(user, "pk", user)
+        self.lines = [
+            (getattr(account, "pk", account), to_amount(debit), to_amount(credit))
+            for account, debit, credit in lines
+        ]
+
+    @property
+    def total_debit(self):
+        return sum((line[1] for line in self.lines), ZERO)
+
+    @property
+    def total_credit(self):
+        return sum((line[2] for line in self.lines), ZERO)
+
+    def validate(self):
+        if not self.lines:
+            raise ValidationError(_("Temeljnica mora imati barem jednu stavku."))
+        for account_id, debit, credit in self.lines:
+            if account_id is None:
+                raise ValidationError(_("Stavka temeljnice nema konto."))
+            if debit < ZERO or credit < ZERO:
+                raise ValidationError(_("Iznosi stavke ne mogu biti negativni."))
+            if debit and credit:
+                raise ValidationError(_("Stavka ne može imati i debit i kredit u isto vrijeme."))
+        ensure_balanced((debit, credit) for _account_id, debit, credit in self.lines)
+
+
+def post_entries(entries, batch_size=1000):
+    """
+    Validiraj i proknjiži niz LedgerEntry objekata u jednoj transakciji.
+
+    Ako ijedna temeljnica nije ispravna, ne zapisuje se ništa. Vraća listu
+    kreiranih JournalEntry objekata istim redoslijedom.
+    """
+    entries = list(entries)
+    for entry in entries:
+        entry.validate()
+    if not entries:
+        return []
+    locked = locked_periods((e.tenant_id, e.date.year, e.date.month) for e in entries)
+    if locked:
+        raise ValidationError(
+            _("Razdoblja su zaključena za knjiženje: %(periods)s")
+            % {"periods": ", ".join(sorted({f"{key[2]:02d}/{key[1]}" for key in locked}))}
+        )
+
+    with transaction.atomic():
+        journal_entries = JournalEntry.objects.bulk_create(
+            [
+                JournalEntry(
+                    tenant_id=entry.tenant_id,
+                    date=entry.date,
+                    description=entry.description,
+                    division=entry.division,
+                    user_id=entry.user_id,
+                )
+                for entry in entries
+            ],
+            batch_size=batch_size,
+        )
+
+        items = []
+        deltas = {}
+        for entry, journal_entry in zip(entries, journal_entries, strict=True):
+            for account_id, debit, credit in entry.lines:
+                items.append(
+                    JournalItem(
+                        entry=journal_entry, account_id=account_id, debit=debit, credit=credit
+                    )
+                )
+                add_delta(
+                    deltas, balance_key(entry.tenant_id, account_id, entry.date), debit, credit
+                )
+        JournalItem.objects.bulk_create(items, batch_size=batch_size)
+        apply_balance_deltas(deltas)
+    return journal_entries
+
+
+def invoice_entry(invoice, accounts):
+    """
+    Sastavi LedgerEntry za izlazni račun: kupci / prihodi / PDV po stopi.
+
+    Iznosi dolaze iz spremljenih zbrojeva računa (``net_amount`` i rekapitulacija
+    ``vat_breakdown``); ``accounts`` je AccountMap iz ``financije.account_map.resolve``.
+    Račun s prijenosom porezne obveze knjiži se bez PDV-a.
+    """
+    osnovica = invoice.net_amount
+    pdv_po_stopi = {}
+    if not invoice.reverse_charge:
+        pdv_po_stopi = {row.rate: row.vat for row in invoice.vat_breakdown.all()}
+    pdv_iznos = sum(pdv_po_stopi.values(), ZERO)
+
+    lines = [
+        (accounts[account_map.RECEIVABLES], osnovica + pdv_iznos, ZERO),
+        (accounts[account_map.REVENUE], ZERO, osnovica),
+    ]
+    for rate, amount in sorted(pdv_po_stopi.items()):
+        if amount:
+            lines.append((accounts.vat_payable(rate), ZERO, amount))
+    return LedgerEntry(
+        date=invoice.issue_date,
+        description=f"Automatsko knjiženje računa br. {invoice.invoice_number}",
+        lines=lines,
+        tenant=invoice.tenant_id,
+        user=invoice.user_id,
+    )
+
+
+def post_invoices(invoices, batch_size=1000):
+    """
+    Proknjiži skup računa jednim prolazom (rekapitulacija PDV-a se dohvaća unaprijed).
+
+    Konta se razrješavaju po tenantu računa (``FINANCIJE_TENANT_ACCOUNT_MAP``).
+    """
+    if hasattr(invoices, "prefetch_related"):
+        invoices = invoices.prefetch_related("vat_breakdown")
+    accounts = account_map.TenantAccountMaps()
+    return post_entries(
+        (invoice_entry(invoice, accounts[invoice.tenant_id]) for invoice in invoices),
+        batch_size=batch_size,
+    )
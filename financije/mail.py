@@ -0,0 +1,220 @@
+"""Izlazni red e-pošte (OutgoingEmail) i slanje u serijama iz Celery taska.
+
+Poruke se upisuju u bazu u transakciji zahtjeva, a slanje se pokreće tek
+nakon commita, pa zahtjev ne čeka SMTP. Worker preuzima seriju dospjelih
+poruka i šalje ih kroz jednu SMTP vezu. Neuspjela poruka ponovno se šalje s
+rastućim razmakom, a poruka primatelju koji je dosegao ograničenje
+(``FINANCIJE_MAIL_RECIPIENT_RATE``) odgađa se do isteka prozora.
+"""
+
+import datetime
+import smtplib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from financije.aging import open_invoices
+from financije.models.mail import OutgoingEmail
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60  # sekundi, udvostručuje se sa svakim pokušajem
+# Poruka preuzeta za slanje koja nakon ovoga nije zatvorena (pao worker) ponovno je dospjela.
+CLAIM_TIMEOUT = datetime.timedelta(minutes=15)
+RETRY_LOCK_KEY = "financije:mail:retry"
+
+
+def recipient_rate():
+    """Najviše poruka po primatelju u prozoru: ``(broj, sekunde)``."""
+    return getattr(settings, "FINANCIJE_MAIL_RECIPIENT_RATE", (30, 60))
+
+
+def _schedule_sending(countdown=None):
+    from financije.tasks import send_outgoing_emails
+
+    send_outgoing_emails.apply_async(countdown=countdown)
+
+
+def queue_emails(messages):
+    """
+    Upiši nespremljene ``OutgoingEmail`` poruke u red; vraća broj upisanih.
+
+    Poruke čiji ``dedupe_key`` već postoji se preskaču. Slanje se pokreće
+    nakon commita transakcije.
+    """
+    messages = list(messages)
+    keys = [message.dedupe_key for message in messages if message.dedupe_key]
+    existing = set(
+        OutgoingEmail.objects.filter(dedupe_key__in=keys).values_list("dedupe_key", flat=True)
+    )
+    messages = [message for message in messages if message.dedupe_key not in existing]
+    if not messages:
+        return 0
+    OutgoingEmail.objects.bulk_create(messages, ignore_conflicts=True)
+    transaction.on_commit(_schedule_sending)
+    return len(messages)
+
+
+def queue_email(recipient, subject, body, **fields):
+    """Jedna poruka u red; ``fields`` su ostala polja ``OutgoingEmail`` (kind, invoice, ...)."""
+    return queue_emails([OutgoingEmail(recipient=recipient, subject=subject, body=body, **fields)])
+
+
+def _claim(batch_size, now):
+    due = Q(status=OutgoingEmail.PENDING, next_attempt_at__lte=now) | Q(
+        status=OutgoingEmail.SENDING, claimed_at__lt=now - CLAIM_TIMEOUT
+    )
+    with transaction.atomic():
+        ids = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by("next_attempt_at", "pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=ids).update(
+            status=OutgoingEmail.SENDING, claimed_at=now
+        )
+    return list(OutgoingEmail.objects.filter(pk__in=ids).order_by("next_attempt_at", "pk"))
+
+
+def _sent_counts(recipients, since):
+    return dict(
+        OutgoingEmail.objects.filter(
+            recipient__in=recipients, status=OutgoingEmail.SENT, sent_at__gte=since
+        )
+        .values("recipient")
+        .annotate(count=Count("pk"))
+        .values_list("recipient", "count")
+    )
+
+
+def _failed(message, error, now):
+    message.attempts += 1
+    message.error = str(error)
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = OutgoingEmail.FAILED
+    else:
+        message.status = OutgoingEmail.PENDING
+        delay = RETRY_DELAY * 2 ** (message.attempts - 1)
+        message.next_attempt_at = now + datetime.timedelta(seconds=delay)
+
+
+def _send(messages, connection, now):
+    limit, window = recipient_rate()
+    counts = _sent_counts(
+        {message.recipient for message in messages}, now - datetime.timedelta(seconds=window)
+    )
+    for message in messages:
+        if counts.get(message.recipient, 0) >= limit:
+            message.status = OutgoingEmail.PENDING
+            message.next_attempt_at = now + datetime.timedelta(seconds=window)
+            continue
+        email = EmailMessage(
+            message.subject,
+            message.body,
+            message.from_email or None,
+            [message.recipient],
+            connection=connection,
+        )
+        try:
+            connection.send_messages([email])
+        except OSError as e:  # smtplib.SMTPException je podklasa OSError
+            _failed(message, e, now)
+            if isinstance(e, smtplib.SMTPServerDisconnected):
+                connection.close()  # sljedeća poruka otvara novu vezu
+            continue
+        message.attempts += 1
+        message.status = OutgoingEmail.SENT
+        message.sent_at = timezone.now()
+        message.error = ""
+        counts[message.recipient] = counts.get(message.recipient, 0) + 1
+
+
+def send_batch(batch_size=BATCH_SIZE):
+    """Pošalji jednu seriju dospjelih poruka kroz jednu SMTP vezu; vraća broj preuzetih."""
+    now = timezone.now()
+    messages = _claim(batch_size, now)
+    if not messages:
+        return 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except OSError as e:
+        for message in messages:
+            _failed(message, e, now)
+    else:
+        try:
+            _send(messages, connection, now)
+        finally:
+            connection.close()
+    OutgoingEmail.objects.bulk_update(
+        messages, ["status", "attempts", "next_attempt_at", "sent_at", "error"]
+    )
+    return len(messages)
+
+
+def send_pending_emails(batch_size=BATCH_SIZE):
+    """
+    Šalji serije dok ima dospjelih poruka; vraća broj preuzetih poruka.
+
+    Za odgođene poruke (ponovni pokušaj, ograničenje po primatelju) zakazuje
+    se jedno novo pokretanje u trenutku prve dospjele.
+    """
+    processed = 0
+    while count := send_batch(batch_size):
+        processed += count
+    next_at = OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING).aggregate(
+        next_at=Min("next_attempt_at")
+    )["next_at"]
+    if next_at is not None:
+        countdown = max(int((next_at - timezone.now()).total_seconds()) + 1, 1)
+        if cache.add(RETRY_LOCK_KEY, True, timeout=countdown):
+            _schedule_sending(countdown)
+    return processed
+
+
+# --- Opomene ---
+
+
+def dunning_message(invoice, today):
+    return OutgoingEmail(
+        tenant_id=invoice.tenant_id,
+        invoice=invoice,
+        kind=OutgoingEmail.DUNNING,
+        recipient=invoice.client.email,
+        subject=_("Opomena: račun %(number)s") % {"number": invoice.invoice_number},
+        body=_(
+            "Poštovani,\n\nračun %(number)s dospio je %(due_date)s i nije u cijelosti "
+            "plaćen. Otvoreni iznos: %(amount)s EUR.\n\nMolimo Vas da dug podmirite."
+        )
+        % {
+            "number": invoice.invoice_number,
+            "due_date": invoice.due_date.strftime("%d.%m.%Y."),
+            "amount": invoice.outstanding,
+        },
+        dedupe_key=f"dunning:{invoice.pk}:{today}",
+    )
+
+
+def queue_dunning(tenant=None, today=None):
+    """
+    Opomene za sve dospjele otvorene račune (najviše jedna po računu dnevno).
+
+    Vraća broj upisanih poruka; šalju se u serijama nakon commita.
+    """
+    today = today or timezone.localdate()
+    invoices = (
+        open_invoices(tenant)
+        .filter(due_date__lt=today)
+        .exclude(client__email="")
+        .select_related("client")
+        .order_by("pk")
+    )
+    return queue_emails(
+        dunning_message(invoice, today) for invoice in invoices.iterator(chunk_size=BATCH_SIZE)
+    )
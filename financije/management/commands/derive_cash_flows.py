@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from financije.models.bank import CASH_FLOW_BATCH_SIZE, BankTransaction, derive_cash_flows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create missing CashFlow rows for bank transactions and resync changed ones; "
+        "safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iban", help="Only transactions of this bank account.")
+        parser.add_argument("--batch-size", type=int, default=CASH_FLOW_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        transactions = BankTransaction.objects.all()
+        if options["iban"]:
+            transactions = transactions.filter(bank_account_number=options["iban"])
+        created = derive_cash_flows(transactions, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} CashFlow row(s)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from financije.cash_flow_reports import generate_reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate cash flow FinancialReport rows for all months, quarters and the year; "
+        "one aggregate query per year and tenant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-year", type=int)
+        parser.add_argument("--to-year", type=int)
+        parser.add_argument("--tenant", type=int, help="Tenant ID (default: all CashFlow).")
+
+    def handle(self, *args, **options):
+        to_year = options["to_year"] or timezone.localdate().year
+        from_year = options["from_year"] or to_year
+        written = sum(
+            generate_reports(year, options["tenant"]) for year in range(from_year, to_year + 1)
+        )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} FinancialReport row(s)."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from financije.bank_sync import BATCH_SIZE
+from financije.statement_files import FORMATS, StatementError, import_statement_file
+
+
+class Command(BaseCommand):
+    help = "Import bank statement files (camt.053 XML or MT940); re-imports update in place."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Statement file(s).")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Statement format (default: detected from the file content).",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for path in options["paths"]:
+            try:
+                with open(path, "rb") as fh:
+                    counts = import_statement_file(
+                        fh, options["format"], batch_size=options["batch_size"]
+                    )
+            except (OSError, StatementError) as e:
+                raise CommandError(f"Cannot import {path}: {e}") from e
+            for iban, count in counts.items():
+                self.stdout.write(f"{path}: {iban}: {count} transaction(s)")
+            self.stdout.write(
+                self.style.SUCCESS(f"Imported {sum(counts.values())} transaction(s) from {path}.")
+            )
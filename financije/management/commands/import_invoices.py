@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from financije.invoice_import import CHUNK_SIZE, import_invoices, invoices_from_csv
+
+
+class Command(BaseCommand):
+    help = "Bulk-import invoices with lines from a JSON or CSV file; reports per-row errors."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON list of invoices or ';'-separated CSV file.")
+        parser.add_argument(
+            "--format",
+            choices=["json", "csv"],
+            help="Input format (default: from the file extension).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--tenant", type=int, help="Tenant id the invoices belong to.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "json")
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as fh:
+                rows = invoices_from_csv(fh) if fmt == "csv" else json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {path}: {e}") from e
+        if not isinstance(rows, list):
+            raise CommandError("Expected a JSON list of invoices.")
+
+        result = import_invoices(rows, chunk_size=options["chunk_size"], tenant=options["tenant"])
+        for error in result["errors"]:
+            self.stderr.write(
+                f"row {error['row']} ({error['invoice_number']}): {'; '.join(error['errors'])}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['created']} invoice(s); {len(result['errors'])} row(s) rejected."
+            )
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from financije.models.balances import (
+    balance_drift,
+    compute_balances_from_journal,
+    rebuild_account_balances,
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute AccountBalance from JournalItem in one grouped query and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report drift; do not rewrite the balance table.",
+        )
+
+    def handle(self, *args, **options):
+        expected = compute_balances_from_journal()
+        drift = balance_drift(expected=expected)
+        for (tenant_id, account_id, year, month), (exp, got) in sorted(
+            drift.items(), key=lambda item: tuple(str(part) for part in item[0])
+        ):
+            self.stdout.write(
+                f"tenant={tenant_id} account={account_id} {month:02d}/{year}: "
+                f"expected D {exp[0]} / C {exp[1]}, stored D {got[0]} / C {got[1]}"
+            )
+
+        if options["verify"]:
+            if drift:
+                raise CommandError(f"{len(drift)} balance row(s) drifted from JournalItem.")
+            self.stdout.write(self.style.SUCCESS("Account balances match JournalItem."))
+            return
+
+        rows = rebuild_account_balances()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {rows} balance row(s); fixed {len(drift)} drifted row(s).")
+        )
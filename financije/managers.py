@@ -1,4 +1,18 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import (
+    BooleanField,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
@@ -7,3 +21,46 @@ class OverheadManager(models.Manager):
         """Get current month's overhead"""
         today = timezone.now()
         return self.filter(godina=today.year, mjesec=today.month).first()
+
+
+class JournalEntryQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Anotiraj ``debit_total``, ``credit_total`` i ``balanced`` u istom upitu.
+
+        JournalEntry.total_debit/total_credit/is_balanced() koriste anotacije
+        kad postoje, pa lista temeljnica ne radi upit po retku.
+        """
+        zero = Value(Decimal("0.00"), output_field=DecimalField(max_digits=16, decimal_places=2))
+        return self.annotate(
+            debit_total=Coalesce(Sum("journalitem_set__debit"), zero),
+            credit_total=Coalesce(Sum("journalitem_set__credit"), zero),
+        ).annotate(
+            balanced=ExpressionWrapper(
+                Q(debit_total=F("credit_total")), output_field=BooleanField()
+            )
+        )
+
+
+class InvoiceQuerySet(models.QuerySet):
+    def with_outstanding(self):
+        """
+        Anotiraj ``paid_total`` (zbroj uplata) i ``outstanding`` (ukupno - uplaćeno).
+
+        Uplate se zbrajaju podupitom, pa se anotacija može dalje grupirati
+        (npr. po klijentu) bez umnažanja redaka računa.
+        """
+        money = DecimalField(max_digits=14, decimal_places=2)
+        payments = (
+            self.model._meta.get_field("payments")
+            .related_model.objects.filter(related_invoice=OuterRef("pk"))
+            .order_by()
+            .values("related_invoice")
+            .annotate(total=Sum("amount"))
+            .values("total")
+        )
+        return self.annotate(
+            paid_total=Coalesce(Subquery(payments, output_field=money), Value(Decimal("0.00")))
+        ).annotate(
+            outstanding=ExpressionWrapper(F("gross_amount") - F("paid_total"), output_field=money)
+        )
@@ -0,0 +1,132 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:45
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+
+def backfill_account_balances(apps, schema_editor):
+    JournalItem = apps.get_model("financije", "JournalItem")
+    AccountBalance = apps.get_model("financije", "AccountBalance")
+    rows = (
+        JournalItem.objects.values(
+            "entry__tenant_id", "account_id", "entry__date__year", "entry__date__month"
+        )
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+    )
+    AccountBalance.objects.bulk_create(
+        [
+            AccountBalance(
+                tenant_id=row["entry__tenant_id"],
+                account_id=row["account_id"],
+                year=row["entry__date__year"],
+                month=row["entry__date__month"],
+                debit=row["debit_sum"] or Decimal("0.00"),
+                credit=row["credit_sum"] or Decimal("0.00"),
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0005_tenant_vat_fiscal_and_settings_accounts"),
+        ("financije", "0014_alter_breakevensnapshot_unique_together_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journalentry",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="tenants.tenant",
+                verbose_name="Tenant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="racun",
+            name="primka_ref",
+            field=models.CharField(
+                blank=True,
+                help_text="Legacy skladiste.Primka identifier (string copy).",
+                max_length=50,
+                null=True,
+                verbose_name="Primka ref",
+            ),
+        ),
+        migrations.CreateModel(
+            name="AccountBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("year", models.PositiveIntegerField(verbose_name="Godina")),
+                ("month", models.PositiveIntegerField(verbose_name="Mjesec")),
+                (
+                    "debit",
+                    models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=16),
+                ),
+                (
+                    "credit",
+                    models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=16),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="period_balances",
+                        to="financije.account",
+                        verbose_name="Konto",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="tenants.tenant",
+                        verbose_name="Tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Promet konta",
+                "verbose_name_plural": "Prometi konta",
+                "ordering": ["account", "year", "month"],
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "year", "month"], name="financije_a_tenant__0efcff_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="accountbalance",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", False)),
+                fields=("tenant", "account", "year", "month"),
+                name="accountbalance_unique_tenant_period",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="accountbalance",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", True)),
+                fields=("account", "year", "month"),
+                name="accountbalance_unique_period_no_tenant",
+            ),
+        ),
+        migrations.RunPython(backfill_account_balances, migrations.RunPython.noop),
+    ]
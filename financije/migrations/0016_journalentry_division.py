@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0015_account_balance"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journalentry",
+            name="division",
+            field=models.CharField(blank=True, default="", max_length=64, verbose_name="Divizija"),
+        ),
+        migrations.AddIndex(
+            model_name="journalentry",
+            index=models.Index(fields=["tenant", "date"], name="financije_j_tenant__d5932b_idx"),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_account_closure(apps, schema_editor):
+    Account = apps.get_model("financije", "Account")
+    AccountClosure = apps.get_model("financije", "AccountClosure")
+    parents = dict(Account.objects.values_list("id", "parent_account_id"))
+    rows = []
+    for account_id in parents:
+        node, depth, seen = account_id, 0, set()
+        while node is not None and node not in seen:
+            seen.add(node)
+            rows.append(AccountClosure(ancestor_id=node, descendant_id=account_id, depth=depth))
+            node, depth = parents.get(node), depth + 1
+    AccountClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0016_journalentry_division"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("depth", models.PositiveIntegerField(default=0)),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="financije.account",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="financije.account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Hijerarhija konta",
+                "verbose_name_plural": "Hijerarhija konta",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "ancestor"], name="financije_a_descend_a4a160_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="accountclosure",
+            constraint=models.UniqueConstraint(
+                fields=("ancestor", "descendant"), name="accountclosure_unique_path"
+            ),
+        ),
+        migrations.RunPython(build_account_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:55
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0005_tenant_vat_fiscal_and_settings_accounts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("financije", "0017_account_closure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountingPeriod",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("year", models.PositiveIntegerField(verbose_name="Godina")),
+                ("month", models.PositiveIntegerField(verbose_name="Mjesec")),
+                ("is_closed", models.BooleanField(default=False, verbose_name="Zaključeno")),
+                (
+                    "closed_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Zaključeno u"),
+                ),
+                (
+                    "closed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Zaključio",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="tenants.tenant",
+                        verbose_name="Tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Obračunsko razdoblje",
+                "verbose_name_plural": "Obračunska razdoblja",
+                "ordering": ["year", "month"],
+            },
+        ),
+        migrations.CreateModel(
+            name="PeriodClosingBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("year", models.PositiveIntegerField(verbose_name="Godina")),
+                ("month", models.PositiveIntegerField(verbose_name="Mjesec")),
+                (
+                    "debit",
+                    models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=16),
+                ),
+                (
+                    "credit",
+                    models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=16),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="closing_balances",
+                        to="financije.account",
+                        verbose_name="Konto",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="tenants.tenant",
+                        verbose_name="Tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Zaključno stanje konta",
+                "verbose_name_plural": "Zaključna stanja konta",
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "year", "month"], name="financije_p_tenant__660e95_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="accountingperiod",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", False)),
+                fields=("tenant", "year", "month"),
+                name="accountingperiod_unique_tenant_period",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="accountingperiod",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", True)),
+                fields=("year", "month"),
+                name="accountingperiod_unique_period_no_tenant",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="accountingperiod",
+            constraint=models.CheckConstraint(
+                check=models.Q(("month__gte", 1), ("month__lte", 12)),
+                name="accountingperiod_valid_month",
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0018_accounting_periods"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InvoicePosting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(verbose_name="Verzija")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Čeka knjiženje"),
+                            ("posted", "Proknjiženo"),
+                            ("reversed", "Stornirano"),
+                            ("skipped", "Preskočeno"),
+                            ("failed", "Greška"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, default="", verbose_name="Greška")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "invoice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="postings",
+                        to="financije.invoice",
+                        verbose_name="Račun",
+                    ),
+                ),
+                (
+                    "journal_entry",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="financije.journalentry",
+                        verbose_name="Temeljnica",
+                    ),
+                ),
+                (
+                    "reversal_entry",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="financije.journalentry",
+                        verbose_name="Storno temeljnica",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Knjiženje računa",
+                "verbose_name_plural": "Knjiženja računa",
+                "indexes": [
+                    models.Index(fields=["status", "id"], name="financije_i_status_0e88f9_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="invoiceposting",
+            constraint=models.UniqueConstraint(
+                fields=("invoice", "version"), name="invoiceposting_unique_version"
+            ),
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:04
+
+from decimal import ROUND_HALF_UP, Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_invoice_totals(apps, schema_editor):
+    Invoice = apps.get_model("financije", "Invoice")
+    InvoiceLine = apps.get_model("financije", "InvoiceLine")
+    InvoiceVatBreakdown = apps.get_model("financije", "InvoiceVatBreakdown")
+    cent, zero = Decimal("0.01"), Decimal("0.00")
+
+    per_rate = {}
+    for invoice_id, rate, quantity, unit_price in InvoiceLine.objects.values_list(
+        "invoice_id", "tax_rate", "quantity", "unit_price"
+    ).iterator():
+        rates = per_rate.setdefault(invoice_id, {})
+        base, vat = rates.get(rate, (zero, zero))
+        line_total = quantity * unit_price
+        rates[rate] = (base + line_total, vat + line_total * (rate / Decimal("100.00")))
+
+    invoices, breakdown = [], []
+    for invoice_id, rates in per_rate.items():
+        net = sum((base for base, _vat in rates.values()), zero).quantize(cent, ROUND_HALF_UP)
+        vat_total = zero
+        for rate, (base, vat) in rates.items():
+            vat = vat.quantize(cent, ROUND_HALF_UP)
+            vat_total += vat
+            breakdown.append(
+                InvoiceVatBreakdown(
+                    invoice_id=invoice_id,
+                    rate=rate,
+                    base=base.quantize(cent, ROUND_HALF_UP),
+                    vat=vat,
+                )
+            )
+        invoices.append(
+            Invoice(
+                pk=invoice_id, net_amount=net, vat_amount=vat_total, gross_amount=net + vat_total
+            )
+        )
+    Invoice.objects.bulk_update(
+        invoices, ["net_amount", "vat_amount", "gross_amount"], batch_size=1000
+    )
+    InvoiceVatBreakdown.objects.bulk_create(breakdown, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0019_invoice_posting"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="gross_amount",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                editable=False,
+                max_digits=14,
+                verbose_name="Ukupno s PDV-om",
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="net_amount",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                editable=False,
+                max_digits=14,
+                verbose_name="Osnovica",
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="vat_amount",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                editable=False,
+                max_digits=14,
+                verbose_name="Iznos PDV-a",
+            ),
+        ),
+        migrations.CreateModel(
+            name="InvoiceVatBreakdown",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "rate",
+                    models.DecimalField(decimal_places=2, max_digits=5, verbose_name="Stopa PDV-a"),
+                ),
+                (
+                    "base",
+                    models.DecimalField(decimal_places=2, max_digits=14, verbose_name="Osnovica"),
+                ),
+                (
+                    "vat",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=14, verbose_name="Iznos PDV-a"
+                    ),
+                ),
+                (
+                    "invoice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vat_breakdown",
+                        to="financije.invoice",
+                        verbose_name="Račun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Rekapitulacija PDV-a",
+                "verbose_name_plural": "Rekapitulacija PDV-a",
+                "ordering": ["rate"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="invoicevatbreakdown",
+            constraint=models.UniqueConstraint(
+                fields=("invoice", "rate"), name="invoicevat_unique_rate"
+            ),
+        ),
+        migrations.RunPython(backfill_invoice_totals, migrations.RunPython.noop),
+    ]
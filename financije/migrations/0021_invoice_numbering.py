@@ -0,0 +1,105 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0005_tenant_vat_fiscal_and_settings_accounts"),
+        ("financije", "0020_invoice_totals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InvoiceSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("year", models.PositiveIntegerField(verbose_name="Godina")),
+                ("series", models.CharField(max_length=20, verbose_name="Serija")),
+                ("last_number", models.PositiveIntegerField(default=0, verbose_name="Zadnji broj")),
+            ],
+            options={
+                "verbose_name": "Brojač računa",
+                "verbose_name_plural": "Brojači računa",
+            },
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="number_series",
+            field=models.CharField(
+                blank=True,
+                default="",
+                max_length=20,
+                verbose_name="Serija (poslovni prostor/naplatni uređaj)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="tenants.tenant",
+                verbose_name="Tenant",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="invoice",
+            name="invoice_number",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=100, verbose_name="Broj fakture"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="invoice",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", False)),
+                fields=("tenant", "invoice_number"),
+                name="invoice_unique_tenant_number",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="invoice",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", True)),
+                fields=("invoice_number",),
+                name="invoice_unique_number_no_tenant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoicesequence",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="tenants.tenant",
+                verbose_name="Tenant",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="invoicesequence",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", False)),
+                fields=("tenant", "year", "series"),
+                name="invoicesequence_unique_tenant_series",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="invoicesequence",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", True)),
+                fields=("year", "series"),
+                name="invoicesequence_unique_series_no_tenant",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0021_invoice_numbering"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="reverse_charge",
+            field=models.BooleanField(default=False, verbose_name="Prijenos porezne obveze"),
+        ),
+    ]
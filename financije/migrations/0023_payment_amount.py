@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:21
+
+import datetime
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0022_invoice_reverse_charge"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="amount",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                max_digits=14,
+                verbose_name="Iznos uplate",
+            ),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="payment_date",
+            field=models.DateField(default=datetime.date.today, verbose_name="Datum uplate"),
+        ),
+    ]
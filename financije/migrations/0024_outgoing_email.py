@@ -0,0 +1,110 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0005_tenant_vat_fiscal_and_settings_accounts"),
+        ("financije", "0023_payment_amount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutgoingEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("payment_order", "Nalog za plaćanje"),
+                            ("dunning", "Opomena"),
+                            ("other", "Ostalo"),
+                        ],
+                        default="other",
+                        max_length=20,
+                        verbose_name="Vrsta",
+                    ),
+                ),
+                (
+                    "from_email",
+                    models.CharField(blank=True, max_length=254, verbose_name="Pošiljatelj"),
+                ),
+                ("recipient", models.EmailField(max_length=254, verbose_name="Primatelj")),
+                ("subject", models.CharField(max_length=255, verbose_name="Naslov")),
+                ("body", models.TextField(verbose_name="Sadržaj")),
+                (
+                    "dedupe_key",
+                    models.CharField(blank=True, max_length=100, null=True, unique=True),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Čeka slanje"),
+                            ("sending", "Šalje se"),
+                            ("sent", "Poslano"),
+                            ("failed", "Greška"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Pokušaji")),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Sljedeći pokušaj"
+                    ),
+                ),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True, verbose_name="Poslano")),
+                ("error", models.TextField(blank=True, default="", verbose_name="Greška")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "invoice",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="emails",
+                        to="financije.invoice",
+                        verbose_name="Račun",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="tenants.tenant",
+                        verbose_name="Tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Izlazna poruka",
+                "verbose_name_plural": "Izlazne poruke",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"], name="financije_o_status_a7d5cc_idx"
+                    ),
+                    models.Index(
+                        fields=["recipient", "sent_at"], name="financije_o_recipie_a5c680_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
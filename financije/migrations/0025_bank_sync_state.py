@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0024_outgoing_email"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BankSyncState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "bank_account_number",
+                    models.CharField(
+                        max_length=34, unique=True, verbose_name="Broj bankovnog računa (IBAN)"
+                    ),
+                ),
+                (
+                    "bank_name",
+                    models.CharField(blank=True, default="", max_length=100, verbose_name="Banka"),
+                ),
+                ("api_url", models.URLField(verbose_name="API endpoint izvoda")),
+                (
+                    "cursor",
+                    models.CharField(
+                        blank=True, default="", max_length=255, verbose_name="Watermark"
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True, verbose_name="Aktivno")),
+                (
+                    "last_synced_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Zadnja sinkronizacija"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, default="", verbose_name="Zadnja greška"),
+                ),
+            ],
+            options={
+                "verbose_name": "Sinkronizacija bankovnog računa",
+                "verbose_name_plural": "Sinkronizacije bankovnih računa",
+            },
+        ),
+    ]
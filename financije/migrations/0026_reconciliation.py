@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0025_bank_sync_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="banktransaction",
+            name="poziv_na_broj",
+            field=models.CharField(
+                blank=True, default="", max_length=35, verbose_name="Poziv na broj"
+            ),
+        ),
+        migrations.AddField(
+            model_name="banktransaction",
+            name="protustrana_iban",
+            field=models.CharField(
+                blank=True, default="", max_length=34, verbose_name="IBAN platitelja/primatelja"
+            ),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="bank_transaction",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="payments",
+                to="financije.banktransaction",
+                verbose_name="Bankovna transakcija",
+            ),
+        ),
+    ]
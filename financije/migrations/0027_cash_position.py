@@ -0,0 +1,79 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:47
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0005_tenant_vat_fiscal_and_settings_accounts"),
+        ("financije", "0026_reconciliation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="banksyncstate",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="tenants.tenant",
+                verbose_name="Tenant",
+            ),
+        ),
+        migrations.CreateModel(
+            name="CashPosition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "bank_account_number",
+                    models.CharField(max_length=34, verbose_name="Broj bankovnog računa (IBAN)"),
+                ),
+                ("date", models.DateField(verbose_name="Datum")),
+                (
+                    "inflow",
+                    models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=16),
+                ),
+                (
+                    "outflow",
+                    models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=16),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=16),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="tenants.tenant",
+                        verbose_name="Tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Dnevna pozicija novca",
+                "verbose_name_plural": "Dnevne pozicije novca",
+                "ordering": ["bank_account_number", "date"],
+                "indexes": [
+                    models.Index(fields=["tenant", "date"], name="financije_c_tenant__76f523_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="cashposition",
+            constraint=models.UniqueConstraint(
+                fields=("bank_account_number", "date"), name="cashposition_unique_account_date"
+            ),
+        ),
+    ]
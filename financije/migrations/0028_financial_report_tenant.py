@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0005_tenant_vat_fiscal_and_settings_accounts"),
+        ("financije", "0027_cash_position"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="financialreport",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="tenants.tenant",
+                verbose_name="Tenant",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="financialreport",
+            index=models.Index(fields=["tenant", "year"], name="financije_f_tenant__6c1313_idx"),
+        ),
+    ]
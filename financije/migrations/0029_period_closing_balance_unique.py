@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:01
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_snapshots(apps, schema_editor):
+    """Zadrži najnoviji redak snimke po (tenant, razdoblje, konto)."""
+    PeriodClosingBalance = apps.get_model("financije", "PeriodClosingBalance")
+    duplicates = (
+        PeriodClosingBalance.objects.values("tenant_id", "year", "month", "account_id")
+        .annotate(keep=Max("pk"), count=models.Count("pk"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        PeriodClosingBalance.objects.filter(
+            tenant_id=row["tenant_id"],
+            year=row["year"],
+            month=row["month"],
+            account_id=row["account_id"],
+        ).exclude(pk=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0028_financial_report_tenant"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_snapshots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="periodclosingbalance",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", False)),
+                fields=("tenant", "year", "month", "account"),
+                name="periodclosingbalance_unique_tenant_account",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="periodclosingbalance",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", True)),
+                fields=("year", "month", "account"),
+                name="periodclosingbalance_unique_account_no_tenant",
+            ),
+        ),
+    ]
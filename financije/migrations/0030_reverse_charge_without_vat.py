@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:05
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import F
+
+
+def zero_reverse_charge_vat(apps, schema_editor):
+    """Računi s prijenosom porezne obveze: PDV 0, ukupno = osnovica."""
+    Invoice = apps.get_model("financije", "Invoice")
+    InvoiceVatBreakdown = apps.get_model("financije", "InvoiceVatBreakdown")
+    InvoiceVatBreakdown.objects.filter(invoice__reverse_charge=True).update(vat=Decimal("0.00"))
+    Invoice.objects.filter(reverse_charge=True).update(
+        vat_amount=Decimal("0.00"), gross_amount=F("net_amount")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financije", "0029_period_closing_balance_unique"),
+    ]
+
+    operations = [
+        migrations.RunPython(zero_reverse_charge_vat, migrations.RunPython.noop),
+    ]
@@ -2,10 +2,14 @@
 
 from .accounting import Account, JournalEntry, JournalItem
 from .audit import AuditLog
-from .bank import BankTransaction, CashFlow
+from .balances import AccountBalance
+from .bank import BankSyncState, BankTransaction, CashFlow, CashPosition
 from .budget import Budget
 from .finreports import BalanceSheet, FinancialReport, FinancialReports
-from .invoice import Debt, Invoice, InvoiceLine, Payment
+from .hierarchy import AccountClosure
+from .invoice import Debt, Invoice, InvoiceLine, InvoiceVatBreakdown, Payment
+from .mail import OutgoingEmail
+from .numbering import InvoiceSequence
 from .others import (
     FinancialAnalysis,
     FinancialDetails,
@@ -15,6 +19,8 @@ from .others import (
     VariablePayRule,
 )
 from .overhead import MjesecniOverheadPregled, MonthlyOverhead, Overhead, OverheadCategory
+from .periods import AccountingPeriod, PeriodClosingBalance
+from .posting import InvoicePosting
 from .salary import Salary, SalaryAddition, Tax
 from .taxconfig import Municipality, TaxConfiguration
 
@@ -22,16 +28,26 @@ __all__ = [
     "Account",
     "JournalEntry",
     "JournalItem",
+    "AccountBalance",
+    "AccountClosure",
+    "AccountingPeriod",
+    "PeriodClosingBalance",
     "AuditLog",
+    "BankSyncState",
     "BankTransaction",
     "CashFlow",
+    "CashPosition",
     "Budget",
     "FinancialReports",
     "BalanceSheet",
     "FinancialReport",
     "Invoice",
     "InvoiceLine",
+    "InvoicePosting",
+    "InvoiceSequence",
+    "InvoiceVatBreakdown",
     "Payment",
+    "OutgoingEmail",
     "Debt",
     "Overhead",
     "OverheadCategory",
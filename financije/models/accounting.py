@@ -6,6 +6,8 @@ from django.db import models, transaction
 from django.db.models import Sum
 from django.utils.translation import gettext_lazy as _
 
+from ..managers import JournalEntryQuerySet
+
 
 class Account(models.Model):
     ACCOUNT_TYPE_CHOICES = [
@@ -38,6 +40,11 @@ class Account(models.Model):
     def __str__(self):
         return f"{self.number} - {self.name}"
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        # AccountClosure (hijerarhija) se održava iz signala, u istoj transakciji.
+        super().save(*args, **kwargs)
+
     @property
     def balance(self):
         """Return current balance for the account.
@@ -45,20 +52,51 @@ class Account(models.Model):
         Aktiva (active) and Rashod (expense) konta increase with debit and decrease with
         credit. All others (passive, income) behave inversely.
         """
-        debit = JournalItem.objects.filter(account=self).aggregate(Sum("debit"))[
-            "debit__sum"
-        ] or Decimal("0.00")
-        credit = JournalItem.objects.filter(account=self).aggregate(Sum("credit"))[
-            "credit__sum"
-        ] or Decimal("0.00")
+        return self.get_balance()
+
+    def get_balance(self, tenant=None):
+        """Balance read from the maintained AccountBalance store (optionally per tenant)."""
+        balances = self.period_balances.all()
+        if tenant is not None:
+            balances = balances.filter(tenant=tenant)
+        totals = balances.aggregate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        return self.signed_balance(
+            totals["debit_sum"] or Decimal("0.00"), totals["credit_sum"] or Decimal("0.00")
+        )
+
+    def get_rolled_up_balance(self, tenant=None):
+        """Balance of this konto and all its subaccounts (one join via AccountClosure)."""
+        from .hierarchy import rolled_up_balance
+
+        return self.signed_balance(*rolled_up_balance(self, tenant=tenant))
+
+    def signed_balance(self, debit, credit):
         if self.account_type in {"active", "expense"}:
             return debit - credit
         return credit - debit
 
 
+def ensure_balanced(lines):
+    """Provjeri u memoriji da je zbroj ``(debit, credit)`` parova uravnotežen."""
+    total_debit = total_credit = Decimal("0.00")
+    for debit, credit in lines:
+        total_debit += debit or Decimal("0.00")
+        total_credit += credit or Decimal("0.00")
+    if total_debit != total_credit:
+        raise ValidationError(_("Journal entry must be balanced (debits = credits)"))
+
+
 class JournalEntry(models.Model):
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Tenant"),
+    )
     date = models.DateField(verbose_name=_("Datum knjiženja"))
     description = models.TextField(verbose_name=_("Opis transakcije"))
+    division = models.CharField(max_length=64, blank=True, default="", verbose_name=_("Divizija"))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(
@@ -69,16 +107,28 @@ class JournalEntry(models.Model):
         verbose_name=_("Korisnik"),
     )
 
+    objects = JournalEntryQuerySet.as_manager()
+
+    def _totals(self):
+        # Anotacije iz JournalEntry.objects.with_totals(), inače jedan agregat za obje strane.
+        if hasattr(self, "debit_total"):
+            return self.debit_total, self.credit_total
+        totals = self.journalitem_set.aggregate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        return totals["debit_sum"] or Decimal("0.00"), totals["credit_sum"] or Decimal("0.00")
+
     @property
     def total_debit(self):
-        return self.journalitem_set.aggregate(total=Sum("debit"))["total"] or Decimal("0.00")
+        return self._totals()[0]
 
     @property
     def total_credit(self):
-        return self.journalitem_set.aggregate(total=Sum("credit"))["total"] or Decimal("0.00")
+        return self._totals()[1]
 
     def is_balanced(self):
-        return self.total_debit == self.total_credit
+        if hasattr(self, "balanced"):
+            return self.balanced
+        debit, credit = self._totals()
+        return debit == credit
 
     @transaction.atomic
     def save(self, *args, **kwargs):
@@ -86,14 +136,16 @@ class JournalEntry(models.Model):
             self.full_clean()
         super().save(*args, **kwargs)
 
-    def clean(self):
-        super().clean()
-        if self.pk and not self.is_balanced():
-            raise ValidationError(_("Journal entry must be balanced (debits = credits)"))
+    # Uravnoteženost se provjerava nad stavkama prije zapisa (ensure_balanced u
+    # formsetu i u ledger.post_entries), a ne ponovnim upitom nad spremljenim stavkama.
 
     class Meta:
         app_label = "financije"
-        indexes = [models.Index(fields=["date"]), models.Index(fields=["created_at"])]
+        indexes = [
+            models.Index(fields=["date"]),
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["tenant", "date"]),
+        ]
 
     def __str__(self):
         return f"Journal Entry #{self.id} - {self.date}"
@@ -107,6 +159,15 @@ class JournalItem(models.Model):
     debit = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
     credit = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        # AccountBalance se ažurira iz signala, u istoj transakciji kao i stavka.
+        super().save(*args, **kwargs)
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        return super().delete(*args, **kwargs)
+
     def clean(self):
         if self.debit != Decimal("0.00") and self.credit != Decimal("0.00"):
             raise ValidationError(_("Stavka ne može imati i debit i kredit u isto vrijeme."))
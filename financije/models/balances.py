@@ -0,0 +1,264 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils.translation import gettext_lazy as _
+
+from .accounting import JournalEntry, JournalItem
+
+
+class AccountBalance(models.Model):
+    """
+    Promet konta po tenantu i obračunskom razdoblju (mjesecu).
+
+    Održava se u istoj transakciji kao i JournalItem zapisi, pa se saldo
+    konta čita iz ove tablice umjesto agregacije nad svim stavkama.
+    """
+
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Tenant"),
+    )
+    account = models.ForeignKey(
+        "financije.Account",
+        on_delete=models.CASCADE,
+        related_name="period_balances",
+        verbose_name=_("Konto"),
+    )
+    year = models.PositiveIntegerField(verbose_name=_("Godina"))
+    month = models.PositiveIntegerField(verbose_name=_("Mjesec"))
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Promet konta")
+        verbose_name_plural = _("Prometi konta")
+        ordering = ["account", "year", "month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "account", "year", "month"],
+                condition=Q(tenant__isnull=False),
+                name="accountbalance_unique_tenant_period",
+            ),
+            models.UniqueConstraint(
+                fields=["account", "year", "month"],
+                condition=Q(tenant__isnull=True),
+                name="accountbalance_unique_period_no_tenant",
+            ),
+        ]
+        indexes = [models.Index(fields=["tenant", "year", "month"])]
+
+    def __str__(self):
+        return f"{self.account_id} {self.month}/{self.year}: {self.debit} / {self.credit}"
+
+
+# Šalje se nakon promjene prometa; ``keys`` su (tenant_id, account_id, godina, mjesec),
+# a ``None`` znači da su se mogli promijeniti svi prometi (ponovna izgradnja).
+balances_changed = Signal()
+
+
+def balance_key(tenant_id, account_id, date):
+    return (tenant_id, account_id, date.year, date.month)
+
+
+def apply_balance_deltas(deltas):
+    """
+    Primijeni promjene prometa na AccountBalance.
+
+    ``deltas`` je mapa ``(tenant_id, account_id, year, month) -> (debit, credit)``.
+    Postojeći retci se ažuriraju s F() izrazima, a nedostajući se kreiraju;
+    poziva se unutar transakcije koja piše same stavke.
+    """
+    with transaction.atomic():
+        for (tenant_id, account_id, year, month), (debit, credit) in deltas.items():
+            if not debit and not credit:
+                continue
+            lookup = {
+                "tenant_id": tenant_id,
+                "account_id": account_id,
+                "year": year,
+                "month": month,
+            }
+            updated = AccountBalance.objects.filter(**lookup).update(
+                debit=F("debit") + debit, credit=F("credit") + credit
+            )
+            if updated:
+                continue
+            try:
+                with transaction.atomic():
+                    AccountBalance.objects.create(debit=debit, credit=credit, **lookup)
+            except IntegrityError:
+                # Paralelna transakcija je upravo kreirala redak.
+                AccountBalance.objects.filter(**lookup).update(
+                    debit=F("debit") + debit, credit=F("credit") + credit
+                )
+    if deltas:
+        balances_changed.send(sender=AccountBalance, keys=list(deltas))
+
+
+def add_delta(deltas, key, debit, credit, sign=1):
+    current = deltas.get(key, (Decimal("0.00"), Decimal("0.00")))
+    deltas[key] = (current[0] + sign * debit, current[1] + sign * credit)
+
+
+def compute_balances_from_journal():
+    """Izračunaj promete iz JournalItem jednim grupiranim upitom."""
+    rows = (
+        JournalItem.objects.values(
+            "entry__tenant_id", "account_id", "entry__date__year", "entry__date__month"
+        )
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+    )
+    return {
+        (
+            row["entry__tenant_id"],
+            row["account_id"],
+            row["entry__date__year"],
+            row["entry__date__month"],
+        ): (row["debit_sum"] or Decimal("0.00"), row["credit_sum"] or Decimal("0.00"))
+        for row in rows
+    }
+
+
+def stored_balances():
+    return {
+        (b["tenant_id"], b["account_id"], b["year"], b["month"]): (b["debit"], b["credit"])
+        for b in AccountBalance.objects.values(
+            "tenant_id", "account_id", "year", "month", "debit", "credit"
+        )
+    }
+
+
+def balance_drift(expected=None, stored=None):
+    """Vrati ``{key: (expected, stored)}`` za sve razlike između knjiženja i tablice prometa."""
+    expected = compute_balances_from_journal() if expected is None else expected
+    stored = stored_balances() if stored is None else stored
+    zero = (Decimal("0.00"), Decimal("0.00"))
+    drift = {}
+    for key in expected.keys() | stored.keys():
+        exp = expected.get(key, zero)
+        got = stored.get(key, zero)
+        if exp != got:
+            drift[key] = (exp, got)
+    return drift
+
+
+@transaction.atomic
+def rebuild_account_balances():
+    """Ponovno izgradi AccountBalance iz JournalItem. Vraća broj zapisanih redaka."""
+    expected = compute_balances_from_journal()
+    AccountBalance.objects.all().delete()
+    AccountBalance.objects.bulk_create(
+        [
+            AccountBalance(
+                tenant_id=tenant_id,
+                account_id=account_id,
+                year=year,
+                month=month,
+                debit=debit,
+                credit=credit,
+            )
+            for (tenant_id, account_id, year, month), (debit, credit) in expected.items()
+        ],
+        batch_size=1000,
+    )
+    balances_changed.send(sender=AccountBalance, keys=None)
+    return len(expected)
+
+
+# --- Održavanje prometa uz pojedinačne izmjene stavki i temeljnica ---
+
+
+@receiver(pre_save, sender=JournalItem)
+def remember_journal_item_balance(sender, instance, **kwargs):
+    instance._previous_balance = None
+    if instance.pk:
+        previous = (
+            JournalItem.objects.filter(pk=instance.pk)
+            .values("account_id", "debit", "credit", "entry__tenant_id", "entry__date")
+            .first()
+        )
+        if previous:
+            instance._previous_balance = (
+                balance_key(
+                    previous["entry__tenant_id"], previous["account_id"], previous["entry__date"]
+                ),
+                previous["debit"],
+                previous["credit"],
+            )
+
+
+@receiver(post_save, sender=JournalItem)
+def update_balance_on_item_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {}
+    previous = getattr(instance, "_previous_balance", None)
+    if previous:
+        key, debit, credit = previous
+        add_delta(deltas, key, debit, credit, sign=-1)
+    entry = instance.entry
+    add_delta(
+        deltas,
+        balance_key(entry.tenant_id, instance.account_id, entry.date),
+        Decimal(instance.debit),
+        Decimal(instance.credit),
+    )
+    apply_balance_deltas(deltas)
+
+
+@receiver(post_delete, sender=JournalItem)
+def update_balance_on_item_delete(sender, instance, **kwargs):
+    entry = JournalEntry.objects.filter(pk=instance.entry_id).values("tenant_id", "date").first()
+    if entry is None:
+        return
+    deltas = {}
+    add_delta(
+        deltas,
+        balance_key(entry["tenant_id"], instance.account_id, entry["date"]),
+        instance.debit,
+        instance.credit,
+        sign=-1,
+    )
+    apply_balance_deltas(deltas)
+
+
+@receiver(pre_save, sender=JournalEntry)
+def remember_journal_entry_period(sender, instance, **kwargs):
+    instance._previous_period = None
+    if instance.pk:
+        instance._previous_period = (
+            JournalEntry.objects.filter(pk=instance.pk).values_list("tenant_id", "date").first()
+        )
+
+
+@receiver(post_save, sender=JournalEntry)
+def move_balance_on_entry_change(sender, instance, raw=False, **kwargs):
+    """Promjena datuma ili tenanta temeljnice seli promet svih njenih stavki."""
+    previous = getattr(instance, "_previous_period", None)
+    if raw or not previous:
+        return
+    old_tenant_id, old_date = previous
+    if old_tenant_id == instance.tenant_id and (old_date.year, old_date.month) == (
+        instance.date.year,
+        instance.date.month,
+    ):
+        return
+    totals = (
+        instance.journalitem_set.values("account_id")
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+    )
+    deltas = {}
+    for row in totals:
+        account_id, debit, credit = row["account_id"], row["debit_sum"], row["credit_sum"]
+        add_delta(deltas, balance_key(old_tenant_id, account_id, old_date), debit, credit, -1)
+        add_delta(deltas, balance_key(instance.tenant_id, account_id, instance.date), debit, credit)
+    apply_balance_deltas(deltas)
@@ -4,12 +4,11 @@ import logging
 from decimal import ROUND_HALF_UP, Decimal
 
 import requests
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Min, OuterRef, Q, Subquery
 from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 from django.utils.translation import gettext_lazy as _
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +45,12 @@ class BankTransaction(models.Model):
     referenca = models.CharField(
         max_length=100, unique=True, verbose_name=_("Referenca transakcije")
     )
+    poziv_na_broj = models.CharField(
+        max_length=35, blank=True, default="", verbose_name=_("Poziv na broj")
+    )
+    protustrana_iban = models.CharField(
+        max_length=34, blank=True, default="", verbose_name=_("IBAN platitelja/primatelja")
+    )
     saldo = models.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -81,69 +86,56 @@ class BankTransaction(models.Model):
         ]
 
 
-def sinkroniziraj_bankovne_transakcije(api_url, api_key):
+class BankSyncState(models.Model):
     """
-    Primjer dohvaćanja transakcija s bankovnog API-ja i upisa/azuriranja u DB.
-    - 'api_url' je endpoint banke
-    - 'api_key' je token/ključ za autorizaciju
+    Stanje sinkronizacije izvoda jednog bankovnog računa (IBAN).
 
-    U stvarnom životu prilagodi format JSON odgovora
-    i mapiranje polja (referenca, datum_valute, ...)
+    ``cursor`` je watermark banke: sljedeća sinkronizacija traži samo
+    transakcije nakon njega. Obrada je u ``financije.bank_sync``.
     """
-    # Configure retry strategy
-    retry_strategy = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session = requests.Session()
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
 
-    headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
+    bank_account_number = models.CharField(
+        max_length=34, unique=True, verbose_name=_("Broj bankovnog računa (IBAN)")
+    )
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Tenant"),
+    )
+    bank_name = models.CharField(max_length=100, blank=True, default="", verbose_name=_("Banka"))
+    api_url = models.URLField(verbose_name=_("API endpoint izvoda"))
+    cursor = models.CharField(max_length=255, blank=True, default="", verbose_name=_("Watermark"))
+    is_active = models.BooleanField(default=True, verbose_name=_("Aktivno"))
+    last_synced_at = models.DateTimeField(
+        null=True, blank=True, verbose_name=_("Zadnja sinkronizacija")
+    )
+    last_error = models.TextField(blank=True, default="", verbose_name=_("Zadnja greška"))
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Sinkronizacija bankovnog računa")
+        verbose_name_plural = _("Sinkronizacije bankovnih računa")
+
+    def __str__(self):
+        return self.bank_account_number
+
+
+def sinkroniziraj_bankovne_transakcije(api_url, api_key):
+    """
+    Jednokratni uvoz izvoda (JSON niz transakcija) s ``api_url``.
+
+    Odgovor se parsira kao tok i upisuje u serijama (``financije.bank_sync``);
+    za redovnu sinkronizaciju po IBAN-u s watermarkom koristi ``sync_accounts``.
+    Vraća broj upisanih transakcija.
+    """
+    from financije.bank_sync import import_statement
 
     try:
-        response = session.get(api_url, headers=headers, timeout=15)
-        if response.status_code == 200:
-            transakcije = response.json()
-
-            for t in transakcije:
-                # Ovisno o JSON formatu prilagodi polja:
-                referenca = t.get("reference")  # npr. "TRX12345"
-                tip = t.get("type")  # "priljev" ili "odljev"
-                iznos = Decimal(str(t.get("amount", "0.00")))
-                opis = t.get("description", "")
-                datum_trx = t.get("transaction_date")  # "2025-01-01"
-                datum_val = t.get("value_date")  # "2025-01-02"
-                saldo_str = t.get("balance", "0.00")
-                saldo_trx = Decimal(str(saldo_str))
-                bank_acc = t.get("iban", "HRxxxxxxxxxxxxx")
-                bank_naziv = t.get("bank_name", "Moja Banka")
-                currency = t.get("currency", "EUR")
-
-                obj, created = BankTransaction.objects.update_or_create(
-                    referenca=referenca,
-                    defaults={
-                        "tip_transakcije": tip,
-                        "iznos": iznos,
-                        "opis": opis,
-                        "datum": datum_trx,
-                        "datum_valute": datum_val,
-                        "saldo": saldo_trx,
-                        "bank_account_number": bank_acc,
-                        "bank_name": bank_naziv,
-                        "valuta": currency,
-                    },
-                )
-                if created:
-                    logger.info(f"Kreirana nova transakcija s referencom {referenca}")
-                else:
-                    logger.info(f"Ažurirana transakcija s referencom {referenca}")
-        else:
-            logger.error(f"Greška pri pozivu bankovnog API-ja: Status {response.status_code}")
-            raise Exception(f"Greška pri povezivanju s bankom, status {response.status_code}")
+        return import_statement(api_url, api_key)
     except requests.exceptions.RequestException as e:
         logger.error(f"Greška pri komunikaciji s bankom: {e}")
-        raise e
-    except Exception as e:
-        logger.error(f"Fatal error in bank sync: {str(e)}")
         raise
 
 
@@ -176,17 +168,138 @@ class CashFlow(models.Model):
         ordering = ["-datum"]
 
 
+class CashPosition(models.Model):
+    """
+    Dnevna pozicija novca jednog bankovnog računa, izvedena iz CashFlow zapisa.
+
+    Redak postoji za svaki dan s prometom; ``balance`` je kumulativni neto tok
+    računa zaključno s tim danom. Tablicu održava ``financije.cash_position``.
+    """
+
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Tenant"),
+    )
+    bank_account_number = models.CharField(
+        max_length=34, verbose_name=_("Broj bankovnog računa (IBAN)")
+    )
+    date = models.DateField(verbose_name=_("Datum"))
+    inflow = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    outflow = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    balance = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Dnevna pozicija novca")
+        verbose_name_plural = _("Dnevne pozicije novca")
+        ordering = ["bank_account_number", "date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bank_account_number", "date"], name="cashposition_unique_account_date"
+            ),
+        ]
+        indexes = [models.Index(fields=["tenant", "date"])]
+
+    def __str__(self):
+        return f"{self.bank_account_number} {self.date}: {self.balance}"
+
+
+# Šalje se nakon promjene CashFlow zapisa bankovnih transakcija; ``starts`` je
+# ``{IBAN: najraniji promijenjeni datum}``.
+cash_flows_changed = Signal()
+
+
+def earliest_dates(rows, starts=None):
+    """Spoji ``(IBAN, datum)`` parove u ``{IBAN: najraniji datum}``."""
+    starts = {} if starts is None else starts
+    for iban, day in rows:
+        if iban not in starts or day < starts[iban]:
+            starts[iban] = day
+    return starts
+
+
+# Polja CashFlow zapisa koja se preuzimaju iz bankovne transakcije.
+CASH_FLOW_FIELDS = ("tip_transakcije", "iznos", "opis", "datum")
+CASH_FLOW_BATCH_SIZE = 1000
+
+
+def cash_flow_for(bank_transaction):
+    return CashFlow(
+        bank_transaction=bank_transaction,
+        **{name: getattr(bank_transaction, name) for name in CASH_FLOW_FIELDS},
+    )
+
+
+@transaction.atomic
+def derive_cash_flows(transactions=None, batch_size=CASH_FLOW_BATCH_SIZE):
+    """
+    Izvedi CashFlow zapise iz bankovnih transakcija skupno; vraća broj novih zapisa.
+
+    Poziva se nakon svakog skupnog upisa transakcija (``bulk_create`` ne šalje
+    ``post_save``) i može se ponavljati: transakcije bez CashFlow zapisa dobiju
+    ga, a postojećima se polja usklade s transakcijom (npr. nakon upserta).
+    ``transactions`` je queryset transakcija (zadano: sve).
+    """
+    transactions = BankTransaction.objects.all() if transactions is None else transactions
+    missing = (
+        transactions.filter(cashflow_entry__isnull=True)
+        .only("pk", "bank_account_number", *CASH_FLOW_FIELDS)
+        .order_by("pk")
+        .iterator(chunk_size=batch_size)
+    )
+    created = 0
+    batch = []
+    starts = {}
+    for bank_transaction in missing:
+        batch.append(cash_flow_for(bank_transaction))
+        earliest_dates([(bank_transaction.bank_account_number, bank_transaction.datum)], starts)
+        if len(batch) == batch_size:
+            created += len(CashFlow.objects.bulk_create(batch))
+            batch = []
+    created += len(CashFlow.objects.bulk_create(batch))
+
+    source = BankTransaction.objects.filter(pk=OuterRef("bank_transaction_id"))
+    stale = Q()
+    for name in CASH_FLOW_FIELDS:
+        stale |= ~Q(**{name: F(f"bank_transaction__{name}")})
+    stale_flows = CashFlow.objects.filter(stale, bank_transaction__in=transactions.values("pk"))
+    # Izmjena pogađa i stari i novi datum zapisa.
+    for datum in ("datum", "bank_transaction__datum"):
+        earliest_dates(
+            stale_flows.values_list("bank_transaction__bank_account_number")
+            .annotate(start=Min(datum))
+            .order_by(),
+            starts,
+        )
+    CashFlow.objects.filter(pk__in=stale_flows.values("pk")).update(
+        **{name: Subquery(source.values(name)[:1]) for name in CASH_FLOW_FIELDS}
+    )
+    if starts:
+        cash_flows_changed.send(sender=CashFlow, starts=starts)
+    return created
+
+
 @receiver(post_save, sender=BankTransaction)
-def auto_create_cashflow(sender, instance, created, **kwargs):
+def auto_create_cashflow(sender, instance, created, raw=False, **kwargs):
     """
-    Kad se kreira nova BankTransaction, automatski kreiraj CashFlow zapis.
+    Pojedinačni unos ili izmjena transakcije (admin, forma) ažurira njen CashFlow zapis.
+
+    Skupni upisi ne prolaze ovuda, nego pozivaju ``derive_cash_flows``.
     """
+    if raw:
+        return
+    starts = {instance.bank_account_number: instance.datum}
     if created:
-        # mapiraj tip i polja
-        CashFlow.objects.create(
-            tip_transakcije=instance.tip_transakcije,
-            iznos=instance.iznos,
-            opis=instance.opis,
-            datum=instance.datum,
-            bank_transaction=instance,
-        )
+        cash_flow_for(instance).save()
+    else:
+        cash_flows = CashFlow.objects.filter(bank_transaction=instance)
+        previous = cash_flows.values_list("datum", flat=True).first()
+        if previous is None:
+            cash_flow_for(instance).save()
+        else:
+            cash_flows.update(**{name: getattr(instance, name) for name in CASH_FLOW_FIELDS})
+            starts[instance.bank_account_number] = min(previous, instance.datum)
+    cash_flows_changed.send(sender=CashFlow, starts=starts)
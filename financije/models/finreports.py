@@ -23,13 +23,24 @@ class FinancialReports:
             "net_cash_flow": income - expense,
         }
 
+    @staticmethod
+    def account_class_report(start_date, end_date, tenant=None):
+        """Zbirni promet po razredima kontnog plana (korijeni stabla), preko AccountClosure."""
+        from financije.trial_balance import trial_balance
+
+        return [
+            line
+            for line in trial_balance(tenant, start_date, end_date, rollup=True)
+            if line["account"].parent_account_id is None
+        ]
+
     @staticmethod
     def profit_and_loss_report(year, month):
         from financije.models.invoice import Invoice
         from financije.models.overhead import Overhead
 
         income = Invoice.objects.filter(issue_date__year=year, issue_date__month=month).aggregate(
-            total=Sum("amount")
+            total=Sum("net_amount")
         )["total"] or Decimal("0.00")
         expenses = Overhead.objects.filter(godina=year, mjesec=month).aggregate(
             total=Sum("overhead_ukupno")
@@ -62,6 +73,13 @@ class FinancialReport(models.Model):
         ("yearly", _("Yearly")),
     ]
 
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Tenant"),
+    )
     period = models.CharField(max_length=10, choices=PERIODS)
     year = models.PositiveIntegerField()
     month = models.PositiveIntegerField(null=True, blank=True)
@@ -71,49 +89,11 @@ class FinancialReport(models.Model):
     neto_cash_flow = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
     def generiraj_izvještaj(self):
-        from financije.models.bank import CashFlow
-
-        if self.period == "monthly":
-            priljev = CashFlow.objects.filter(
-                tip_transakcije="priljev",
-                datum__year=self.year,
-                datum__month=self.month,
-            ).aggregate(ukupno=Sum("iznos"))["ukupno"] or Decimal("0.00")
-
-            odljev = CashFlow.objects.filter(
-                tip_transakcije="odljev", datum__year=self.year, datum__month=self.month
-            ).aggregate(ukupno=Sum("iznos"))["ukupno"] or Decimal("0.00")
-
-        elif self.period == "quarterly":
-            kvartal_mjeseci = {
-                1: [1, 2, 3],
-                2: [4, 5, 6],
-                3: [7, 8, 9],
-                4: [10, 11, 12],
-            }
-            mjeseci = kvartal_mjeseci.get(self.kvartal, [])
-
-            priljev = CashFlow.objects.filter(
-                tip_transakcije="priljev",
-                datum__year=self.year,
-                datum__month__in=mjeseci,
-            ).aggregate(ukupno=Sum("iznos"))["ukupno"] or Decimal("0.00")
-
-            odljev = CashFlow.objects.filter(
-                tip_transakcije="odljev",
-                datum__year=self.year,
-                datum__month__in=mjeseci,
-            ).aggregate(ukupno=Sum("iznos"))["ukupno"] or Decimal("0.00")
-
-        else:  # yearly
-            priljev = CashFlow.objects.filter(
-                tip_transakcije="priljev", datum__year=self.year
-            ).aggregate(ukupno=Sum("iznos"))["ukupno"] or Decimal("0.00")
-
-            odljev = CashFlow.objects.filter(
-                tip_transakcije="odljev", datum__year=self.year
-            ).aggregate(ukupno=Sum("iznos"))["ukupno"] or Decimal("0.00")
+        """Izračunaj priljev i odljev razdoblja jednim upitom i spremi izvještaj."""
+        from financije.cash_flow_reports import cash_flow_totals
 
+        key = (self.period, self.month, self.kvartal)
+        priljev, odljev = cash_flow_totals(self.year, self.tenant_id, [key])[key]
         self.priljev_ukupno = priljev
         self.odljev_ukupno = odljev
         self.neto_cash_flow = priljev - odljev
@@ -125,3 +105,4 @@ class FinancialReport(models.Model):
     class Meta:
         verbose_name = _("Financijski izvještaj")
         verbose_name_plural = _("Financijski izvještaji")
+        indexes = [models.Index(fields=["tenant", "year"])]
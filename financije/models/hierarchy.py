@@ -0,0 +1,144 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Sum
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from .accounting import Account
+from .balances import AccountBalance
+
+
+class AccountClosure(models.Model):
+    """
+    Zatvoreni (closure) indeks stabla kontnog plana.
+
+    Za svaki par (predak, potomak) postoji jedan redak, uključujući i sam konto
+    (depth = 0), pa se promet cijelog podstabla (npr. razreda 4) dobiva jednim
+    JOIN-om s AccountBalance umjesto rekurzivnog obilaska ``subaccounts``.
+    """
+
+    ancestor = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="descendant_links")
+    descendant = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Hijerarhija konta")
+        verbose_name_plural = _("Hijerarhija konta")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="accountclosure_unique_path"
+            )
+        ]
+        indexes = [models.Index(fields=["descendant", "ancestor"])]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+def subtree_ids(account):
+    return list(
+        AccountClosure.objects.filter(ancestor=account).values_list("descendant_id", flat=True)
+    )
+
+
+def _link_subtree(account_id, parent_id):
+    """Poveži podstablo ``account_id`` sa svim precima novog roditelja."""
+    if parent_id is None:
+        return
+    ancestors = AccountClosure.objects.filter(descendant_id=parent_id).values_list(
+        "ancestor_id", "depth"
+    )
+    subtree = AccountClosure.objects.filter(ancestor_id=account_id).values_list(
+        "descendant_id", "depth"
+    )
+    AccountClosure.objects.bulk_create(
+        [
+            AccountClosure(
+                ancestor_id=ancestor_id,
+                descendant_id=descendant_id,
+                depth=up + down + 1,
+            )
+            for ancestor_id, up in ancestors
+            for descendant_id, down in subtree
+        ]
+    )
+
+
+def _unlink_subtree(account_id):
+    """Odspoji podstablo ``account_id`` od svih njegovih (dosadašnjih) predaka."""
+    AccountClosure.objects.filter(
+        descendant_id__in=AccountClosure.objects.filter(ancestor_id=account_id).values(
+            "descendant_id"
+        ),
+        ancestor_id__in=AccountClosure.objects.filter(descendant_id=account_id, depth__gt=0).values(
+            "ancestor_id"
+        ),
+    ).delete()
+
+
+@transaction.atomic
+def rebuild_account_closure():
+    """Ponovno izgradi AccountClosure iz ``parent_account`` (npr. nakon učitavanja plana)."""
+    parents = dict(Account.objects.values_list("id", "parent_account_id"))
+    rows = []
+    for account_id in parents:
+        node, depth, seen = account_id, 0, set()
+        while node is not None and node not in seen:
+            seen.add(node)
+            rows.append(AccountClosure(ancestor_id=node, descendant_id=account_id, depth=depth))
+            node, depth = parents.get(node), depth + 1
+    AccountClosure.objects.all().delete()
+    AccountClosure.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rolled_up_balance(account, tenant=None):
+    """Promet (duguje, potražuje) cijelog podstabla konta, jednim JOIN-om."""
+    balances = AccountBalance.objects.filter(account__ancestor_links__ancestor=account)
+    if tenant is not None:
+        balances = balances.filter(tenant=tenant)
+    totals = balances.aggregate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+    return totals["debit_sum"] or Decimal("0.00"), totals["credit_sum"] or Decimal("0.00")
+
+
+# --- Održavanje indeksa kod unosa i premještanja konta ---
+
+
+@receiver(pre_save, sender=Account)
+def remember_account_parent(sender, instance, **kwargs):
+    instance._previous_parent_id = None
+    if instance.pk:
+        instance._previous_parent_id = (
+            Account.objects.filter(pk=instance.pk)
+            .values_list("parent_account_id", flat=True)
+            .first()
+        )
+        parent_id = instance.parent_account_id
+        if parent_id != instance._previous_parent_id and parent_id in subtree_ids(instance):
+            raise ValidationError(_("Konto ne može biti nadređen samom sebi."))
+
+
+@receiver(post_save, sender=Account)
+def maintain_account_closure(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        if created:
+            AccountClosure.objects.create(ancestor=instance, descendant=instance, depth=0)
+            _link_subtree(instance.pk, instance.parent_account_id)
+            return
+        if getattr(instance, "_previous_parent_id", None) == instance.parent_account_id:
+            return
+        _unlink_subtree(instance.pk)
+        _link_subtree(instance.pk, instance.parent_account_id)
+
+
+@receiver(pre_delete, sender=Account)
+def detach_deleted_account(sender, instance, **kwargs):
+    # Podkonta postaju korijeni (parent_account je SET_NULL) pa im brišemo stare pretke.
+    for child_id in instance.subaccounts.values_list("pk", flat=True):
+        _unlink_subtree(child_id)
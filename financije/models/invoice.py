@@ -1,10 +1,16 @@
-from decimal import Decimal
+import datetime
+from decimal import ROUND_HALF_UP, Decimal
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
 from django.utils.translation import gettext_lazy as _
 
+from ..managers import InvoiceQuerySet
+from .numbering import allocate_invoice_numbers, default_series, format_invoice_number
+
 try:
     from client_app.models import ClientSupplier
 except ImportError:
@@ -30,8 +36,23 @@ class Invoice(models.Model):
         related_name="invoices",
         verbose_name=_("Klijent"),
     )
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("Tenant"),
+    )
+    # Prazan broj dodjeljuje se kod spremanja iz brojača (tenant, godina, serija).
     invoice_number = models.CharField(
-        max_length=100, unique=True, verbose_name=_("Broj fakture"), db_index=True
+        max_length=100, blank=True, verbose_name=_("Broj fakture"), db_index=True
+    )
+    number_series = models.CharField(
+        max_length=20,
+        blank=True,
+        default="",
+        verbose_name=_("Serija (poslovni prostor/naplatni uređaj)"),
     )
     issue_date = models.DateField(verbose_name=_("Datum izdavanja"))
     due_date = models.DateField(verbose_name=_("Datum dospijeća"))
@@ -54,6 +75,30 @@ class Invoice(models.Model):
         verbose_name=_("Status fakture"),
     )
     paid = models.BooleanField(default=False, verbose_name=_("Plaćeno"))
+    # PDV plaća primatelj (čl. 75. st. 3.-4. ZPDV); osnovica ide u polje I.1 PDV obrasca.
+    reverse_charge = models.BooleanField(default=False, verbose_name=_("Prijenos porezne obveze"))
+    # Zbrojevi stavki, održava ih recalculate_invoice_totals (ne uređuju se ručno).
+    net_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        editable=False,
+        verbose_name=_("Osnovica"),
+    )
+    vat_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        editable=False,
+        verbose_name=_("Iznos PDV-a"),
+    )
+    gross_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        editable=False,
+        verbose_name=_("Ukupno s PDV-om"),
+    )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -73,19 +118,42 @@ class Invoice(models.Model):
         verbose_name=_("Referenca javnog natječaja"),
     )
 
+    objects = InvoiceQuerySet.as_manager()
+
     @property
     def amount(self):
-        """Calculate total from line items"""
-        return sum(line.line_total for line in self.lines.all())
+        """Osnovica (bez PDV-a), spremljena na računu"""
+        return self.net_amount
 
     @property
     def pdv_amount(self):
-        """Calculate total tax from line items"""
-        return sum(line.tax_amount for line in self.lines.all())
+        """Ukupni PDV, spremljen na računu"""
+        return self.vat_amount
 
     def __str__(self):
         return f"Invoice {self.invoice_number}"
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        previous_reverse_charge = None
+        if not self._state.adding and (update_fields is None or "reverse_charge" in update_fields):
+            previous_reverse_charge = (
+                Invoice.objects.filter(pk=self.pk).values_list("reverse_charge", flat=True).first()
+            )
+        if not self.invoice_number:
+            self.number_series = self.number_series or default_series()
+            (number,) = allocate_invoice_numbers(
+                self.issue_date.year, self.number_series, self.tenant_id
+            )
+            self.invoice_number = format_invoice_number(
+                number, self.number_series, self.issue_date.year
+            )
+        super().save(*args, **kwargs)
+        if previous_reverse_charge is not None and previous_reverse_charge != self.reverse_charge:
+            recalculate_invoice_totals([self.pk])
+            self.refresh_from_db(fields=["net_amount", "vat_amount", "gross_amount"])
+
     class Meta:
         verbose_name = _("Faktura")
         verbose_name_plural = _("Fakture")
@@ -94,12 +162,56 @@ class Invoice(models.Model):
             models.Index(fields=["due_date"]),
         ]
         ordering = ["-issue_date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "invoice_number"],
+                condition=models.Q(tenant__isnull=False),
+                name="invoice_unique_tenant_number",
+            ),
+            models.UniqueConstraint(
+                fields=["invoice_number"],
+                condition=models.Q(tenant__isnull=True),
+                name="invoice_unique_number_no_tenant",
+            ),
+        ]
 
     def clean(self):
         if self.due_date < self.issue_date:
             raise ValidationError(_("Datum dospijeća ne može biti prije datuma izdavanja"))
 
 
+class InvoiceLineQuerySet(models.QuerySet):
+    """Skupne izmjene stavki ne šalju signale, pa same preračunavaju zbrojeve računa."""
+
+    def _invoice_ids(self):
+        return set(self.values_list("invoice_id", flat=True))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        recalculate_invoice_totals({obj.invoice_id for obj in objs})
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        invoice_ids = {obj.invoice_id for obj in objs}
+        if "invoice" in fields:
+            invoice_ids |= self.filter(pk__in=[obj.pk for obj in objs])._invoice_ids()
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        recalculate_invoice_totals(invoice_ids)
+        return updated
+
+    def update(self, **kwargs):
+        invoice_ids = self._invoice_ids()
+        updated = super().update(**kwargs)
+        if "invoice" in kwargs or "invoice_id" in kwargs:
+            # Nakon premještanja izvorni filter više ne pogađa stavke; ciljni račun je u kwargs.
+            target = kwargs.get("invoice", kwargs.get("invoice_id"))
+            invoice_ids.add(getattr(target, "pk", target))
+        invoice_ids.discard(None)
+        recalculate_invoice_totals(invoice_ids)
+        return updated
+
+
 class InvoiceLine(models.Model):
     invoice = models.ForeignKey(Invoice, related_name="lines", on_delete=models.CASCADE)
     description = models.CharField(max_length=255, verbose_name=_("Opis stavke"))
@@ -114,6 +226,8 @@ class InvoiceLine(models.Model):
         verbose_name=_("Stopa PDV-a"),
     )
 
+    objects = InvoiceLineQuerySet.as_manager()
+
     @property
     def line_total(self):
         return self.quantity * self.unit_price
@@ -127,9 +241,120 @@ class InvoiceLine(models.Model):
         verbose_name_plural = _("Stavke računa")
 
 
+class InvoiceVatBreakdown(models.Model):
+    """Osnovica i PDV računa po stopi (rekapitulacija), održava se sa zbrojevima računa."""
+
+    invoice = models.ForeignKey(
+        Invoice, on_delete=models.CASCADE, related_name="vat_breakdown", verbose_name=_("Račun")
+    )
+    rate = models.DecimalField(max_digits=5, decimal_places=2, verbose_name=_("Stopa PDV-a"))
+    base = models.DecimalField(max_digits=14, decimal_places=2, verbose_name=_("Osnovica"))
+    vat = models.DecimalField(max_digits=14, decimal_places=2, verbose_name=_("Iznos PDV-a"))
+
+    class Meta:
+        verbose_name = _("Rekapitulacija PDV-a")
+        verbose_name_plural = _("Rekapitulacija PDV-a")
+        ordering = ["rate"]
+        constraints = [
+            models.UniqueConstraint(fields=["invoice", "rate"], name="invoicevat_unique_rate")
+        ]
+
+    def __str__(self):
+        return f"{self.invoice_id} {self.rate}%: {self.base} / {self.vat}"
+
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def _round(value):
+    return value.quantize(CENT, ROUND_HALF_UP)
+
+
+# Šalje se kad se računi (``invoice_ids``) mijenjaju mimo save(): zbrojevi, skupni status.
+invoices_changed = Signal()
+
+
+@transaction.atomic
+def recalculate_invoice_totals(invoice_ids):
+    """
+    Preračunaj osnovicu, PDV, ukupno i rekapitulaciju po stopi za zadane račune.
+
+    Osnovica se zaokružuje na ukupnom iznosu, PDV po stopi (kao kod knjiženja).
+    Račun s prijenosom porezne obveze ima PDV 0 (plaća ga primatelj), a
+    rekapitulacija zadržava osnovicu po stopi. Stavke se čitaju jednim upitom.
+    """
+    invoice_ids = {invoice_id for invoice_id in invoice_ids if invoice_id is not None}
+    if not invoice_ids:
+        return
+    per_rate = {invoice_id: {} for invoice_id in invoice_ids}
+    for invoice_id, reverse_charge, rate, quantity, unit_price in InvoiceLine.objects.filter(
+        invoice_id__in=invoice_ids
+    ).values_list("invoice_id", "invoice__reverse_charge", "tax_rate", "quantity", "unit_price"):
+        base, vat = per_rate[invoice_id].get(rate, (ZERO, ZERO))
+        line_total = quantity * unit_price
+        if not reverse_charge:
+            vat += line_total * (rate / Decimal("100.00"))
+        per_rate[invoice_id][rate] = (base + line_total, vat)
+
+    invoices, breakdown = [], []
+    for invoice_id, rates in per_rate.items():
+        net = _round(sum((base for base, _vat in rates.values()), ZERO))
+        vat_total = ZERO
+        for rate, (base, vat) in sorted(rates.items()):
+            vat = _round(vat)
+            vat_total += vat
+            breakdown.append(
+                InvoiceVatBreakdown(invoice_id=invoice_id, rate=rate, base=_round(base), vat=vat)
+            )
+        invoices.append(
+            Invoice(
+                pk=invoice_id, net_amount=net, vat_amount=vat_total, gross_amount=net + vat_total
+            )
+        )
+    Invoice.objects.bulk_update(invoices, ["net_amount", "vat_amount", "gross_amount"])
+    InvoiceVatBreakdown.objects.filter(invoice_id__in=invoice_ids).delete()
+    InvoiceVatBreakdown.objects.bulk_create(breakdown)
+    invoices_changed.send(sender=Invoice, invoice_ids=invoice_ids)
+
+
+@receiver(pre_save, sender=InvoiceLine)
+def remember_line_invoice(sender, instance, raw=False, **kwargs):
+    instance._previous_invoice_id = None
+    if instance.pk and not raw:
+        instance._previous_invoice_id = (
+            InvoiceLine.objects.filter(pk=instance.pk).values_list("invoice_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=InvoiceLine)
+@receiver(post_delete, sender=InvoiceLine)
+def update_invoice_totals(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or isinstance(origin, Invoice) or getattr(origin, "model", None) is Invoice:
+        return  # stavke se brišu zajedno s računom
+    invoice_ids = {instance.invoice_id}
+    invoice_ids.add(getattr(instance, "_previous_invoice_id", None))  # stavka premještena
+    recalculate_invoice_totals(invoice_ids)
+
+
 class Payment(models.Model):
     related_invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name="payments")
-    # ...existing code...
+    amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        verbose_name=_("Iznos uplate"),
+    )
+    payment_date = models.DateField(default=datetime.date.today, verbose_name=_("Datum uplate"))
+    # Postavlja usklađivanje izvoda (financije.reconciliation).
+    bank_transaction = models.ForeignKey(
+        "financije.BankTransaction",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="payments",
+        verbose_name=_("Bankovna transakcija"),
+    )
 
 
 class Debt(models.Model):
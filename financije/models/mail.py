@@ -0,0 +1,79 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class OutgoingEmail(models.Model):
+    """
+    Poruka u izlaznom redu (outbox) za slanje iz Celery workera.
+
+    Poruka ima jednog primatelja, pa se ponovni pokušaji i ograničenje
+    učestalosti vode po primatelju. Slanje je u ``financije.mail``.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, _("Čeka slanje")),
+        (SENDING, _("Šalje se")),
+        (SENT, _("Poslano")),
+        (FAILED, _("Greška")),
+    ]
+
+    PAYMENT_ORDER = "payment_order"
+    DUNNING = "dunning"
+    OTHER = "other"
+    KIND_CHOICES = [
+        (PAYMENT_ORDER, _("Nalog za plaćanje")),
+        (DUNNING, _("Opomena")),
+        (OTHER, _("Ostalo")),
+    ]
+
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("Tenant"),
+    )
+    invoice = models.ForeignKey(
+        "financije.Invoice",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="emails",
+        verbose_name=_("Račun"),
+    )
+    kind = models.CharField(
+        max_length=20, choices=KIND_CHOICES, default=OTHER, verbose_name=_("Vrsta")
+    )
+    from_email = models.CharField(max_length=254, blank=True, verbose_name=_("Pošiljatelj"))
+    recipient = models.EmailField(verbose_name=_("Primatelj"))
+    subject = models.CharField(max_length=255, verbose_name=_("Naslov"))
+    body = models.TextField(verbose_name=_("Sadržaj"))
+    # Sprječava dvostruko slanje iste poruke (npr. opomena za račun na isti dan).
+    dedupe_key = models.CharField(max_length=100, null=True, blank=True, unique=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name=_("Status")
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Pokušaji"))
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name=_("Sljedeći pokušaj"))
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Poslano"))
+    error = models.TextField(blank=True, default="", verbose_name=_("Greška"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Izlazna poruka")
+        verbose_name_plural = _("Izlazne poruke")
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["recipient", "sent_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject} ({self.status})"
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, Q
+from django.db.transaction import TransactionManagementError
+from django.utils.translation import gettext_lazy as _
+
+DEFAULT_SERIES = "1/1"  # oznaka poslovnog prostora / naplatnog uređaja
+DEFAULT_NUMBER_FORMAT = "{number}/{series}/{year}"
+
+
+class InvoiceSequence(models.Model):
+    """
+    Zadnji dodijeljeni broj računa po tenantu, godini i seriji.
+
+    Brojevi se dodjeljuju u transakciji koja sprema račun, pa rollback vraća i
+    brojač: slijed ostaje bez rupa.
+    """
+
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Tenant"),
+    )
+    year = models.PositiveIntegerField(verbose_name=_("Godina"))
+    series = models.CharField(max_length=20, verbose_name=_("Serija"))
+    last_number = models.PositiveIntegerField(default=0, verbose_name=_("Zadnji broj"))
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Brojač računa")
+        verbose_name_plural = _("Brojači računa")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "year", "series"],
+                condition=Q(tenant__isnull=False),
+                name="invoicesequence_unique_tenant_series",
+            ),
+            models.UniqueConstraint(
+                fields=["year", "series"],
+                condition=Q(tenant__isnull=True),
+                name="invoicesequence_unique_series_no_tenant",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.series}/{self.year}: {self.last_number}"
+
+
+def default_series():
+    return getattr(settings, "FINANCIJE_INVOICE_SERIES", DEFAULT_SERIES)
+
+
+def format_invoice_number(number, series, year):
+    number_format = getattr(settings, "FINANCIJE_INVOICE_NUMBER_FORMAT", DEFAULT_NUMBER_FORMAT)
+    return number_format.format(number=number, series=series, year=year)
+
+
+def allocate_invoice_numbers(year, series=None, tenant=None, count=1):
+    """
+    Rezerviraj ``count`` uzastopnih brojeva i vrati ih kao ``range``.
+
+    Brojač se povećava jednim UPDATE-om koji ujedno zaključava redak do kraja
+    transakcije; ostali pozivatelji iste serije čekaju samo toliko, a ostale
+    serije nisu blokirane. Mora se zvati unutar ``transaction.atomic`` koji
+    sprema i račune, inače bi rollback ostavio rupu u slijedu.
+    """
+    if not connection.in_atomic_block:
+        raise TransactionManagementError(
+            "allocate_invoice_numbers must run inside the transaction that saves the invoices."
+        )
+    if count < 1:
+        raise ValueError("count must be positive")
+    key = {
+        "tenant_id": getattr(tenant, "pk", tenant),
+        "year": year,
+        "series": series or default_series(),
+    }
+    sequence = InvoiceSequence.objects.filter(**key)
+    while not sequence.update(last_number=F("last_number") + count):
+        try:
+            with transaction.atomic():
+                InvoiceSequence.objects.create(**key, last_number=count)
+            return range(1, count + 1)
+        except IntegrityError:
+            continue  # brojač je upravo kreirao drugi pozivatelj
+    last = sequence.values_list("last_number", flat=True).get()
+    return range(last - count + 1, last + 1)
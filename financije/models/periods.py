@@ -0,0 +1,266 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Q, Sum
+from django.db.models.signals import pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .accounting import JournalEntry, JournalItem
+from .balances import AccountBalance
+
+ZERO = Decimal("0.00")
+
+
+class AccountingPeriod(models.Model):
+    """
+    Obračunsko razdoblje (mjesec) po tenantu.
+
+    Zaključeno razdoblje ima snimku zaključnih salda (PeriodClosingBalance) i
+    zaključava knjiženje u sebi i svim ranijim mjesecima.
+    """
+
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Tenant"),
+    )
+    year = models.PositiveIntegerField(verbose_name=_("Godina"))
+    month = models.PositiveIntegerField(verbose_name=_("Mjesec"))
+    is_closed = models.BooleanField(default=False, verbose_name=_("Zaključeno"))
+    closed_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Zaključeno u"))
+    closed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Zaključio"),
+    )
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Obračunsko razdoblje")
+        verbose_name_plural = _("Obračunska razdoblja")
+        ordering = ["year", "month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "year", "month"],
+                condition=Q(tenant__isnull=False),
+                name="accountingperiod_unique_tenant_period",
+            ),
+            models.UniqueConstraint(
+                fields=["year", "month"],
+                condition=Q(tenant__isnull=True),
+                name="accountingperiod_unique_period_no_tenant",
+            ),
+            models.CheckConstraint(
+                check=Q(month__gte=1) & Q(month__lte=12), name="accountingperiod_valid_month"
+            ),
+        ]
+
+    def __str__(self):
+        status = _("zaključeno") if self.is_closed else _("otvoreno")
+        return f"{self.month:02d}/{self.year} ({status})"
+
+
+class PeriodClosingBalance(models.Model):
+    """Kumulativni promet konta (od početka knjiženja) na kraju zaključenog razdoblja."""
+
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Tenant"),
+    )
+    account = models.ForeignKey(
+        "financije.Account",
+        on_delete=models.CASCADE,
+        related_name="closing_balances",
+        verbose_name=_("Konto"),
+    )
+    year = models.PositiveIntegerField(verbose_name=_("Godina"))
+    month = models.PositiveIntegerField(verbose_name=_("Mjesec"))
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=ZERO)
+    credit = models.DecimalField(max_digits=16, decimal_places=2, default=ZERO)
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Zaključno stanje konta")
+        verbose_name_plural = _("Zaključna stanja konta")
+        indexes = [models.Index(fields=["tenant", "year", "month"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "year", "month", "account"],
+                condition=Q(tenant__isnull=False),
+                name="periodclosingbalance_unique_tenant_account",
+            ),
+            models.UniqueConstraint(
+                fields=["year", "month", "account"],
+                condition=Q(tenant__isnull=True),
+                name="periodclosingbalance_unique_account_no_tenant",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} @ {self.month:02d}/{self.year}: {self.debit} / {self.credit}"
+
+
+def periods_after(year, month):
+    return Q(year__gt=year) | Q(year=year, month__gt=month)
+
+
+def periods_before(year, month):
+    return Q(year__lt=year) | Q(year=year, month__lt=month)
+
+
+def locked_periods(keys):
+    """
+    Od zadanih ``(tenant_id, year, month)`` vrati skup zaključanih.
+
+    Razdoblje je zaključano ako je ono ili bilo koje kasnije razdoblje istog
+    tenanta zaključeno (zaključavanje mjeseca zaključava i sve ranije).
+    """
+    keys = set(keys)
+    last_closed = {}
+    for tenant_id in {key[0] for key in keys}:
+        last = last_closed_period(tenant_id)
+        if last is not None:
+            last_closed[tenant_id] = (last.year, last.month)
+    return {
+        (tenant_id, year, month)
+        for tenant_id, year, month in keys
+        if tenant_id in last_closed and (year, month) <= last_closed[tenant_id]
+    }
+
+
+def ensure_period_open(tenant_id, date):
+    if locked_periods([(tenant_id, date.year, date.month)]):
+        raise ValidationError(
+            _("Razdoblje %(month)02d/%(year)s je zaključeno za knjiženje.")
+            % {"month": date.month, "year": date.year}
+        )
+
+
+def previous_month(year, month):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def last_closed_period(tenant_id, year=None, month=None):
+    """Zadnje zaključeno razdoblje tenanta (opcionalno zaključno s ``(year, month)``)."""
+    periods = AccountingPeriod.objects.filter(tenant_id=tenant_id, is_closed=True)
+    if year is not None:
+        periods = periods.filter(~periods_after(year, month))
+    return periods.order_by("-year", "-month").first()
+
+
+def snapshot_totals(period):
+    """``{account_id: (debit, credit)}`` iz snimke razdoblja (prazno ako nema snimke)."""
+    if period is None:
+        return {}
+    return {
+        account_id: (debit, credit)
+        for account_id, debit, credit in PeriodClosingBalance.objects.filter(
+            tenant_id=period.tenant_id, year=period.year, month=period.month
+        ).values_list("account_id", "debit", "credit")
+    }
+
+
+@transaction.atomic
+def close_period(year, month, tenant=None, user=None):
+    """
+    Zaključaj razdoblje i zapiši snimku kumulativnih salda po kontu.
+
+    Snimka = snimka prethodnog zaključenog razdoblja + promet iz AccountBalance
+    za mjesece između, pa se ne skenira niti jedna stavka temeljnice.
+    """
+    tenant_id = getattr(tenant, "pk", tenant)
+    previous = last_closed_period(tenant_id)
+    if previous is not None and (previous.year, previous.month) >= (year, month):
+        raise ValidationError(_("Razdoblje je već zaključeno."))
+    period, _created = AccountingPeriod.objects.select_for_update().get_or_create(
+        tenant_id=tenant_id, year=year, month=month
+    )
+
+    running = snapshot_totals(previous)
+    movements = AccountBalance.objects.filter(~periods_after(year, month), tenant_id=tenant_id)
+    if previous is not None:
+        movements = movements.filter(periods_after(previous.year, previous.month))
+    for row in (
+        movements.values("account_id")
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+    ):
+        debit, credit = running.get(row["account_id"], (ZERO, ZERO))
+        running[row["account_id"]] = (debit + row["debit_sum"], credit + row["credit_sum"])
+
+    PeriodClosingBalance.objects.filter(tenant_id=tenant_id, year=year, month=month).delete()
+    PeriodClosingBalance.objects.bulk_create(
+        [
+            PeriodClosingBalance(
+                tenant_id=tenant_id,
+                account_id=account_id,
+                year=year,
+                month=month,
+                debit=debit,
+                credit=credit,
+            )
+            for account_id, (debit, credit) in running.items()
+        ],
+        batch_size=1000,
+    )
+    period.is_closed = True
+    period.closed_at = timezone.now()
+    period.closed_by = user
+    period.save()
+    return period
+
+
+@transaction.atomic
+def reopen_period(year, month, tenant=None):
+    """
+    Ponovno otvori zadnje zaključeno razdoblje tenanta.
+
+    Briše se samo snimka tog razdoblja; ranije snimke ostaju valjane jer su
+    ranija razdoblja i dalje zaključana. Ponovnim zaključavanjem snimka se
+    računa iznova.
+    """
+    tenant_id = getattr(tenant, "pk", tenant)
+    last = last_closed_period(tenant_id)
+    if last is None or (last.year, last.month) != (year, month):
+        raise ValidationError(_("Može se ponovno otvoriti samo zadnje zaključeno razdoblje."))
+    PeriodClosingBalance.objects.filter(tenant_id=tenant_id, year=year, month=month).delete()
+    last.is_closed = False
+    last.closed_at = None
+    last.closed_by = None
+    last.save()
+    return last
+
+
+# --- Zaključavanje: pojedinačne izmjene u zaključenom razdoblju se odbijaju ---
+
+
+@receiver(pre_save, sender=JournalEntry)
+def lock_closed_period_entry(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ensure_period_open(instance.tenant_id, instance.date)
+    if instance.pk:
+        previous = JournalEntry.objects.filter(pk=instance.pk).values("tenant_id", "date").first()
+        if previous:
+            ensure_period_open(previous["tenant_id"], previous["date"])
+
+
+@receiver(pre_save, sender=JournalItem)
+@receiver(pre_delete, sender=JournalItem)
+def lock_closed_period_item(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    entry = JournalEntry.objects.filter(pk=instance.entry_id).values("tenant_id", "date").first()
+    if entry:
+        ensure_period_open(entry["tenant_id"], entry["date"])
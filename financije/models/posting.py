@@ -0,0 +1,135 @@
+from django.db import models, transaction
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from .invoice import Invoice, InvoiceLine
+
+
+class InvoicePosting(models.Model):
+    """
+    Zahtjev za knjiženje jedne verzije računa (red za Celery obradu).
+
+    Svako odobrenje ili izmjena odobrenog računa upisuje novu verziju kao
+    PENDING zapis; (račun, verzija) je jedinstven pa se ista verzija nikad ne
+    knjiži dvaput. Obrada je u ``financije.posting``.
+    """
+
+    PENDING = "pending"
+    POSTED = "posted"
+    REVERSED = "reversed"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, _("Čeka knjiženje")),
+        (POSTED, _("Proknjiženo")),
+        (REVERSED, _("Stornirano")),
+        (SKIPPED, _("Preskočeno")),
+        (FAILED, _("Greška")),
+    ]
+
+    invoice = models.ForeignKey(
+        Invoice, on_delete=models.CASCADE, related_name="postings", verbose_name=_("Račun")
+    )
+    version = models.PositiveIntegerField(verbose_name=_("Verzija"))
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name=_("Status")
+    )
+    journal_entry = models.ForeignKey(
+        "financije.JournalEntry",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("Temeljnica"),
+    )
+    reversal_entry = models.ForeignKey(
+        "financije.JournalEntry",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("Storno temeljnica"),
+    )
+    error = models.TextField(blank=True, default="", verbose_name=_("Greška"))
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = "financije"
+        verbose_name = _("Knjiženje računa")
+        verbose_name_plural = _("Knjiženja računa")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invoice", "version"], name="invoiceposting_unique_version"
+            )
+        ]
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self):
+        return f"{self.invoice_id} v{self.version} ({self.status})"
+
+
+def _schedule_processing():
+    from financije.tasks import process_invoice_postings
+
+    process_invoice_postings.delay()
+
+
+def request_posting(invoice_ids):
+    """
+    Zabilježi namjeru knjiženja: nova verzija i PENDING zapis po računu.
+
+    Ne knjiži ništa; Celery obrada se pokreće tek nakon commita transakcije.
+    Vraća broj upisanih zahtjeva.
+    """
+    invoice_ids = list(invoice_ids)
+    if not invoice_ids:
+        return 0
+    with transaction.atomic():
+        # Zaključavanje računa serijalizira zahtjeve i obradu istog računa.
+        locked_ids = list(
+            Invoice.objects.select_for_update()
+            .filter(pk__in=invoice_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        last_versions = dict(
+            InvoicePosting.objects.filter(invoice_id__in=locked_ids)
+            .values("invoice_id")
+            .annotate(last=Max("version"))
+            .values_list("invoice_id", "last")
+        )
+        postings = InvoicePosting.objects.bulk_create(
+            [
+                InvoicePosting(invoice_id=invoice_id, version=last_versions.get(invoice_id, 0) + 1)
+                for invoice_id in locked_ids
+            ]
+        )
+        transaction.on_commit(_schedule_processing)
+    return len(postings)
+
+
+# --- Izmjene računa i stavki stvaraju novu verziju za knjiženje ---
+
+
+@receiver(post_save, sender=Invoice)
+def request_invoice_posting(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.status_fakture == "odobreno" or (
+        not created
+        and InvoicePosting.objects.filter(invoice=instance, status=InvoicePosting.POSTED).exists()
+    ):
+        # Odobren račun se (ponovno) knjiži, a otkazan/vraćen u draft stornira.
+        request_posting([instance.pk])
+
+
+@receiver(post_save, sender=InvoiceLine)
+@receiver(post_delete, sender=InvoiceLine)
+def request_invoice_line_posting(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or isinstance(origin, Invoice) or getattr(origin, "model", None) is Invoice:
+        return  # stavke se brišu zajedno s računom
+    if Invoice.objects.filter(pk=instance.invoice_id, status_fakture="odobreno").exists():
+        request_posting([instance.invoice_id])
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FinancijeCursorPagination(CursorPagination):
+    """
+    Zadana paginacija financije API-ja: kursor po ``-id``.
+
+    Stranica se čita jednim upitom neovisno o tome koliko je daleko, a
+    umetanje novih zapisa ne pomiče već pročitane retke.
+    """
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = "-id"
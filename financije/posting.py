@@ -0,0 +1,157 @@
+"""Obrada reda knjiženja računa (InvoicePosting), poziva se iz Celery taska.
+
+Po računu se knjiži samo najnovija PENDING verzija; starije PENDING verzije
+su zastarjele i preskaču se. Ako se sadržaj knjiženja promijenio u odnosu na
+proknjiženu verziju, stara temeljnica se stornira i knjiži nova; ako nije,
+nova verzija se preskače. Otkazan račun samo se stornira.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from financije import account_map
+from financije.ledger import LedgerEntry, invoice_entry, post_entries
+from financije.models.invoice import Invoice
+from financije.models.periods import locked_periods
+from financije.models.posting import InvoicePosting
+
+BATCH_SIZE = 500
+
+
+def _posted_lines(journal_entry):
+    return sorted(
+        (item.account_id, item.debit, item.credit) for item in journal_entry.journalitem_set.all()
+    )
+
+
+def _same_posting(journal_entry, entry):
+    return journal_entry.date == entry.date and _posted_lines(journal_entry) == sorted(entry.lines)
+
+
+def reversal_entry(journal_entry):
+    """Storno temeljnica: iste stavke sa zamijenjenim stranama, na datum izvorne."""
+    return LedgerEntry(
+        date=journal_entry.date,
+        description=_("Storno: %(description)s") % {"description": journal_entry.description},
+        lines=[
+            (item.account_id, item.credit, item.debit)
+            for item in journal_entry.journalitem_set.all()
+        ],
+        tenant=journal_entry.tenant_id,
+        division=journal_entry.division,
+    )
+
+
+def _plan(invoice, current, account_maps):
+    """Temeljnice za jednu verziju: ``[(uloga, LedgerEntry)]``; prazno ako nema promjene."""
+    entry = None
+    if invoice is not None and invoice.status_fakture == "odobreno":
+        entry = invoice_entry(invoice, account_maps[invoice.tenant_id])
+    if current is not None and entry is not None and _same_posting(current.journal_entry, entry):
+        return []
+    planned = []
+    if current is not None:
+        planned.append(("reversal", reversal_entry(current.journal_entry)))
+    if entry is not None:
+        planned.append(("posting", entry))
+    return planned
+
+
+@transaction.atomic
+def process_pending_postings(batch_size=BATCH_SIZE):
+    """
+    Obradi jednu seriju PENDING zahtjeva; vraća broj obrađenih zapisa.
+
+    Računi serije se zaključavaju (SELECT ... FOR UPDATE), pa dva workera ne
+    mogu istovremeno knjižiti isti račun; sve temeljnice serije zapisuju se
+    jednim ``post_entries``.
+    """
+    invoice_ids = sorted(
+        set(
+            InvoicePosting.objects.select_for_update(skip_locked=True)
+            .filter(status=InvoicePosting.PENDING)
+            .order_by("pk")
+            .values_list("invoice_id", flat=True)[:batch_size]
+        )
+    )
+    if not invoice_ids:
+        return 0
+    invoices = {
+        invoice.pk: invoice
+        for invoice in Invoice.objects.select_for_update()
+        .filter(pk__in=invoice_ids)
+        .order_by("pk")
+        .prefetch_related("vat_breakdown")
+    }
+    latest, stale = {}, []
+    for posting in InvoicePosting.objects.filter(
+        invoice_id__in=invoice_ids, status=InvoicePosting.PENDING
+    ).order_by("invoice_id", "version"):
+        if posting.invoice_id in latest:
+            stale.append(latest[posting.invoice_id])
+        latest[posting.invoice_id] = posting
+    current = {
+        posting.invoice_id: posting
+        for posting in InvoicePosting.objects.filter(
+            invoice_id__in=invoice_ids, status=InvoicePosting.POSTED
+        )
+        .select_related("journal_entry")
+        .prefetch_related("journal_entry__journalitem_set")
+    }
+
+    now = timezone.now()
+    account_maps = account_map.TenantAccountMaps()
+    for posting in stale:
+        posting.status = InvoicePosting.SKIPPED
+        posting.processed_at = now
+
+    plans = {}
+    for invoice_id, posting in latest.items():
+        posting.processed_at = now
+        try:
+            plans[invoice_id] = _plan(
+                invoices.get(invoice_id), current.get(invoice_id), account_maps
+            )
+        except ValidationError as e:
+            posting.status, posting.error = InvoicePosting.FAILED, "; ".join(e.messages)
+    locked = locked_periods(
+        (entry.tenant_id, entry.date.year, entry.date.month)
+        for planned in plans.values()
+        for _role, entry in planned
+    )
+    for invoice_id, planned in list(plans.items()):
+        if any((e.tenant_id, e.date.year, e.date.month) in locked for _role, e in planned):
+            posting = latest[invoice_id]
+            posting.status = InvoicePosting.FAILED
+            posting.error = str(_("Razdoblje knjiženja je zaključeno."))
+            del plans[invoice_id]
+
+    planned = [
+        (invoice_id, role, entry) for invoice_id, items in plans.items() for role, entry in items
+    ]
+    journal_entries = post_entries(entry for _invoice_id, _role, entry in planned)
+    created = {
+        (invoice_id, role): journal_entry
+        for (invoice_id, role, _entry), journal_entry in zip(planned, journal_entries, strict=True)
+    }
+
+    reversed_postings = []
+    for invoice_id in plans:
+        posting = latest[invoice_id]
+        posting.status = InvoicePosting.SKIPPED
+        posting.journal_entry = created.get((invoice_id, "posting"))
+        if posting.journal_entry is not None:
+            posting.status = InvoicePosting.POSTED
+        if (invoice_id, "reversal") in created:
+            previous = current[invoice_id]
+            previous.status = InvoicePosting.REVERSED
+            previous.reversal_entry = created[(invoice_id, "reversal")]
+            reversed_postings.append(previous)
+
+    InvoicePosting.objects.bulk_update(
+        [*stale, *latest.values(), *reversed_postings],
+        ["status", "journal_entry", "reversal_entry", "error", "processed_at"],
+    )
+    return len(stale) + len(latest)
@@ -0,0 +1,214 @@
+"""Automatsko usklađivanje uplata s izvoda (BankTransaction) s otvorenim računima.
+
+Otvoreni računi i IBAN-i klijenata čitaju se jednom po pokretanju u hash
+indekse u memoriji; svaka uplata se zatim uparuje bez upita u bazu:
+
+1. po pozivu na broj (ili brojevima računa u opisu): iznos se raspoređuje na
+   navedene račune od najranijeg dospijeća, pa je djelomična uplata dopuštena;
+2. po IBAN-u platitelja: jedan otvoreni račun klijenta s točno tim iznosom ili
+   najstariji računi klijenta čiji je zbroj točno iznos uplate (skupna uplata).
+
+Rezultat se upisuje skupno: ``Payment`` po rasporedu (s vezom na transakciju),
+``is_reconciled`` na uparenim transakcijama i ``paid`` na podmirenim računima.
+
+Usklađivanje tenanta obuhvaća priljeve njegovih bankovnih računa
+(``BankSyncState.tenant``). Cijelo pokretanje je jedna transakcija baze, a
+priljevi se zaključavaju (``select_for_update(skip_locked=True)``), pa
+istovremeno pokretanje preskače transakcije koje prvo već obrađuje.
+"""
+
+import re
+from collections import defaultdict, deque
+from decimal import Decimal
+
+from django.db import transaction
+
+from client_app.models import ClientSupplier
+from financije.aging import open_invoices
+from financije.models.bank import BankSyncState, BankTransaction
+from financije.models.invoice import Invoice, Payment, invoices_changed
+
+ZERO = Decimal("0.00")
+CHUNK_SIZE = 2000
+REFERENCE_MODEL_RE = re.compile(r"^\s*HR\d{2}\s*")
+# Broj računa u slobodnom tekstu: grupe znamenki odvojene s / ili - (1/1/2025, 15-2025).
+INVOICE_NUMBER_RE = re.compile(r"\d+(?:[/-]\d+)+")
+
+
+def reference_key(text):
+    """Normaliziran poziv na broj ili broj računa: ``HR01 01-1-2025`` → ``1-1-2025``."""
+    groups = re.findall(r"\d+", REFERENCE_MODEL_RE.sub("", text or ""))
+    return "-".join(str(int(group)) for group in groups) or None
+
+
+def transaction_keys(poziv_na_broj, opis):
+    """Ključevi računa iz poziva na broj, a bez njega iz brojeva računa u opisu."""
+    key = reference_key(poziv_na_broj)
+    if key:
+        return [key]
+    return list(dict.fromkeys(reference_key(number) for number in INVOICE_NUMBER_RE.findall(opis)))
+
+
+def _iban(value):
+    return (value or "").replace(" ", "").upper()
+
+
+class OpenInvoice:
+    __slots__ = ("pk", "client_id", "outstanding")
+
+    def __init__(self, pk, client_id, outstanding):
+        self.pk = pk
+        self.client_id = client_id
+        self.outstanding = outstanding
+
+
+class InvoiceIndex:
+    """Hash indeksi otvorenih računa: po pozivu na broj, po klijentu i po (klijent, iznos)."""
+
+    def __init__(self, invoices):
+        self.by_reference = defaultdict(list)
+        self.by_client = defaultdict(deque)
+        self.by_amount = defaultdict(deque)
+        for invoice_number, invoice in invoices:  # redom dospijeća
+            key = reference_key(invoice_number)
+            if key:
+                self.by_reference[key].append(invoice)
+            self.by_client[invoice.client_id].append(invoice)
+            self.by_amount[(invoice.client_id, invoice.outstanding)].append(invoice)
+
+    def for_keys(self, keys):
+        seen = {}
+        for key in keys:
+            for invoice in self.by_reference.get(key, ()):
+                if invoice.outstanding > 0:
+                    seen.setdefault(invoice.pk, invoice)
+        return list(seen.values())
+
+    def exact(self, client_id, amount):
+        """Najstariji otvoreni račun klijenta s otvorenim iznosom točno ``amount``."""
+        candidates = self.by_amount.get((client_id, amount), ())
+        while candidates and candidates[0].outstanding != amount:
+            candidates.popleft()  # (djelomično) plaćen ranije u ovom pokretanju
+        return candidates[0] if candidates else None
+
+    def combined(self, client_id, amount):
+        """Najstariji otvoreni računi klijenta čiji je zbroj točno ``amount``."""
+        invoices = self.by_client.get(client_id, ())
+        while invoices and invoices[0].outstanding <= 0:
+            invoices.popleft()
+        selected, total = [], ZERO
+        for invoice in invoices:
+            if invoice.outstanding <= 0:
+                continue
+            selected.append(invoice)
+            total += invoice.outstanding
+            if total >= amount:
+                break
+        return selected if total == amount and len(selected) > 1 else []
+
+
+def load_index(tenant=None):
+    invoices = (
+        open_invoices(tenant)
+        .order_by("due_date", "pk")
+        .values_list("pk", "invoice_number", "client_id", "outstanding")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    return InvoiceIndex(
+        (number, OpenInvoice(pk, client_id, outstanding))
+        for pk, number, client_id, outstanding in invoices
+    )
+
+
+def client_ibans():
+    return {
+        _iban(iban): pk
+        for iban, pk in ClientSupplier.objects.exclude(iban="").values_list("iban", "pk")
+    }
+
+
+def match_transaction(index, ibans, amount, poziv_na_broj, opis, protustrana_iban):
+    """Raspored uplate ``[(račun, iznos)]``; prazno ako uplata nije uparena."""
+    invoices = index.for_keys(transaction_keys(poziv_na_broj, opis))
+    if not invoices:
+        client_id = ibans.get(_iban(protustrana_iban))
+        if client_id is None:
+            return []
+        invoice = index.exact(client_id, amount)
+        invoices = [invoice] if invoice else index.combined(client_id, amount)
+    allocation, remaining = [], amount
+    for invoice in invoices:
+        if remaining <= 0:
+            break
+        part = min(invoice.outstanding, remaining)
+        allocation.append((invoice, part))
+        remaining -= part
+    return allocation
+
+
+def incoming_transactions(tenant=None):
+    transactions = BankTransaction.objects.filter(
+        is_reconciled=False, tip_transakcije="priljev", iznos__gt=0
+    )
+    if tenant is not None:
+        accounts = BankSyncState.objects.filter(tenant=getattr(tenant, "pk", tenant)).values(
+            "bank_account_number"
+        )
+        transactions = transactions.filter(bank_account_number__in=accounts)
+    return (
+        transactions.select_for_update(skip_locked=True)
+        .order_by("datum", "pk")
+        .values_list("pk", "iznos", "datum", "poziv_na_broj", "opis", "protustrana_iban")
+    )
+
+
+@transaction.atomic
+def reconcile(tenant=None):
+    """
+    Uskladi sve neusklađene priljeve s otvorenim računima (tenanta).
+
+    Vraća ``{"matched", "unmatched", "payments", "paid_invoices", "unallocated"}``;
+    ``unallocated`` je zbroj preplata (iznos uplate iznad otvorenog iznosa).
+    """
+    index = load_index(tenant)
+    ibans = client_ibans()
+    payments, matched, touched = [], [], {}
+    unmatched, unallocated = 0, ZERO
+    rows = incoming_transactions(tenant).iterator(chunk_size=CHUNK_SIZE)
+    for pk, amount, datum, poziv_na_broj, opis, protustrana_iban in rows:
+        allocation = match_transaction(index, ibans, amount, poziv_na_broj, opis, protustrana_iban)
+        if not allocation:
+            unmatched += 1
+            continue
+        matched.append(pk)
+        for invoice, part in allocation:
+            invoice.outstanding -= part
+            touched[invoice.pk] = invoice
+            payments.append(
+                Payment(
+                    related_invoice_id=invoice.pk,
+                    amount=part,
+                    payment_date=datum,
+                    bank_transaction_id=pk,
+                )
+            )
+        unallocated += amount - sum(part for _invoice, part in allocation)
+
+    paid = [pk for pk, invoice in touched.items() if invoice.outstanding <= 0]
+    Payment.objects.bulk_create(payments, batch_size=CHUNK_SIZE)
+    for start in range(0, len(matched), CHUNK_SIZE):
+        BankTransaction.objects.filter(pk__in=matched[start : start + CHUNK_SIZE]).update(
+            is_reconciled=True
+        )
+    for start in range(0, len(paid), CHUNK_SIZE):
+        Invoice.objects.filter(pk__in=paid[start : start + CHUNK_SIZE]).update(paid=True)
+    if touched:
+        # bulk_create ne šalje post_save; otvorene iznose (aging) osvježava ovaj signal.
+        invoices_changed.send(sender=Invoice, invoice_ids=list(touched))
+    return {
+        "matched": len(matched),
+        "unmatched": unmatched,
+        "payments": len(payments),
+        "paid_invoices": len(paid),
+        "unallocated": unallocated,
+    }
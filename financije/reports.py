@@ -3,7 +3,7 @@ from financije.models import Invoice
 
 def generate_vat_report():
     # Logika za generiranje izvještaja o PDV-u
-    invoices = Invoice.objects.all()
+    invoices = Invoice.objects.select_related("client")
     pdv_report = []
     for invoice in invoices:
         pdv_report.append(
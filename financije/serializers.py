@@ -12,6 +12,9 @@ from .models import (
     FinancialDetails,  # Dodano
     FinancialReport,
     Invoice,
+    InvoiceLine,
+    JournalEntry,
+    JournalItem,
     MonthlyOverhead,
     Municipality,
     Overhead,
@@ -24,103 +27,161 @@ from .models import (
 )
 
 
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer s opcionalnim ``fields`` argumentom (``?fields=id,invoice_number``).
+
+    Nepoznata imena se ignoriraju; bez argumenta serializer vraća sva polja.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 class ClientSupplierSerializer(serializers.ModelSerializer):
     class Meta:
         model = ClientSupplier
         fields = "__all__"
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceLineSerializer(serializers.ModelSerializer):
+    # ``total`` je anotacija (quantity * unit_price) iz upita stavki.
+    total = serializers.DecimalField(max_digits=20, decimal_places=4, read_only=True)
+
+    class Meta:
+        model = InvoiceLine
+        fields = ["id", "description", "quantity", "unit_price", "tax_rate", "total"]
+
+
+class InvoiceSerializer(SparseFieldsetSerializer):
+    """Klijent i stavke dolaze iz select_related/prefetch_related InvoiceViewSet-a."""
+
+    client_name = serializers.CharField(source="client.name", read_only=True)
+    lines = InvoiceLineSerializer(many=True, read_only=True)
+
     class Meta:
         model = Invoice
         fields = "__all__"
 
 
-class AuditLogSerializer(serializers.ModelSerializer):
+class JournalItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = JournalItem
+        fields = ["id", "account", "debit", "credit"]
+
+
+class JournalEntrySerializer(SparseFieldsetSerializer):
+    """Zbrojevi dolaze iz JournalEntry.objects.with_totals(), ne iz upita po retku."""
+
+    items = JournalItemSerializer(source="journalitem_set", many=True, read_only=True)
+    debit_total = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    credit_total = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    balanced = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = JournalEntry
+        fields = [
+            "id",
+            "tenant",
+            "date",
+            "description",
+            "division",
+            "user",
+            "debit_total",
+            "credit_total",
+            "balanced",
+            "items",
+        ]
+
+
+class AuditLogSerializer(SparseFieldsetSerializer):
     class Meta:
         model = AuditLog
         fields = "__all__"
 
 
-class SalarySerializer(serializers.ModelSerializer):
+class SalarySerializer(SparseFieldsetSerializer):
     class Meta:
         model = Salary
         fields = "__all__"
 
 
-class TaxSerializer(serializers.ModelSerializer):
+class TaxSerializer(SparseFieldsetSerializer):
     class Meta:
         model = Tax
         fields = "__all__"
 
 
-class SalaryAdditionSerializer(serializers.ModelSerializer):
+class SalaryAdditionSerializer(SparseFieldsetSerializer):
     class Meta:
         model = SalaryAddition
         fields = "__all__"
 
 
-class TaxConfigurationSerializer(serializers.ModelSerializer):
+class TaxConfigurationSerializer(SparseFieldsetSerializer):
     class Meta:
         model = TaxConfiguration
         fields = "__all__"
 
 
-class VariablePayRuleSerializer(serializers.ModelSerializer):
+class VariablePayRuleSerializer(SparseFieldsetSerializer):
     class Meta:
         model = VariablePayRule
         fields = "__all__"
 
 
-class FinancialDetailsSerializer(serializers.ModelSerializer):
+class FinancialDetailsSerializer(SparseFieldsetSerializer):
     class Meta:
         model = FinancialDetails
         fields = "__all__"
 
 
-class OverheadSerializer(serializers.ModelSerializer):
+class OverheadSerializer(SparseFieldsetSerializer):
     class Meta:
         model = Overhead
         fields = "__all__"
 
 
-class MunicipalitySerializer(serializers.ModelSerializer):
+class MunicipalitySerializer(SparseFieldsetSerializer):
     class Meta:
         model = Municipality
         fields = "__all__"
 
 
-class FinancialReportSerializer(serializers.ModelSerializer):
+class FinancialReportSerializer(SparseFieldsetSerializer):
     class Meta:
         model = FinancialReport
         fields = "__all__"
 
 
-class DebtSerializer(serializers.ModelSerializer):
+class DebtSerializer(SparseFieldsetSerializer):
     class Meta:
         model = Debt
         fields = "__all__"
 
 
-class BankTransactionSerializer(serializers.ModelSerializer):
+class BankTransactionSerializer(SparseFieldsetSerializer):
     class Meta:
         model = BankTransaction
         fields = "__all__"
 
 
-class OverheadCategorySerializer(serializers.ModelSerializer):
+class OverheadCategorySerializer(SparseFieldsetSerializer):
     class Meta:
         model = OverheadCategory
         fields = "__all__"
 
 
-class MonthlyOverheadSerializer(serializers.ModelSerializer):
+class MonthlyOverheadSerializer(SparseFieldsetSerializer):
     class Meta:
         model = MonthlyOverhead
         fields = "__all__"
 
 
-class BudgetSerializer(serializers.ModelSerializer):
+class BudgetSerializer(SparseFieldsetSerializer):
     class Meta:
         model = Budget
         fields = "__all__"
@@ -4,6 +4,8 @@ from django.db import transaction
 from django.utils import timezone
 
 from .models import CashFlow, Invoice
+from .models.invoice import invoices_changed
+from .models.posting import request_posting
 
 
 class InvoiceService:
@@ -20,6 +22,29 @@ class InvoiceService:
         )
         return invoice
 
+    @staticmethod
+    @transaction.atomic
+    def approve_invoices(invoices):
+        """
+        Odobri sve draft račune iz skupa i stavi ih u red za knjiženje.
+
+        Status se mijenja s ``update()`` pa se post_save po računu ne okida; knjiženje
+        radi Celery task ``process_invoice_postings`` nakon commita.
+        Vraća broj odobrenih računa.
+        """
+        ids = list(
+            invoices.filter(status_fakture="draft")
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        if not ids:
+            return 0
+        Invoice.objects.filter(pk__in=ids).update(status_fakture="odobreno")
+        invoices_changed.send(sender=Invoice, invoice_ids=ids)
+        request_posting(ids)
+        return len(ids)
+
     @staticmethod
     def calculate_overdue_invoices():
         return Invoice.objects.filter(paid=False, due_date__lt=timezone.now().date())
@@ -0,0 +1,338 @@
+"""Uvoz datoteka bankovnih izvoda: ISO 20022 camt.053 (XML) i SWIFT MT940.
+
+Datoteka se čita kao tok: camt.053 inkrementalnim ``iterparse`` (obrađeni
+``Ntry`` elementi se odmah uklanjaju iz stabla), MT940 redak po redak. Stavke
+idu u ``bank_sync.upsert_transactions`` u serijama, pa memorija ne raste s
+veličinom datoteke ni brojem računa u njoj. Ponovni uvoz iste datoteke samo
+ažurira postojeće transakcije (ključ je bankovna referenca).
+
+Izvodi ne nose saldo po stavci; ``saldo`` je tekući saldo od početnog stanja
+izvoda (camt ``OPBD``/``PRCD``, MT940 ``:60F:``/``:60M:``). Neispravan iznos ili
+datum prekida uvoz ``StatementError``-om koji navodi element, odnosno redak.
+"""
+
+import datetime
+import hashlib
+import re
+import xml.etree.ElementTree as ET
+from decimal import Decimal, InvalidOperation
+
+from django.utils.translation import gettext_lazy as _
+
+from financije.bank_sync import BATCH_SIZE, in_batches, upsert_transactions
+
+CAMT053 = "camt053"
+MT940 = "mt940"
+FORMATS = (CAMT053, MT940)
+
+OPENING_BALANCES = {"OPBD", "PRCD"}
+MAX_DESCRIPTION = 255
+MAX_REFERENCE = 100
+
+
+class StatementError(ValueError):
+    """Neispravna ili nepodržana datoteka izvoda."""
+
+
+def _amount(text, where):
+    try:
+        return Decimal((text or "").strip())
+    except InvalidOperation as e:
+        raise StatementError(
+            _("Neispravan iznos (%(where)s): %(value)s") % {"where": where, "value": text}
+        ) from e
+
+
+def _iso_date(text, where, required=True):
+    """``text`` (``YYYY-MM-DD``) ako je ispravan datum; bez datuma ``None`` ili greška."""
+    if not text:
+        if required:
+            raise StatementError(_("Nedostaje datum knjiženja (%(where)s).") % {"where": where})
+        return None
+    try:
+        datetime.date.fromisoformat(text)
+    except ValueError as e:
+        raise StatementError(
+            _("Neispravan datum (%(where)s): %(value)s") % {"where": where, "value": text}
+        ) from e
+    return text
+
+
+def _entry(
+    iban,
+    booking_date,
+    value_date,
+    credit,
+    amount,
+    currency,
+    description,
+    reference,
+    saldo,
+    payment_reference=None,
+    counterparty_iban=None,
+):
+    """Polja ``BankTransaction`` jedne stavke izvoda."""
+    if not reference:
+        # Bez bankovne reference: stabilan ključ iz sadržaja (tekući saldo razlikuje
+        # inače jednake stavke), pa ponovni uvoz ne stvara duplikate.
+        digest = hashlib.sha1(
+            f"{iban}|{booking_date}|{credit}|{amount}|{saldo}|{description}".encode()
+        ).hexdigest()
+        reference = f"{iban}:{digest}"
+    return {
+        "referenca": reference[:MAX_REFERENCE],
+        "tip_transakcije": "priljev" if credit else "odljev",
+        "iznos": amount,
+        "opis": (description or "")[:MAX_DESCRIPTION],
+        "datum": booking_date,
+        "datum_valute": value_date,
+        "saldo": saldo,
+        "bank_account_number": iban,
+        "bank_name": None,
+        "valuta": currency or "EUR",
+        "poziv_na_broj": (payment_reference or "")[:35],
+        "protustrana_iban": (counterparty_iban or "").replace(" ", "")[:34],
+    }
+
+
+# --- camt.053 ---
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(element, path):
+    """Prvi potomak po putu lokalnih imena (``"BookgDt/Dt"``), bez obzira na namespace."""
+    for name in path.split("/"):
+        if element is None:
+            return None
+        element = next((child for child in element if _local(child.tag) == name), None)
+    return element
+
+
+def _text(element, *paths):
+    for path in paths:
+        found = _find(element, path)
+        if found is not None and found.text and found.text.strip():
+            return found.text.strip()
+    return None
+
+
+def _date(element, path):
+    return _text(element, f"{path}/Dt") or (_text(element, f"{path}/DtTm") or "")[:10] or None
+
+
+def _camt_amount(element, where):
+    amount = _find(element, "Amt")
+    credit = _text(element, "CdtDbtInd") == "CRDT"
+    if amount is None:
+        return _amount(None, f"{where}/Amt"), credit, None
+    return _amount(amount.text, f"{where}/Amt"), credit, amount.get("Ccy")
+
+
+def _camt_entry(ntry, iban, saldo):
+    details = _find(ntry, "NtryDtls/TxDtls")
+    reference = _text(ntry, "AcctSvcrRef", "NtryRef") or _text(details, "Refs/AcctSvcrRef")
+    where = f"Ntry {reference}" if reference else "Ntry"
+    amount, credit, currency = _camt_amount(ntry, where)
+    if _text(ntry, "RvslInd") == "true":
+        credit = not credit
+    description = _text(details, "RmtInf/Ustrd") or _text(ntry, "AddtlNtryInf")
+    counterparty = "RltdPties/DbtrAcct/Id/IBAN" if credit else "RltdPties/CdtrAcct/Id/IBAN"
+    saldo += amount if credit else -amount
+    return (
+        _entry(
+            iban,
+            _iso_date(_date(ntry, "BookgDt"), f"{where}/BookgDt"),
+            _iso_date(_date(ntry, "ValDt"), f"{where}/ValDt", required=False),
+            credit,
+            amount,
+            currency,
+            description,
+            reference,
+            saldo,
+            _text(details, "RmtInf/Strd/CdtrRefInf/Ref"),
+            _text(details, counterparty),
+        ),
+        saldo,
+    )
+
+
+def iter_camt053(fileobj):
+    """Stavke camt.053 datoteke (binarni tok), izvod po izvod."""
+    stack = []
+    iban, saldo = None, Decimal("0.00")
+    try:
+        for event, element in ET.iterparse(fileobj, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                continue
+            stack.pop()
+            name = _local(element.tag)
+            parent = _local(stack[-1].tag) if stack else None
+            if parent != "Stmt" and name != "Stmt":
+                continue
+            if name == "Acct":
+                iban = _text(element, "Id/IBAN", "Id/Othr/Id")
+            elif name == "Bal" and _text(element, "Tp/CdOrPrtry/Cd") in OPENING_BALANCES:
+                amount, credit, _currency = _camt_amount(element, "Bal")
+                saldo = amount if credit else -amount
+            elif name == "Ntry":
+                if iban is None:
+                    raise StatementError(_("Stavka izvoda prije broja računa (Acct)."))
+                entry, saldo = _camt_entry(element, iban, saldo)
+                yield entry
+                stack[-1].remove(element)
+            elif name == "Stmt":
+                iban, saldo = None, Decimal("0.00")
+                if stack:
+                    stack[-1].remove(element)
+    except ET.ParseError as e:
+        raise StatementError(_("Neispravan camt.053 XML: %(error)s") % {"error": e}) from e
+
+
+# --- MT940 ---
+
+TAG_RE = re.compile(r"^:(\d{2}[A-Z]?):(.*)$")
+BALANCE_RE = re.compile(r"^(?P<mark>[CD])(?P<date>\d{6})(?P<currency>[A-Z]{3})(?P<amount>[\d,]+)")
+LINE_RE = re.compile(
+    r"^(?P<value>\d{6})(?P<entry>\d{4})?(?P<mark>R?[CD])[A-Z]?(?P<amount>\d+,\d*)"
+    r"[NF][A-Z0-9]{3}(?P<customer>[^/]*?)(?://(?P<bank>.*?))?$"
+)
+
+# Nestrukturirano polje :86: - poziv na broj (HRnn ...) i IBAN protustrane, ako su navedeni.
+PAYMENT_REFERENCE_RE = re.compile(r"\bHR\d{2} ?\d[\d-]*")
+IBAN_RE = re.compile(r"\b[A-Z]{2}\d{2}[A-Z0-9]{11,30}\b")
+
+
+def _payment_reference(description):
+    for match in PAYMENT_REFERENCE_RE.finditer(description):
+        if not IBAN_RE.fullmatch(match.group(0)):
+            return match.group(0)
+    return None
+
+
+def _mt940_amount(text, where):
+    return _amount(text.replace(",", ".").rstrip("."), where)
+
+
+def _mt940_date(text, where):
+    return _iso_date(f"20{text[:2]}-{text[2:4]}-{text[4:6]}", where)
+
+
+def _mt940_fields(lines):
+    """``(tag, sadržaj)`` iz redaka datoteke; nastavci polja se spajaju s ``\\n``."""
+    tag, value = None, []
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        match = TAG_RE.match(line)
+        if match:
+            if tag:
+                yield tag, "\n".join(value)
+            tag, value = match.group(1), [match.group(2)]
+        elif line.startswith("-") or line.startswith("{") or not line.strip():
+            if tag:  # kraj poruke (SWIFT blokovi)
+                yield tag, "\n".join(value)
+            tag, value = None, []
+        elif tag:
+            value.append(line)
+    if tag:
+        yield tag, "\n".join(value)
+
+
+def iter_mt940(lines):
+    """Stavke MT940 datoteke (tekstualni retci), izvod po izvod."""
+    iban, currency, saldo, pending = None, None, Decimal("0.00"), None
+
+    def finish(description=None):
+        nonlocal saldo
+        line = pending
+        where = f":61:{line['line']}"
+        credit = line["mark"] in ("C", "RD")
+        amount = _mt940_amount(line["amount"], where)
+        saldo += amount if credit else -amount
+        reference = (line["bank"] or "").strip() or (
+            line["customer"].strip() if line["customer"].strip() != "NONREF" else ""
+        )
+        value_date = _mt940_date(line["value"], where)
+        booking_date = value_date
+        if line["entry"]:
+            booking_date = _iso_date(
+                f"{value_date[:5]}{line['entry'][:2]}-{line['entry'][2:]}", where
+            )
+        description = " ".join((description or "").split())
+        counterparty = IBAN_RE.search(description)
+        return _entry(
+            iban,
+            booking_date,
+            value_date,
+            credit,
+            amount,
+            currency,
+            description,
+            reference,
+            saldo,
+            _payment_reference(description),
+            counterparty and counterparty.group(0),
+        )
+
+    for tag, value in _mt940_fields(lines):
+        if tag != "86" and pending is not None:
+            yield finish()
+            pending = None
+        if tag == "25":
+            iban = value.strip().split("/")[-1].replace(" ", "")
+        elif tag in ("60F", "60M"):
+            match = BALANCE_RE.match(value)
+            if not match:
+                raise StatementError(_("Neispravno početno stanje: %(value)s") % {"value": value})
+            amount = _mt940_amount(match["amount"], f":{tag}:{value}")
+            currency, saldo = match["currency"], amount if match["mark"] == "C" else -amount
+        elif tag == "61":
+            match = LINE_RE.match(value.split("\n", 1)[0])
+            if not match or iban is None:
+                raise StatementError(_("Neispravna stavka :61: %(value)s") % {"value": value})
+            pending = {**match.groupdict(), "line": value.split("\n", 1)[0]}
+        elif tag == "86" and pending is not None:
+            yield finish(value)
+            pending = None
+    if pending is not None:
+        yield finish()
+
+
+# --- Uvoz ---
+
+
+def detect_format(fileobj):
+    """``CAMT053`` ako datoteka počinje XML-om, inače ``MT940``; tok se vraća na početak."""
+    head = fileobj.read(512)
+    fileobj.seek(0)
+    if isinstance(head, bytes):
+        head = head.decode("utf-8", "replace")
+    return CAMT053 if head.lstrip("\ufeff \t\r\n").startswith("<") else MT940
+
+
+def statement_entries(fileobj, fmt=None):
+    """Stavke izvoda iz binarnog toka ``fileobj``; ``fmt`` zadano prepoznaje sadržaj."""
+    fmt = fmt or detect_format(fileobj)
+    if fmt == CAMT053:
+        return iter_camt053(fileobj)
+    if fmt == MT940:
+        return iter_mt940(line.decode("utf-8-sig", "replace") for line in fileobj)
+    raise StatementError(_("Nepodržan format izvoda: %(format)s") % {"format": fmt})
+
+
+def import_statement_file(fileobj, fmt=None, batch_size=BATCH_SIZE):
+    """
+    Uvezi izvod iz binarnog toka u serijama; vraća ``{IBAN: broj stavki}``.
+
+    Stavke s istom bankovnom referencom (ponovljen izvod) ažuriraju postojeće.
+    """
+    counts = {}
+    for batch in in_batches(statement_entries(fileobj, fmt), batch_size):
+        upsert_transactions(batch)
+        for entry in batch:
+            iban = entry["bank_account_number"]
+            counts[iban] = counts.get(iban, 0) + 1
+    return counts
@@ -3,13 +3,26 @@ from celery import shared_task
 from channels.layers import get_channel_layer
 from django.utils import timezone
 
-from financije.models import BreakEvenSnapshot
-from financije.models.fixed_costs import FixedCost
+from financije.bank_sync import sync_accounts
+from financije.cash_flow_reports import generate_reports
+from financije.cash_position import refresh_cash_positions
+from financije.documents import invoice_pdf_batch
+from financije.einvoice import einvoice_batch
+from financije.mail import BATCH_SIZE as MAIL_BATCH_SIZE
+from financije.mail import queue_dunning, send_pending_emails
+from financije.posting import BATCH_SIZE, process_pending_postings
+from financije.reconciliation import reconcile
 from tenants.models import Tenant
 
 
 @shared_task
 def write_break_even_snapshots():
+    # BreakEvenSnapshot i FixedCost uklonjeni su iz financije.models (migracija 0014).
+    # Uvoz na razini modula rušio je učitavanje cijelog financije.tasks, pa worker
+    # nije vidio nijedan task ovog modula; zato se uvoze tek pri pozivu.
+    from financije.models.break_even import BreakEvenSnapshot
+    from financije.models.fixed_costs import FixedCost
+
     today = timezone.now().date()
     channel_layer = get_channel_layer()
     for tenant in Tenant.objects.all():
@@ -31,3 +44,67 @@ def write_break_even_snapshots():
         async_to_sync(channel_layer.group_send)(
             f"break_even_{tenant.pk}", {"type": "break_even_update"}
         )
+
+
+@shared_task
+def process_invoice_postings(batch_size=BATCH_SIZE):
+    """Proknjiži sve PENDING zahtjeve iz reda, serija po seriju."""
+    processed = 0
+    while True:
+        count = process_pending_postings(batch_size)
+        if not count:
+            return processed
+        processed += count
+
+
+@shared_task
+def render_invoice_pdfs(year, month, tenant_id=None):
+    """PDF-ovi izdanih računa mjeseca u zip arhivi; vraća storage ime arhive."""
+    return invoice_pdf_batch(year, month, tenant_id)
+
+
+@shared_task
+def export_einvoices(year, month, tenant_id=None):
+    """UBL e-računi izdanih računa mjeseca u zip arhivi; vraća ime arhive i greške po računu."""
+    return einvoice_batch(year, month, tenant_id)
+
+
+@shared_task
+def send_outgoing_emails(batch_size=MAIL_BATCH_SIZE):
+    """Pošalji dospjele poruke iz izlaznog reda u serijama; vraća broj preuzetih poruka."""
+    return send_pending_emails(batch_size)
+
+
+@shared_task
+def send_dunning_reminders(tenant_id=None):
+    """Opomene za dospjele otvorene račune; slanje kreće nakon upisa u red."""
+    return queue_dunning(tenant_id)
+
+
+@shared_task
+def sync_bank_transactions():
+    """Sinkroniziraj sve aktivne bankovne račune od watermarka; vraća broj transakcija po IBAN-u."""
+    return sync_accounts()
+
+
+@shared_task
+def reconcile_bank_transactions(tenant_id=None):
+    """Uskladi neusklađene priljeve s otvorenim računima; vraća sažetak pokretanja."""
+    result = reconcile(tenant_id)
+    return {**result, "unallocated": str(result["unallocated"])}
+
+
+@shared_task
+def rebuild_cash_positions():
+    """Ponovno izgradi dnevne pozicije novca iz CashFlow zapisa; vraća broj redaka."""
+    return refresh_cash_positions()
+
+
+@shared_task
+def generate_financial_reports(years=None):
+    """Noćno osvježavanje FinancialReport (prošla i tekuća godina) za sve tenante i ukupno."""
+    if years is None:
+        year = timezone.localdate().year
+        years = [year - 1, year]
+    tenant_ids = [None, *Tenant.objects.values_list("pk", flat=True)]
+    return sum(generate_reports(year, tenant_id) for tenant_id in tenant_ids for year in years)
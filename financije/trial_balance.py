@@ -0,0 +1,215 @@
+"""Bruto bilanca (trial balance) po tenantu, razdoblju i diviziji.
+
+Bez filtra divizije cijela mjesečna razdoblja čitaju se iz AccountBalance, a
+stavke (JournalItem) se skeniraju samo za djelomične mjesece na rubovima
+razdoblja. S filtrom divizije računa se jednim grupiranim upitom nad stavkama.
+Zbirni retci (razredi, skupine) grupiraju se preko AccountClosure istim upitima.
+"""
+
+import calendar
+import datetime
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from financije.models.accounting import Account, JournalItem
+from financije.models.balances import AccountBalance
+from financije.models.periods import (
+    PeriodClosingBalance,
+    last_closed_period,
+    periods_after,
+    periods_before,
+    previous_month,
+    snapshot_totals,
+)
+
+ZERO = Decimal("0.00")
+
+ACCOUNT = "account_id"
+# Grupiranje po svakom pretku konta (uključujući sam konto) daje promet podstabla.
+ROLLUP = "account__ancestor_links__ancestor_id"
+
+HEADER = ["Konto", "Naziv", "Početno stanje", "Duguje", "Potražuje", "Saldo"]
+MONEY_COLUMNS = (2, 3, 4, 5)
+
+
+def _sum(expression, condition):
+    return Coalesce(
+        Sum(expression, filter=condition),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=18, decimal_places=2),
+    )
+
+
+def _month_start(date):
+    return date.replace(day=1)
+
+
+def _month_end(date):
+    return date.replace(day=calendar.monthrange(date.year, date.month)[1])
+
+
+def _store_totals(tenant, start, end, group=ACCOUNT, since=None):
+    """
+    Promet iz AccountBalance za mjesece do ``end``, podijeljen na prije/unutar razdoblja.
+
+    ``since`` je zaključeno razdoblje čija snimka već sadrži raniji promet.
+    """
+    balances = AccountBalance.objects.filter(~periods_after(end.year, end.month))
+    if tenant is not None:
+        balances = balances.filter(tenant=tenant)
+    if since is not None:
+        balances = balances.filter(periods_after(since.year, since.month))
+    opening = periods_before(start.year, start.month)
+    return (
+        balances.values(group)
+        .annotate(
+            opening=_sum(F("debit") - F("credit"), opening),
+            debit_sum=_sum("debit", ~opening),
+            credit_sum=_sum("credit", ~opening),
+        )
+        .order_by()
+    )
+
+
+def _item_totals(tenant, start, end, division=None, group=ACCOUNT):
+    """Isti oblik rezultata, izravno iz JournalItem (za cijelo razdoblje)."""
+    items = JournalItem.objects.filter(entry__date__lte=end)
+    if tenant is not None:
+        items = items.filter(entry__tenant=tenant)
+    if division:
+        items = items.filter(entry__division=division)
+    opening = Q(entry__date__lt=start)
+    return (
+        items.values(group)
+        .annotate(
+            opening=_sum(F("debit") - F("credit"), opening),
+            debit_sum=_sum("debit", ~opening),
+            credit_sum=_sum("credit", ~opening),
+        )
+        .order_by()
+    )
+
+
+def _edge_adjustments(tenant, start, end, group=ACCOUNT):
+    """
+    Korekcije mjesečnog prometa za djelomične mjesece na rubovima razdoblja.
+
+    ``head`` su stavke od prvog u mjesecu do dana prije ``start`` (pripadaju
+    početnom stanju), ``tail`` su stavke nakon ``end`` do kraja mjeseca.
+    """
+    if start.day == 1 and end == _month_end(end):
+        return {}
+    head = Q(entry__date__gte=_month_start(start), entry__date__lt=start)
+    tail = Q(entry__date__gt=end, entry__date__lte=_month_end(end))
+    items = JournalItem.objects.filter(head | tail)
+    if tenant is not None:
+        items = items.filter(entry__tenant=tenant)
+    rows = (
+        items.values(group)
+        .annotate(
+            head_debit=_sum("debit", head),
+            head_credit=_sum("credit", head),
+            tail_debit=_sum("debit", tail),
+            tail_credit=_sum("credit", tail),
+        )
+        .order_by()
+    )
+    return {row[group]: row for row in rows}
+
+
+def _snapshot_openings(snapshot, group):
+    """Neto saldo (duguje - potražuje) iz snimke, po kontu ili po pretku (rollup)."""
+    openings = {}
+    if snapshot is None:
+        return openings
+    if group == ACCOUNT:
+        for account_id, (debit, credit) in snapshot_totals(snapshot).items():
+            openings[account_id] = debit - credit
+        return openings
+    rows = (
+        PeriodClosingBalance.objects.filter(
+            tenant_id=snapshot.tenant_id, year=snapshot.year, month=snapshot.month
+        )
+        .values(group)
+        .annotate(net=_sum(F("debit") - F("credit"), Q()))
+        .order_by()
+    )
+    return {row[group]: row["net"] for row in rows}
+
+
+def trial_balance(tenant=None, start=None, end=None, division=None, rollup=False):
+    """
+    Izračunaj bruto bilancu za razdoblje ``[start, end]``.
+
+    Vraća listu rječnika po kontu (sortirano po broju konta) s ključevima
+    ``account``, ``opening``, ``debit``, ``credit`` i ``closing``; saldo je
+    uvijek duguje - potražuje. Uz ``rollup=True`` svaki konto sadrži promet
+    cijelog svog podstabla (zbroj razreda, skupine...).
+    """
+    end = end or datetime.date.today()
+    start = start or datetime.date(end.year, 1, 1)
+    group = ROLLUP if rollup else ACCOUNT
+
+    if division:
+        totals = {row[group]: row for row in _item_totals(tenant, start, end, division, group)}
+    else:
+        # Početno stanje: snimka zadnjeg zaključenog razdoblja + promet nakon nje.
+        snapshot = None
+        if tenant is not None:
+            snapshot = last_closed_period(
+                getattr(tenant, "pk", tenant), *previous_month(start.year, start.month)
+            )
+        totals = {row[group]: row for row in _store_totals(tenant, start, end, group, snapshot)}
+        for account_id, amount in _snapshot_openings(snapshot, group).items():
+            row = totals.setdefault(
+                account_id, {"opening": ZERO, "debit_sum": ZERO, "credit_sum": ZERO}
+            )
+            row["opening"] += amount
+        for account_id, adj in _edge_adjustments(tenant, start, end, group).items():
+            row = totals.get(account_id)
+            if row is None:
+                continue
+            head_net = adj["head_debit"] - adj["head_credit"]
+            row["opening"] += head_net
+            row["debit_sum"] -= adj["head_debit"] + adj["tail_debit"]
+            row["credit_sum"] -= adj["head_credit"] + adj["tail_credit"]
+
+    accounts = Account.objects.in_bulk(list(totals))
+    result = []
+    for account_id, row in totals.items():
+        if not (row["opening"] or row["debit_sum"] or row["credit_sum"]):
+            continue
+        result.append(
+            {
+                "account": accounts[account_id],
+                "opening": row["opening"],
+                "debit": row["debit_sum"],
+                "credit": row["credit_sum"],
+                "closing": row["opening"] + row["debit_sum"] - row["credit_sum"],
+            }
+        )
+    result.sort(key=lambda r: r["account"].number)
+    return result
+
+
+def trial_balance_rows(lines):
+    """Retci za CSV/XLSX izvoz (generator)."""
+    for line in lines:
+        yield [
+            line["account"].number,
+            line["account"].name,
+            line["opening"],
+            line["debit"],
+            line["credit"],
+            line["closing"],
+        ]
+
+
+def balances_as_of(tenant, as_of):
+    """Neto saldo (duguje - potražuje) po kontu na kraju dana ``as_of``."""
+    return {
+        line["account"].pk: line["closing"]
+        for line in trial_balance(tenant, start=as_of, end=as_of)
+    }
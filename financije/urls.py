@@ -13,6 +13,7 @@ router.register(r"overhead-categories", views.OverheadCategoryViewSet)
 router.register(r"monthly-overhead", views.MonthlyOverheadViewSet)
 router.register(r"budgets", views.BudgetViewSet)
 router.register(r"invoices", views.InvoiceViewSet)
+router.register(r"journal-entries", views.JournalEntryViewSet)
 router.register(r"monthly-overheads", views.MonthlyOverheadViewSet)
 router.register(r"audit-logs", views.AuditLogViewSet)
 router.register(r"salaries", views.SalaryViewSet)
@@ -70,6 +71,11 @@ urlpatterns = [
         name="bank_transaction_list",
     ),
     path("cash-flow/", views.CashFlowView.as_view(), name="cash_flow"),
+    path("trial-balance/", views.TrialBalanceView.as_view(), name="trial_balance"),
+    path("general-ledger/", views.GeneralLedgerView.as_view(), name="general_ledger"),
+    path("ira/", views.IraExportView.as_view(), name="ira_export"),
+    path("pdv/", views.VatReturnView.as_view(), name="vat_return"),
+    path("receivables-aging/", views.ReceivablesAgingView.as_view(), name="receivables_aging"),
     path(
         "tax-configurations/",
         views.TaxConfigurationListView.as_view(),
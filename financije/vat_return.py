@@ -0,0 +1,298 @@
+"""Obračun PDV-a (PDV obrazac) za tenanta i razdoblje.
+
+Sva polja obrasca računaju se s dva grupirana upita, neovisno o broju računa:
+
+* izlazni PDV iz rekapitulacije računa (``InvoiceVatBreakdown``) grupirane po
+  stopi i oznaci prijenosa porezne obveze;
+* pretporez iz prometa konta pretporeza (``AccountBalance``), po stopi ako su
+  zadana konta ``input_vat_<stopa>``, inače samo ukupno (polje III).
+
+Rezultat se drži u Django cacheu. Ključ sadrži verziju svakog mjeseca
+razdoblja; promjena računa ili prometa u mjesecu podiže njegovu verziju
+(nakon commita), pa se idući poziv ponovno računa. Obračun bez tenanta obuhvaća
+sve tenante; njegovu verziju mjeseca podiže promjena kod bilo kojeg tenanta.
+Popis dokumenata koji čine pojedino polje vraća ``vat_return_documents``
+(lijeni queryset).
+"""
+
+import datetime
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from financije import account_map
+from financije.models.accounting import JournalItem
+from financije.models.balances import AccountBalance, balances_changed
+from financije.models.invoice import Invoice, InvoiceVatBreakdown, invoices_changed
+
+ZERO = Decimal("0.00")
+CACHE_TIMEOUT = 60 * 60 * 24
+EXCLUDED_STATUSES = ("draft", "otkazano")
+GENERATION_KEY = "financije:vat_return:generation"
+
+REVERSE_CHARGE = "I.1"
+EXEMPT = "I.2"
+OUTPUT_FIELDS = {Decimal("5"): "II.1", Decimal("13"): "II.2", Decimal("25"): "II.3"}
+INPUT_FIELDS = {Decimal("5"): "III.1", Decimal("13"): "III.2", Decimal("25"): "III.3"}
+INPUT_TOTAL = "III"
+PAYABLE = "IV"
+
+FIELD_LABELS = {
+    REVERSE_CHARGE: _("Isporuke uz prijenos porezne obveze"),
+    EXEMPT: _("Oslobođene isporuke i isporuke po stopi 0 %"),
+    "II.1": _("Isporuke po stopi 5 %"),
+    "II.2": _("Isporuke po stopi 13 %"),
+    "II.3": _("Isporuke po stopi 25 %"),
+    INPUT_TOTAL: _("Pretporez - ukupno"),
+    "III.1": _("Pretporez po stopi 5 %"),
+    "III.2": _("Pretporez po stopi 13 %"),
+    "III.3": _("Pretporez po stopi 25 %"),
+    PAYABLE: _("Obveza PDV-a za uplatu (povrat)"),
+}
+
+
+def period_months(year, month, months=1):
+    """Mjeseci razdoblja kao ``[(godina, mjesec)]``; tromjesečni obveznici šalju ``months=3``."""
+    if not 1 <= month <= 12 or months < 1:
+        raise ValidationError(_("Neispravno razdoblje PDV obrasca."))
+    first = year * 12 + month - 1
+    return [(index // 12, index % 12 + 1) for index in range(first, first + months)]
+
+
+def period_bounds(year, month, months=1):
+    periods = period_months(year, month, months)
+    start = datetime.date(*periods[0], 1)
+    end_year, end_month = period_months(*periods[-1], 2)[1]
+    return start, datetime.date(end_year, end_month, 1) - datetime.timedelta(days=1)
+
+
+def _field_for_invoice(rate, reverse_charge):
+    if reverse_charge:
+        return REVERSE_CHARGE
+    if not rate:
+        return EXEMPT
+    return OUTPUT_FIELDS.get(rate, f"II ({rate.normalize():f} %)")
+
+
+def _is_output(code):
+    return code in OUTPUT_FIELDS.values() or code.startswith("II (")
+
+
+def _tenant_filter(queryset, tenant_id, field="tenant_id"):
+    """``tenant_id=None`` znači svi tenanti (kao aging, knjiga IRA i bruto bilanca)."""
+    return queryset if tenant_id is None else queryset.filter(**{field: tenant_id})
+
+
+def _period_invoices(start, end, tenant_id):
+    invoices = Invoice.objects.filter(issue_date__range=(start, end))
+    return _tenant_filter(invoices, tenant_id).exclude(status_fakture__in=EXCLUDED_STATUSES)
+
+
+def compute_vat_return(year, month, tenant=None, months=1):
+    """Izračunaj PDV obrazac bez cachea (dva upita + razrješavanje mape konta)."""
+    tenant_id = getattr(tenant, "pk", tenant)
+    start, end = period_bounds(year, month, months)
+    fields = {code: {"base": ZERO, "vat": ZERO} for code in FIELD_LABELS}
+
+    rows = (
+        InvoiceVatBreakdown.objects.filter(invoice__in=_period_invoices(start, end, tenant_id))
+        .values_list("rate", "invoice__reverse_charge")
+        .annotate(base=Sum("base"), vat=Sum("vat"))
+        .order_by()
+    )
+    for rate, reverse_charge, base, vat in rows:
+        field = fields.setdefault(
+            _field_for_invoice(rate, reverse_charge), {"base": ZERO, "vat": ZERO}
+        )
+        field["base"] += base
+        field["vat"] += vat
+
+    input_accounts = account_map.resolve(tenant_id).input_vat_accounts()
+    periods = Q()
+    for period_year, period_month in period_months(year, month, months):
+        periods |= Q(year=period_year, month=period_month)
+    balances = (
+        _tenant_filter(AccountBalance.objects.filter(periods), tenant_id)
+        .filter(account_id__in=input_accounts)
+        .values_list("account_id")
+        .annotate(debit=Sum("debit"), credit=Sum("credit"))
+        .order_by()
+    )
+    for account_id, debit, credit in balances:
+        vat = debit - credit
+        fields[INPUT_TOTAL]["vat"] += vat
+        code = INPUT_FIELDS.get(input_accounts[account_id])
+        if code:
+            fields[code]["vat"] += vat
+
+    output_vat = sum((value["vat"] for code, value in fields.items() if _is_output(code)), ZERO)
+    fields[PAYABLE]["vat"] = output_vat - fields[INPUT_TOTAL]["vat"]
+    return {
+        "tenant_id": tenant_id,
+        "start": start,
+        "end": end,
+        "fields": fields,
+        "output_vat": output_vat,
+        "input_vat": fields[INPUT_TOTAL]["vat"],
+        "payable": fields[PAYABLE]["vat"],
+    }
+
+
+# --- Cache po tenantu i razdoblju ---
+
+
+def _version_key(tenant_id, year, month):
+    return f"financije:vat_return:version:{tenant_id}:{year}:{month}"
+
+
+def _period_keys(tenant_id, year, month):
+    """Verzije koje promjena u mjesecu tenanta poništava: tenantova i ona svih tenanata."""
+    return {_version_key(tenant_id, year, month), _version_key(None, year, month)}
+
+
+def _versions(tenant_id, periods):
+    """Verzije mjeseci; nepostojeća verzija dobiva jedinstvenu početnu vrijednost."""
+    keys = [GENERATION_KEY] + [_version_key(tenant_id, y, m) for y, m in periods]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Vrijeme kao početak: izbačena verzija ne može vratiti stari rezultat.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_periods(periods):
+    """Poništi obračune koji uključuju ``(tenant_id, godina, mjesec)`` (nakon commita)."""
+    keys = set()
+    for tenant_id, year, month in periods:
+        keys |= _period_keys(tenant_id, year, month)
+    if keys:
+        transaction.on_commit(lambda: [_bump(key) for key in keys])
+
+
+def invalidate_all():
+    transaction.on_commit(lambda: _bump(GENERATION_KEY))
+
+
+def vat_return(year, month, tenant=None, months=1):
+    """
+    PDV obrazac za razdoblje: ``{"fields": {šifra: {"base", "vat"}}, "output_vat",
+    "input_vat", "payable", ...}``, iz cachea dok se razdoblje ne promijeni.
+    """
+    tenant_id = getattr(tenant, "pk", tenant)
+    versions = _versions(tenant_id, period_months(year, month, months))
+    key = "financije:vat_return:{}:{}:{}:{}:{}".format(
+        tenant_id, year, month, months, ".".join(map(str, versions))
+    )
+    result = cache.get(key)
+    if result is None:
+        result = compute_vat_return(year, month, tenant_id, months)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
+
+
+def vat_return_documents(year, month, field, tenant=None, months=1):
+    """
+    Dokumenti koji čine polje obrasca: računi (s osnovicom i PDV-om polja kao
+    anotacijama) za polja I i II, odnosno stavke temeljnica za polja III.
+    """
+    tenant_id = getattr(tenant, "pk", tenant)
+    start, end = period_bounds(year, month, months)
+    if field == INPUT_TOTAL or field in INPUT_FIELDS.values():
+        input_accounts = account_map.resolve(tenant_id).input_vat_accounts()
+        if field != INPUT_TOTAL:
+            rates = {rate for rate, code in INPUT_FIELDS.items() if code == field}
+            input_accounts = [a for a, rate in input_accounts.items() if rate in rates]
+        items = JournalItem.objects.filter(
+            account_id__in=input_accounts, entry__date__range=(start, end)
+        )
+        return (
+            _tenant_filter(items, tenant_id, "entry__tenant_id")
+            .select_related("entry", "account")
+            .order_by("entry__date", "pk")
+        )
+
+    if field == REVERSE_CHARGE:
+        condition = Q(reverse_charge=True)
+    elif field == EXEMPT:
+        condition = Q(reverse_charge=False, vat_breakdown__rate=0)
+    else:
+        rates = [rate for rate, code in OUTPUT_FIELDS.items() if code == field]
+        if not rates:
+            raise ValidationError(_("Nepoznato polje PDV obrasca '%(field)s'.") % {"field": field})
+        condition = Q(reverse_charge=False, vat_breakdown__rate__in=rates)
+    return (
+        _period_invoices(start, end, tenant_id)
+        .filter(condition)
+        .annotate(
+            field_base=Sum("vat_breakdown__base", filter=condition),
+            field_vat=Sum("vat_breakdown__vat", filter=condition),
+        )
+        .select_related("client")
+        .order_by("issue_date", "pk")
+    )
+
+
+# --- Poništavanje kod promjene računa i prometa ---
+
+
+def _invoice_period(tenant_id, date):
+    return (tenant_id, date.year, date.month)
+
+
+@receiver(pre_save, sender=Invoice)
+def remember_invoice_vat_period(sender, instance, raw=False, **kwargs):
+    instance._previous_vat_period = None
+    if instance.pk and not raw:
+        previous = Invoice.objects.filter(pk=instance.pk).values_list("tenant_id", "issue_date")
+        instance._previous_vat_period = previous.first()
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invalidate_on_invoice_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    periods = {_invoice_period(instance.tenant_id, instance.issue_date)}
+    previous = getattr(instance, "_previous_vat_period", None)
+    if previous:
+        periods.add(_invoice_period(*previous))
+    invalidate_periods(periods)
+
+
+@receiver(invoices_changed)
+def invalidate_on_invoices_changed(sender, invoice_ids, **kwargs):
+    invoice_ids = list(invoice_ids)
+
+    def invalidate():
+        periods = Invoice.objects.filter(pk__in=invoice_ids).values_list("tenant_id", "issue_date")
+        keys = set()
+        for period in periods:
+            keys |= _period_keys(*_invoice_period(*period))
+        for key in keys:
+            _bump(key)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(balances_changed)
+def invalidate_on_balances_changed(sender, keys, **kwargs):
+    if keys is None:
+        invalidate_all()
+    else:
+        invalidate_periods((tenant_id, year, month) for tenant_id, _account, year, month in keys)
@@ -1,9 +1,16 @@
+import logging
+
 from django.apps import apps
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.mail import send_mail
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.files.storage import default_storage
+from django.db.models import DecimalField, ExpressionWrapper, F, Prefetch
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.utils.dateparse import parse_date
+from django.utils.translation import gettext_lazy as _
 from django.views.generic import (
     CreateView,
     DetailView,  # Dodali UpdateView
@@ -13,9 +20,23 @@ from django.views.generic import (
 )
 
 # Dodajemo REST framework imports
-from rest_framework import viewsets
-
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from reports.ira_export import ira_response
+from tenants.models import Tenant
+
+from . import aging, cash_position
+from . import general_ledger as gl
+from . import trial_balance as tb
+from . import vat_return as pdv
+from .documents import invoice_pdf
+from .einvoice import einvoice_for
+from .exports import csv_response, xlsx_response
 from .forms import BudgetForm, InvoiceForm, OverheadForm
+from .invoice_import import import_invoices, invoices_from_csv
+from .mail import queue_email
 from .models import (
     AuditLog,
     BankTransaction,
@@ -24,7 +45,10 @@ from .models import (
     Debt,
     FinancialReport,
     Invoice,
+    InvoiceLine,
+    JournalEntry,
     MonthlyOverhead,
+    OutgoingEmail,
     Overhead,
     OverheadCategory,
     Salary,
@@ -33,6 +57,7 @@ from .models import (
     TaxConfiguration,
     VariablePayRule,
 )
+from .pagination import FinancijeCursorPagination
 
 # Add serializer imports
 from .serializers import (
@@ -42,6 +67,7 @@ from .serializers import (
     DebtSerializer,  # Dodano
     FinancialReportSerializer,  # Dodano
     InvoiceSerializer,
+    JournalEntrySerializer,
     MonthlyOverheadSerializer,  # Dodano
     OverheadCategorySerializer,  # Dodano
     SalaryAdditionSerializer,  # Dodano
@@ -50,6 +76,10 @@ from .serializers import (
     TaxSerializer,  # Dodano
     VariablePayRuleSerializer,  # Dodano
 )
+from .statement_files import FORMATS, StatementError, import_statement_file
+from .tasks import export_einvoices, render_invoice_pdfs
+
+logger = logging.getLogger(__name__)
 
 # ...existing code...
 
@@ -119,14 +149,17 @@ def generate_payment_order(request, invoice_id):
     # Ako je pak 'status_invoice' (ili 'approved'), podesite prema stvarnoj shemi:
     if hasattr(invoice, "status_fakture") and invoice.status_fakture == "odobreno":
         # Generiraj payment order
-        print(f"Payment order generated for invoice: {invoice.invoice_number}")
+        logger.info("Payment order generated for invoice: %s", invoice.invoice_number)
 
-        # Pošalji email
-        send_mail(
+        # Email ide u izlazni red i šalje se iz Celery workera nakon commita
+        queue_email(
+            invoice.client.email,
             "Payment Order Generated",
             f"A payment order for invoice {invoice.invoice_number} has been generated.",
-            "no-reply@erp-system.com",
-            [invoice.client.email],
+            from_email="no-reply@erp-system.com",
+            kind=OutgoingEmail.PAYMENT_ORDER,
+            invoice=invoice,
+            tenant_id=invoice.tenant_id,
         )
 
         # Log
@@ -178,67 +211,186 @@ definitions and undefined symbols have been cleaned up.
 # REST FRAMEWORK VIEWSETS (single definitions only)
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class FinancijeViewSetMixin:
+    """Kursor paginacija i ``?fields=a,b`` (sparse fieldset) za financije viewsetove."""
+
+    pagination_class = FinancijeCursorPagination
+
+    def requested_fields(self):
+        fields = self.request.query_params.get("fields", "") if self.request else ""
+        return [name.strip() for name in fields.split(",") if name.strip()] or None
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request is not None and self.request.method == "GET":
+            kwargs.setdefault("fields", self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class InvoiceViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = Invoice.objects.all()
     serializer_class = InvoiceSerializer
 
+    def get_queryset(self):
+        """Klijent u istom upitu, stavke (s iznosom iz baze) jednim upitom po stranici."""
+        invoices = Invoice.objects.select_related("client")
+        fields = self.requested_fields()
+        if fields is None or "lines" in fields:
+            lines = InvoiceLine.objects.annotate(
+                total=ExpressionWrapper(
+                    F("quantity") * F("unit_price"),
+                    output_field=DecimalField(max_digits=20, decimal_places=4),
+                )
+            ).order_by("pk")
+            invoices = invoices.prefetch_related(Prefetch("lines", queryset=lines))
+        return invoices
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        """Skupni uvoz: JSON lista računa ili CSV datoteka (``file``); greške po retku."""
+        upload = request.FILES.get("file")
+        if upload is not None:
+            rows = invoices_from_csv(line.decode("utf-8-sig") for line in upload)
+        else:
+            rows = request.data.get("invoices") if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list):
+            return Response(
+                {"detail": "Očekuje se lista računa ili CSV datoteka."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        result = import_invoices(rows, user=request.user, tenant=report_tenant(request))
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED if result["created"] else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=True, methods=["get"])
+    def pdf(self, request, pk=None):
+        """PDF računa; nepromijenjen račun vraća se iz storagea bez renderiranja."""
+        name = invoice_pdf(self.get_object().pk)
+        return FileResponse(default_storage.open(name), content_type="application/pdf")
+
+    @action(detail=False, methods=["get", "post"], url_path="pdf-batch")
+    def pdf_batch(self, request):
+        """POST {year, month}: pokreni zip PDF-ova mjeseca; GET ?task_id=: status ili arhiva."""
+        return self._batch(request, render_invoice_pdfs)
 
-class AuditLogViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["get"])
+    def ubl(self, request, pk=None):
+        """E-račun (UBL 2.1); nedostajuća obavezna polja vraćaju se kao greške."""
+        try:
+            document = einvoice_for(self.get_object().pk)
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return HttpResponse(document, content_type="application/xml")
+
+    @action(detail=False, methods=["get", "post"], url_path="ubl-batch")
+    def ubl_batch(self, request):
+        """POST {year, month}: pokreni zip e-računa mjeseca; GET ?task_id=: status ili arhiva."""
+        return self._batch(request, export_einvoices, result_name=lambda result: result["name"])
+
+    def _batch(self, request, task, result_name=lambda result: result):
+        if request.method == "POST":
+            try:
+                year, month = int(request.data["year"]), int(request.data["month"])
+            except (KeyError, TypeError, ValueError):
+                return Response(
+                    {"detail": "Parametri 'year' i 'month' su obavezni."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            tenant = report_tenant(request)
+            started = task.delay(year, month, getattr(tenant, "pk", None))
+            return Response({"task_id": started.id}, status=status.HTTP_202_ACCEPTED)
+        result = task.AsyncResult(request.query_params.get("task_id", ""))
+        if not result.successful():
+            return Response({"status": result.status})
+        return FileResponse(default_storage.open(result_name(result.result)), as_attachment=True)
+
+
+class JournalEntryViewSet(FinancijeViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    # Temeljnice se knjiže kroz ledger.post_entries; API ih samo izlistava.
+    queryset = (
+        JournalEntry.objects.with_totals()
+        .prefetch_related("journalitem_set")
+        .order_by("-date", "-id")
+    )
+    serializer_class = JournalEntrySerializer
+
+
+class AuditLogViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
 
 
-class SalaryViewSet(viewsets.ModelViewSet):
+class SalaryViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = Salary.objects.all()
     serializer_class = SalarySerializer
 
 
-class TaxViewSet(viewsets.ModelViewSet):
+class TaxViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = Tax.objects.all()
     serializer_class = TaxSerializer
 
 
-class SalaryAdditionViewSet(viewsets.ModelViewSet):
+class SalaryAdditionViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = SalaryAddition.objects.all()
     serializer_class = SalaryAdditionSerializer
 
 
-class TaxConfigurationViewSet(viewsets.ModelViewSet):
+class TaxConfigurationViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = TaxConfiguration.objects.all()
     serializer_class = TaxConfigurationSerializer
 
 
-class VariablePayRuleViewSet(viewsets.ModelViewSet):
+class VariablePayRuleViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = VariablePayRule.objects.all()
     serializer_class = VariablePayRuleSerializer
 
 
-class FinancialReportViewSet(viewsets.ModelViewSet):
+class FinancialReportViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = FinancialReport.objects.all()
     serializer_class = FinancialReportSerializer
 
 
-class DebtViewSet(viewsets.ModelViewSet):
+class DebtViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = Debt.objects.all()
     serializer_class = DebtSerializer
 
 
-class BankTransactionViewSet(viewsets.ModelViewSet):
+class BankTransactionViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = BankTransaction.objects.all()
     serializer_class = BankTransactionSerializer
 
+    @action(detail=False, methods=["post"], url_path="import")
+    def statement_import(self, request):
+        """Uvoz datoteke izvoda (``file``, camt.053 ili MT940); broj stavki po IBAN-u."""
+        upload = request.FILES.get("file")
+        fmt = request.data.get("format") or None
+        if upload is None or fmt not in (None, *FORMATS):
+            return Response(
+                {"detail": "Očekuje se datoteka izvoda (camt.053 ili MT940)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            counts = import_statement_file(upload, fmt)
+        except StatementError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"transactions": sum(counts.values()), "accounts": counts},
+            status=status.HTTP_201_CREATED,
+        )
+
 
-class OverheadCategoryViewSet(viewsets.ModelViewSet):
+class OverheadCategoryViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = OverheadCategory.objects.all()
     serializer_class = OverheadCategorySerializer
 
 
-class MonthlyOverheadViewSet(viewsets.ModelViewSet):
+class MonthlyOverheadViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = MonthlyOverhead.objects.all()
     serializer_class = MonthlyOverheadSerializer
 
 
-class BudgetViewSet(viewsets.ModelViewSet):
+class BudgetViewSet(FinancijeViewSetMixin, viewsets.ModelViewSet):
     queryset = Budget.objects.all()
     serializer_class = BudgetSerializer
 
@@ -291,10 +443,14 @@ def overhead_create(request):
 
 @login_required
 def dashboard(request):
+    tenant = report_tenant(request)
     context = {
         "total_invoices": Invoice.objects.count(),
         "unpaid_invoices": Invoice.objects.filter(paid=False).count(),
         "recent_transactions": BankTransaction.objects.all()[:5],
+        "receivables_aging": aging.aging_report(tenant)["totals"],
+        "cash_position": cash_position.cash_position_series(tenant),
+        "cash_forecast": cash_position.forecast(tenant),
     }
     return render(request, "financije/dashboard.html", context)
 
@@ -452,3 +608,141 @@ class TaxConfigurationListView(LoginRequiredMixin, ListView):
     template_name = "financije/tax_configuration_list.html"
     context_object_name = "tax_configurations"
     ordering = ["name"]
+
+
+def report_tenant(request):
+    """
+    Tenant iz middlewarea (request.tenant).
+
+    ``?tenant=<id>`` odabire drugog tenanta samo za osoblje (``is_staff``);
+    ostalim korisnicima vraća 403.
+    """
+    tenant = getattr(request, "tenant", None)
+    tenant = tenant if isinstance(tenant, Tenant) else None
+    tenant_id = request.GET.get("tenant")
+    if not tenant_id or (tenant is not None and str(tenant.pk) == tenant_id):
+        return tenant
+    if not request.user.is_staff:
+        raise PermissionDenied(_("Nemate pristup podacima drugog tenanta."))
+    return get_object_or_404(Tenant, pk=tenant_id)
+
+
+class TrialBalanceView(LoginRequiredMixin, View):
+    """Bruto bilanca: ?start=YYYY-MM-DD&end=YYYY-MM-DD&division=...&rollup=1&format=json|csv|xlsx"""
+
+    def get(self, request):
+        start = parse_date(request.GET.get("start", "") or "")
+        end = parse_date(request.GET.get("end", "") or "")
+        division = request.GET.get("division") or None
+        rollup = request.GET.get("rollup") == "1"
+        lines = tb.trial_balance(report_tenant(request), start, end, division, rollup=rollup)
+
+        export = request.GET.get("format", "json")
+        if export == "csv":
+            return csv_response("bruto_bilanca.csv", tb.HEADER, tb.trial_balance_rows(lines))
+        if export == "xlsx":
+            return xlsx_response(
+                "bruto_bilanca.xlsx",
+                tb.HEADER,
+                tb.trial_balance_rows(lines),
+                money_columns=tb.MONEY_COLUMNS,
+            )
+        return JsonResponse(
+            {
+                "lines": [
+                    dict(
+                        zip(
+                            ("number", "name", "opening", "debit", "credit", "closing"),
+                            row,
+                            strict=True,
+                        )
+                    )
+                    for row in tb.trial_balance_rows(lines)
+                ]
+            }
+        )
+
+
+class GeneralLedgerView(LoginRequiredMixin, View):
+    """Kartica konta: ?account=1200[&account_to=1299]&start=...&end=...&cursor=...&limit=500"""
+
+    def get(self, request):
+        number_from = request.GET.get("account")
+        if not number_from:
+            return JsonResponse({"error": "Parametar 'account' je obavezan."}, status=400)
+        try:
+            limit = int(request.GET.get("limit") or gl.PAGE_SIZE)
+            page = gl.general_ledger(
+                number_from,
+                request.GET.get("account_to") or None,
+                tenant=report_tenant(request),
+                start=parse_date(request.GET.get("start", "") or ""),
+                end=parse_date(request.GET.get("end", "") or ""),
+                cursor=request.GET.get("cursor") or None,
+                limit=limit,
+            )
+        except (ValueError, ValidationError) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse(page)
+
+
+class IraExportView(LoginRequiredMixin, View):
+    """Knjiga izlaznih računa: ?start=YYYY-MM-DD&end=YYYY-MM-DD&format=xlsx|csv"""
+
+    def get(self, request):
+        start = parse_date(request.GET.get("start", "") or "")
+        end = parse_date(request.GET.get("end", "") or "")
+        if start is None or end is None:
+            return JsonResponse({"error": "Parametri 'start' i 'end' su obavezni."}, status=400)
+        return ira_response(
+            start, end, tenant=report_tenant(request), export=request.GET.get("format", "xlsx")
+        )
+
+
+class VatReturnView(LoginRequiredMixin, View):
+    """PDV obrazac: ?year=2025&month=4[&months=3]; s &field=II.3 vraća dokumente polja."""
+
+    def get(self, request):
+        try:
+            year, month = int(request.GET["year"]), int(request.GET["month"])
+            months = int(request.GET.get("months") or 1)
+            field = request.GET.get("field")
+            tenant = report_tenant(request)
+            if not field:
+                return JsonResponse(pdv.vat_return(year, month, tenant, months))
+            documents = pdv.vat_return_documents(year, month, field, tenant, months)
+        except KeyError:
+            return JsonResponse({"error": "Parametri 'year' i 'month' su obavezni."}, status=400)
+        except (ValueError, ValidationError) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        if documents.model is Invoice:
+            values = (
+                "pk",
+                "invoice_number",
+                "issue_date",
+                "client__name",
+                "field_base",
+                "field_vat",
+            )
+        else:
+            values = ("pk", "entry_id", "entry__date", "entry__description", "debit", "credit")
+        return JsonResponse({"field": field, "documents": list(documents.values(*values))})
+
+
+class ReceivablesAgingView(LoginRequiredMixin, View):
+    """Starost potraživanja po klijentu: ?format=json|csv|xlsx (json ima i zbroj za widget)"""
+
+    def get(self, request):
+        report = aging.aging_report(report_tenant(request))
+        export = request.GET.get("format", "json")
+        filename = f"starost_potrazivanja_{report['date']:%Y%m%d}"
+        if export == "csv":
+            return csv_response(f"{filename}.csv", aging.HEADER, aging.aging_rows(report))
+        if export == "xlsx":
+            return xlsx_response(
+                f"{filename}.xlsx",
+                aging.HEADER,
+                aging.aging_rows(report),
+                money_columns=aging.MONEY_COLUMNS,
+            )
+        return JsonResponse(report)
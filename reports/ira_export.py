@@ -0,0 +1,86 @@
+"""Knjiga izlaznih računa (IRA) – streaming izvoz u CSV ili XLSX.
+
+Osnovica i PDV po stopi računaju se u bazi iz rekapitulacije PDV-a računa
+(``InvoiceVatBreakdown``, izvedena iz stavki), jednim grupiranim upitom.
+Retci se čitaju server-side kursorom (``iterator``) i odmah zapisuju: CSV se
+šalje kao StreamingHttpResponse, a XLSX se piše u ``constant_memory`` načinu u
+privremenu datoteku, pa memorija ne raste s brojem računa.
+"""
+
+from decimal import Decimal
+
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from financije.exports import csv_response, xlsx_response
+from financije.invoice_import import allowed_vat_rates
+from financije.models.invoice import Invoice
+from financije.vat_return import EXCLUDED_STATUSES
+
+ZERO = Decimal("0.00")
+CHUNK_SIZE = 2000
+
+
+def ira_rates():
+    """Stope s vlastitim stupcima, od najviše; 0 % ide u stupac oslobođeno."""
+    return sorted((rate for rate in allowed_vat_rates() if rate), reverse=True)
+
+
+def ira_header(rates):
+    header = ["Rb.", "Broj računa", "Datum", "Kupac", "OIB"]
+    for rate in rates:
+        header += [f"Osnovica {rate:f}%", f"PDV {rate:f}%"]
+    return header + ["Oslobođeno / 0%", "Ukupno"]
+
+
+def ira_money_columns(rates):
+    first = 5
+    return tuple(range(first, first + 2 * len(rates) + 2))
+
+
+def _rate_sum(field, condition):
+    return Coalesce(
+        Sum(f"vat_breakdown__{field}", filter=condition),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=16, decimal_places=2),
+    )
+
+
+def ira_queryset(start, end, tenant=None, rates=None):
+    """Izdani računi razdoblja (bez nacrta i otkazanih, kao obračun PDV-a) po stopama."""
+    rates = ira_rates() if rates is None else rates
+    invoices = Invoice.objects.filter(issue_date__range=(start, end)).exclude(
+        status_fakture__in=EXCLUDED_STATUSES
+    )
+    if tenant is not None:
+        invoices = invoices.filter(tenant=tenant)
+    annotations = {}
+    for index, rate in enumerate(rates):
+        condition = Q(vat_breakdown__rate=rate, reverse_charge=False)
+        annotations[f"base_{index}"] = _rate_sum("base", condition)
+        annotations[f"vat_{index}"] = _rate_sum("vat", condition)
+    # Prijenos porezne obveze: bez PDV-a, osnovica u stupcu oslobođeno / 0 %.
+    annotations["exempt"] = _rate_sum("base", Q(vat_breakdown__rate=0) | Q(reverse_charge=True))
+    fields = ["invoice_number", "issue_date", "client__name", "client__oib"]
+    return (
+        invoices.annotate(**annotations)
+        .order_by("issue_date", "pk")
+        .values_list(*fields, *annotations, "gross_amount")
+    )
+
+
+def ira_rows(start, end, tenant=None, rates=None):
+    """Retci knjige (generator), s rednim brojem; čita se u serijama server-side kursora."""
+    queryset = ira_queryset(start, end, tenant, rates)
+    for number, row in enumerate(queryset.iterator(chunk_size=CHUNK_SIZE), start=1):
+        yield [number, *row]
+
+
+def ira_response(start, end, tenant=None, export="xlsx"):
+    rates = ira_rates()
+    header = ira_header(rates)
+    rows = ira_rows(start, end, tenant, rates)
+    filename = f"ira_{start:%Y%m%d}_{end:%Y%m%d}"
+    if export == "csv":
+        return csv_response(f"{filename}.csv", header, rows)
+    return xlsx_response(f"{filename}.xlsx", header, rows, money_columns=ira_money_columns(rates))
@@ -0,0 +1,41 @@
+import pytest
+
+from client_app.models import ClientSupplier
+from financije.models import Account
+
+# Konta zadane mape uloga knjiženja (financije.account_map): kupci, prihodi, PDV.
+CHART_OF_ACCOUNTS = (("1200", "active"), ("4000", "income"), ("4700", "passive"))
+
+
+@pytest.fixture
+def make_client_supplier(db):
+    """Tvornica kupaca s popunjenim obaveznim poljima; argumenti mijenjaju zadane vrijednosti."""
+
+    def make(**fields):
+        values = {
+            "name": "Kupac",
+            "address": "Ulica 1",
+            "email": "kupac@example.com",
+            "phone": "01",
+            "oib": "12345678901",
+            "city": "Zagreb",
+            "postal_code": "10000",
+        }
+        values.update(fields)
+        return ClientSupplier.objects.create(**values)
+
+    return make
+
+
+@pytest.fixture
+def client_supplier(make_client_supplier):
+    return make_client_supplier()
+
+
+@pytest.fixture
+def chart_of_accounts(db):
+    """Konta zadane mape uloga: ``{broj: Account}``."""
+    return {
+        number: Account.objects.create(number=number, name=number, account_type=kind)
+        for number, kind in CHART_OF_ACCOUNTS
+    }
@@ -0,0 +1,61 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from financije.models import AccountBalance, JournalEntry, JournalItem
+from financije.models.balances import balance_drift
+from tenants.models import Tenant
+
+
+def _post(tenant, date, debit_account, credit_account, amount):
+    entry = JournalEntry.objects.create(tenant=tenant, date=date, description="Test")
+    JournalItem.objects.create(entry=entry, account=debit_account, debit=amount)
+    JournalItem.objects.create(entry=entry, account=credit_account, credit=amount)
+    return entry
+
+
+@pytest.mark.django_db
+def test_balance_store_follows_item_changes(chart_of_accounts):
+    kupci, prihodi = chart_of_accounts["1200"], chart_of_accounts["4000"]
+    tenant_a = Tenant.objects.create(name="A", domain="a.test")
+    tenant_b = Tenant.objects.create(name="B", domain="b.test")
+
+    _post(tenant_a, datetime.date(2025, 1, 10), kupci, prihodi, Decimal("100.00"))
+    entry = _post(tenant_b, datetime.date(2025, 2, 3), kupci, prihodi, Decimal("40.00"))
+
+    assert kupci.balance == Decimal("140.00")
+    assert prihodi.balance == Decimal("140.00")
+    assert kupci.get_balance(tenant=tenant_a) == Decimal("100.00")
+    assert kupci.get_balance(tenant=tenant_b) == Decimal("40.00")
+
+    item = entry.journalitem_set.get(account=kupci)
+    item.debit = Decimal("50.00")
+    item.save()
+    assert kupci.get_balance(tenant=tenant_b) == Decimal("50.00")
+
+    entry.date = datetime.date(2025, 3, 1)
+    entry.save()
+    assert AccountBalance.objects.get(tenant=tenant_b, account=kupci, month=3).debit == Decimal(
+        "50.00"
+    )
+    assert AccountBalance.objects.get(tenant=tenant_b, account=kupci, month=2).debit == Decimal(
+        "0.00"
+    )
+
+    entry.delete()
+    assert kupci.get_balance(tenant=tenant_b) == Decimal("0.00")
+    assert balance_drift() == {}
+
+
+@pytest.mark.django_db
+def test_rebuild_command_repairs_drift(chart_of_accounts):
+    kupci, prihodi = chart_of_accounts["1200"], chart_of_accounts["4000"]
+    _post(None, datetime.date(2025, 5, 5), kupci, prihodi, Decimal("10.00"))
+    AccountBalance.objects.filter(account=kupci).update(debit=Decimal("999.00"))
+
+    assert len(balance_drift()) == 1
+    call_command("rebuild_account_balances")
+    assert balance_drift() == {}
+    assert kupci.balance == Decimal("10.00")
@@ -0,0 +1,71 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from financije.ledger import LedgerEntry, post_entries
+from financije.models import Account, AccountClosure
+from financije.models.hierarchy import rebuild_account_closure
+from financije.trial_balance import trial_balance
+
+
+def _paths():
+    return set(
+        AccountClosure.objects.values_list("ancestor__number", "descendant__number", "depth")
+    )
+
+
+@pytest.mark.django_db
+def test_closure_follows_insert_move_and_delete():
+    razred4 = Account.objects.create(number="4", name="Razred 4", account_type="expense")
+    skupina = Account.objects.create(
+        number="40", name="Materijal", account_type="expense", parent_account=razred4
+    )
+    konto = Account.objects.create(
+        number="4000", name="Sirovine", account_type="expense", parent_account=skupina
+    )
+    assert ("4", "4000", 2) in _paths()
+
+    razred7 = Account.objects.create(number="7", name="Razred 7", account_type="expense")
+    skupina.parent_account = razred7
+    skupina.save()
+    assert ("4", "4000", 2) not in _paths()
+    assert ("7", "4000", 2) in _paths()
+
+    razred7.parent_account = konto
+    with pytest.raises(ValidationError):
+        razred7.save()
+
+    skupina.delete()
+    assert ("7", "4000", 1) not in _paths()
+    konto.refresh_from_db()
+    assert konto.parent_account is None
+
+    expected = _paths()
+    rebuild_account_closure()
+    assert _paths() == expected
+
+
+@pytest.mark.django_db
+def test_rolled_up_balances():
+    razred1 = Account.objects.create(number="1", name="Razred 1", account_type="active")
+    kupci = Account.objects.create(
+        number="1200", name="Kupci", account_type="active", parent_account=razred1
+    )
+    banka = Account.objects.create(
+        number="1000", name="Banka", account_type="active", parent_account=razred1
+    )
+    prihodi = Account.objects.create(number="7500", name="Prihodi", account_type="income")
+    post_entries(
+        [
+            LedgerEntry(datetime.date(2025, 1, 5), "a", [(kupci, 70, 0), (prihodi, 0, 70)]),
+            LedgerEntry(datetime.date(2025, 1, 9), "b", [(banka, 30, 0), (prihodi, 0, 30)]),
+        ]
+    )
+
+    assert razred1.get_rolled_up_balance() == Decimal("100.00")
+    lines = trial_balance(None, datetime.date(2025, 1, 1), datetime.date(2025, 1, 7), rollup=True)
+    by_number = {line["account"].number: line for line in lines}
+    assert by_number["1"]["debit"] == Decimal("70.00")
+    assert by_number["1200"]["debit"] == Decimal("70.00")
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from financije import account_map
+from financije.models import Account
+
+
+@pytest.fixture(autouse=True)
+def fresh_map():
+    account_map.invalidate()
+    yield
+    account_map.invalidate()
+
+
+@pytest.mark.django_db
+def test_resolve_is_cached_until_accounts_change(django_assert_num_queries, settings):
+    settings.FINANCIJE_ACCOUNT_MAP = {"vat_payable_13": "4713"}
+    kupci = Account.objects.create(number="1200", name="Kupci", account_type="active")
+    Account.objects.create(number="4000", name="Prihodi", account_type="income")
+    pdv = Account.objects.create(number="4700", name="PDV", account_type="passive")
+
+    accounts = account_map.resolve()
+    assert accounts[account_map.RECEIVABLES] == kupci.pk
+    assert accounts.vat_payable(Decimal("25.00")) == pdv.pk
+    assert accounts.vat_payable(Decimal("13.00")) == pdv.pk
+
+    with django_assert_num_queries(0):
+        for _ in range(1000):
+            account_map.resolve()
+
+    pdv13 = Account.objects.create(number="4713", name="PDV 13%", account_type="passive")
+    assert account_map.resolve().vat_payable(Decimal("13.00")) == pdv13.pk
+
+
+@pytest.mark.django_db
+def test_missing_role_raises_validation_error():
+    with pytest.raises(ValidationError):
+        account_map.resolve()[account_map.REVENUE]
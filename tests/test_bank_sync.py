@@ -0,0 +1,156 @@
+import json
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from financije import bank_sync
+from financije.models import BankSyncState, BankTransaction, CashFlow
+
+IBAN_A = "HR1210010051863000160"
+IBAN_B = "HR6523400091110123456"
+IBAN_C = "HR2824840081135101001"
+
+
+def tx(reference, amount, iban):
+    return {
+        "reference": reference,
+        "type": "priljev",
+        "amount": amount,
+        "description": f"Uplata {reference}",
+        "transaction_date": "2025-03-03",
+        "balance": "1000.005",
+        "iban": iban,
+    }
+
+
+# (IBAN, cursor) -> (transakcije, sljedeći cursor)
+PAGES = {
+    (IBAN_A, ""): ([tx("A1", 10, IBAN_A), tx("A2", 20, IBAN_A), tx("A3", 30, IBAN_A)], "a3"),
+    (IBAN_A, "a3"): ([tx("A4", 40, IBAN_A), tx("A2", 25, IBAN_A)], "a4"),
+    (IBAN_A, "a4"): ([], "a4"),
+    (IBAN_B, ""): ([tx("B1", 5.5, IBAN_B)], "b1"),
+    (IBAN_B, "b1"): ([], "b1"),
+    (IBAN_C, ""): (
+        [
+            tx("C1", 10, IBAN_C),
+            {**tx("C2", 20, IBAN_C), "transaction_date": None},
+            {**tx("C3", "x", IBAN_C)},
+            {**tx("C4", 5, IBAN_C), "type": None},
+            tx("C5", 30, IBAN_C),
+        ],
+        "c5",
+    ),
+    (IBAN_C, "c5"): ([], "c5"),
+}
+
+
+@pytest.fixture
+def bank():
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            key = (query["iban"][0], query.get("cursor", [""])[0])
+            requests_seen.append(key)
+            if key not in PAGES:
+                self.send_error(404)
+                return
+            transactions, cursor = PAGES[key]
+            body = json.dumps(transactions).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header(bank_sync.NEXT_CURSOR_HEADER, cursor)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.requests_seen = requests_seen
+    server.url = f"http://127.0.0.1:{server.server_port}/statements"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_iter_json_array_across_chunk_boundaries():
+    text = json.dumps([{"a": 1.25, "b": "x]"}, {"c": [1, 2]}, {}])
+    chunks = [text[i : i + 3] for i in range(0, len(text), 3)]
+    assert list(bank_sync.iter_json_array(chunks)) == [
+        {"a": Decimal("1.25"), "b": "x]"},
+        {"c": [1, 2]},
+        {},
+    ]
+    with pytest.raises(ValueError):
+        list(bank_sync.iter_json_array(['[{"a": 1}']))
+
+
+@pytest.mark.django_db
+def test_upsert_without_bank_name_keeps_the_stored_one():
+    known = {**tx("A1", 10, IBAN_A), "bank_name": "Banka d.d."}
+    bank_sync.upsert_transactions([bank_sync.transaction_fields(known)])
+
+    statement = {**tx("A1", 12, IBAN_A), "description": None}
+    assert bank_sync.upsert_transactions([bank_sync.transaction_fields(statement)]) == 1
+    stored = BankTransaction.objects.get(referenca="A1")
+    assert (stored.bank_name, stored.opis, stored.iznos) == ("Banka d.d.", "", Decimal("12.00"))
+    long_description = {**tx("A2", 1, IBAN_A), "description": "x" * 300}
+    assert len(bank_sync.transaction_fields(long_description)["opis"]) == 255
+
+
+@pytest.mark.django_db
+def test_accounts_sync_from_watermark(bank):
+    states = [
+        BankSyncState.objects.create(bank_account_number=iban, api_url=bank.url)
+        for iban in (IBAN_A, IBAN_B)
+    ]
+    assert bank_sync.sync_accounts(batch_size=2) == {IBAN_A: 5, IBAN_B: 1}
+
+    assert BankTransaction.objects.count() == 5
+    a2 = BankTransaction.objects.get(referenca="A2")
+    assert (a2.iznos, a2.saldo) == (Decimal("25.00"), Decimal("1000.01"))
+    assert CashFlow.objects.count() == 5
+    assert CashFlow.objects.get(bank_transaction=a2).iznos == Decimal("25.00")
+    assert CashFlow.objects.get(bank_transaction__referenca="B1").iznos == Decimal("5.50")
+    for state in states:
+        state.refresh_from_db()
+        assert state.last_synced_at is not None and state.last_error == ""
+    assert [s.cursor for s in states] == ["a4", "b1"]
+
+    bank.requests_seen.clear()
+    assert bank_sync.sync_accounts() == {IBAN_A: 0, IBAN_B: 0}
+    assert sorted(bank.requests_seen) == [(IBAN_A, "a4"), (IBAN_B, "b1")]
+
+
+@pytest.mark.django_db
+def test_malformed_items_are_skipped_without_stalling_the_watermark(bank):
+    state = BankSyncState.objects.create(bank_account_number=IBAN_C, api_url=bank.url)
+    assert bank_sync.sync_accounts() == {IBAN_C: 2}
+
+    assert sorted(BankTransaction.objects.values_list("referenca", flat=True)) == ["C1", "C5"]
+    state.refresh_from_db()
+    assert state.cursor == "c5" and state.last_synced_at is not None
+    assert state.last_error.startswith("Preskočeno neispravnih transakcija: 3.")
+    assert "C2" in state.last_error and "transaction_date" in state.last_error
+
+    with pytest.raises(bank_sync.TransactionError, match="amount"):
+        bank_sync.transaction_fields({**tx("C6", 1, IBAN_C), "amount": None})
+
+
+@pytest.mark.django_db
+def test_failing_account_does_not_stop_others(bank):
+    BankSyncState.objects.create(bank_account_number=IBAN_B, api_url=bank.url)
+    broken = BankSyncState.objects.create(
+        bank_account_number="HR0000000000000000000", api_url=bank.url
+    )
+    assert bank_sync.sync_accounts() == {IBAN_B: 1, "HR0000000000000000000": 0}
+    broken.refresh_from_db()
+    assert broken.last_error and broken.last_synced_at is None
@@ -0,0 +1,67 @@
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from financije.models import BankTransaction, CashFlow
+from financije.models.bank import derive_cash_flows
+
+
+def bank_transaction(reference, amount="10.00"):
+    return BankTransaction(
+        referenca=reference,
+        tip_transakcije="priljev",
+        iznos=Decimal(amount),
+        opis=f"Uplata {reference}",
+        datum=datetime.date(2025, 3, 3),
+        saldo=Decimal("0.00"),
+        bank_account_number="HR1210010051863000160",
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_insert_then_idempotent_derivation():
+    BankTransaction.objects.bulk_create(bank_transaction(f"T{n}") for n in range(50))
+    assert CashFlow.objects.count() == 0  # bulk_create ne šalje post_save
+
+    with CaptureQueriesContext(connection) as queries:
+        assert derive_cash_flows(batch_size=20) == 50
+    assert len(queries) < 15  # serije, ne upit po transakciji
+    assert derive_cash_flows() == 0
+    assert CashFlow.objects.count() == 50
+    cash_flow = CashFlow.objects.get(bank_transaction__referenca="T7")
+    assert (cash_flow.iznos, cash_flow.opis) == (Decimal("10.00"), "Uplata T7")
+
+
+@pytest.mark.django_db
+def test_derivation_resyncs_changed_transactions():
+    BankTransaction.objects.bulk_create([bank_transaction("T1"), bank_transaction("T2")])
+    derive_cash_flows()
+    BankTransaction.objects.filter(referenca="T1").update(iznos=Decimal("12.50"))
+
+    assert derive_cash_flows(BankTransaction.objects.filter(referenca="T1")) == 0
+    assert CashFlow.objects.get(bank_transaction__referenca="T1").iznos == Decimal("12.50")
+    assert CashFlow.objects.get(bank_transaction__referenca="T2").iznos == Decimal("10.00")
+
+
+@pytest.mark.django_db
+def test_single_edit_keeps_cash_flow_in_sync():
+    single = bank_transaction("T1")
+    single.save()
+    assert CashFlow.objects.get().iznos == Decimal("10.00")
+    single.iznos = Decimal("11.00")
+    single.save()
+    assert CashFlow.objects.get().iznos == Decimal("11.00")
+
+
+@pytest.mark.django_db
+def test_backfill_command():
+    BankTransaction.objects.bulk_create([bank_transaction("T1"), bank_transaction("T2")])
+    out = io.StringIO()
+    call_command("derive_cash_flows", stdout=out)
+    assert "Created 2 CashFlow row(s)" in out.getvalue()
+    assert CashFlow.objects.count() == 2
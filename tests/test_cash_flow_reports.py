@@ -0,0 +1,109 @@
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from financije.cash_flow_reports import cash_flow_totals, generate_reports
+from financije.models import BankSyncState, BankTransaction, CashFlow, FinancialReport
+from tenants.models import Tenant
+
+IBAN = "HR1210010051863000160"
+
+
+def cash_flow(kind, amount, day, bank_transaction=None):
+    return CashFlow(
+        tip_transakcije=kind,
+        iznos=Decimal(amount),
+        opis="Promet",
+        datum=day,
+        bank_transaction=bank_transaction,
+    )
+
+
+def report(period, year=2025, month=None, kvartal=None, tenant=None):
+    return FinancialReport.objects.get(
+        tenant=tenant, period=period, year=year, month=month, kvartal=kvartal
+    )
+
+
+@pytest.mark.django_db
+def test_all_periods_of_year_upserted():
+    CashFlow.objects.bulk_create(
+        [
+            cash_flow("priljev", "100.00", datetime.date(2025, 1, 15)),
+            cash_flow("odljev", "40.00", datetime.date(2025, 2, 1)),
+            cash_flow("priljev", "10.00", datetime.date(2025, 5, 31)),
+            cash_flow("priljev", "999.00", datetime.date(2024, 12, 31)),
+        ]
+    )
+    assert generate_reports(2025) == 17
+    assert FinancialReport.objects.filter(year=2025).count() == 17
+    january = report("monthly", month=1)
+    assert (january.priljev_ukupno, january.odljev_ukupno) == (Decimal("100.00"), Decimal("0"))
+    assert report("quarterly", kvartal=1).neto_cash_flow == Decimal("60.00")
+    assert report("quarterly", kvartal=2).priljev_ukupno == Decimal("10.00")
+    assert report("yearly").neto_cash_flow == Decimal("70.00")
+
+    CashFlow.objects.bulk_create([cash_flow("odljev", "5.00", datetime.date(2025, 12, 1))])
+    generate_reports(2025)
+    assert FinancialReport.objects.filter(year=2025).count() == 17  # ažurirano na mjestu
+    assert report("yearly").neto_cash_flow == Decimal("65.00")
+
+
+@pytest.mark.django_db
+def test_one_aggregate_query_per_year():
+    CashFlow.objects.bulk_create(
+        cash_flow("priljev", "1.00", datetime.date(year, 6, 1)) for year in range(2021, 2026)
+    )
+    out = io.StringIO()
+    with CaptureQueriesContext(connection) as queries:
+        call_command("generate_financial_reports", from_year=2021, to_year=2025, stdout=out)
+    assert "Wrote 85 FinancialReport row(s)" in out.getvalue()
+    cash_flow_queries = [q for q in queries if "financije_cashflow" in q["sql"]]
+    assert len(cash_flow_queries) == 5
+
+
+@pytest.mark.django_db
+def test_tenant_reports_and_single_report():
+    tenant = Tenant.objects.create(name="Tvrtka", domain="tvrtka.example.com")
+    BankSyncState.objects.create(
+        bank_account_number=IBAN, api_url="https://banka.example.com", tenant=tenant
+    )
+    transaction = BankTransaction.objects.create(
+        referenca="T1",
+        tip_transakcije="priljev",
+        iznos=Decimal("25.00"),
+        opis="Uplata",
+        datum=datetime.date(2025, 3, 3),
+        saldo=Decimal("25.00"),
+        bank_account_number=IBAN,
+    )
+    CashFlow.objects.bulk_create([cash_flow("priljev", "7.00", datetime.date(2025, 3, 4))])
+
+    generate_reports(2025, tenant)
+    assert report("monthly", month=3, tenant=tenant).priljev_ukupno == Decimal("25.00")
+    assert transaction.cashflow_entry.iznos == Decimal("25.00")
+
+    single = FinancialReport.objects.create(period="quarterly", year=2025, kvartal=1)
+    single.generiraj_izvještaj()
+    assert single.priljev_ukupno == Decimal("32.00")
+
+
+@pytest.mark.django_db
+def test_periods_without_months_are_zero():
+    CashFlow.objects.bulk_create([cash_flow("priljev", "10.00", datetime.date(2024, 9, 1))])
+    periods = [("monthly", None, None), ("quarterly", None, 9), ("monthly", 9, None)]
+    assert cash_flow_totals(2024, None, periods) == {
+        ("monthly", None, None): (Decimal("0.00"), Decimal("0.00")),
+        ("quarterly", None, 9): (Decimal("0.00"), Decimal("0.00")),
+        ("monthly", 9, None): (Decimal("10.00"), Decimal("0.00")),
+    }
+    for fields in ({"period": "monthly"}, {"period": "quarterly"}):
+        report = FinancialReport.objects.create(year=2024, **fields)
+        report.generiraj_izvještaj()
+        report.refresh_from_db()
+        assert (report.priljev_ukupno, report.neto_cash_flow) == (Decimal("0"), Decimal("0"))
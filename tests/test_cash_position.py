@@ -0,0 +1,130 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from financije.cash_position import cash_position_series, forecast, refresh_cash_positions
+from financije.models import (
+    Account,
+    AccountBalance,
+    BankTransaction,
+    CashPosition,
+    Invoice,
+    MonthlyOverhead,
+)
+from financije.models.bank import derive_cash_flows
+from financije.models.overhead import OverheadCategory
+
+IBAN = "HR1210010051863000160"
+DAY = datetime.date(2025, 3, 3)
+
+
+def bank_transaction(reference, amount, day, kind="priljev"):
+    return BankTransaction(
+        referenca=reference,
+        tip_transakcije=kind,
+        iznos=Decimal(amount),
+        opis=f"Promet {reference}",
+        datum=day,
+        saldo=Decimal("0.00"),
+        bank_account_number=IBAN,
+    )
+
+
+def positions():
+    return list(CashPosition.objects.values_list("date", "inflow", "outflow", "balance"))
+
+
+@pytest.mark.django_db
+def test_positions_follow_bulk_derivation(django_capture_on_commit_callbacks):
+    BankTransaction.objects.bulk_create(
+        [
+            bank_transaction("T1", "100.00", DAY),
+            bank_transaction("T2", "30.00", DAY, "odljev"),
+            bank_transaction("T3", "50.00", DAY + datetime.timedelta(days=2)),
+        ]
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        derive_cash_flows()
+    assert positions() == [
+        (DAY, Decimal("100.00"), Decimal("30.00"), Decimal("70.00")),
+        (DAY + datetime.timedelta(days=2), Decimal("50.00"), Decimal("0.00"), Decimal("120.00")),
+    ]
+
+    # Izmjena starijeg dana preračunava samo dane od njega nadalje.
+    late = bank_transaction("T4", "5.00", DAY + datetime.timedelta(days=1), "odljev")
+    with django_capture_on_commit_callbacks(execute=True):
+        late.save()
+    assert [balance for *_rest, balance in positions()] == [
+        Decimal("70.00"),
+        Decimal("65.00"),
+        Decimal("115.00"),
+    ]
+    late.datum = DAY + datetime.timedelta(days=5)
+    with django_capture_on_commit_callbacks(execute=True):
+        late.save()
+    assert [(date.day, balance) for date, *_rest, balance in positions()] == [
+        (3, Decimal("70.00")),
+        (5, Decimal("120.00")),
+        (8, Decimal("115.00")),
+    ]
+    assert refresh_cash_positions() == 3  # ponovna izgradnja daje isto
+    assert [balance for *_rest, balance in positions()][-1] == Decimal("115.00")
+
+
+@pytest.mark.django_db
+def test_year_series_in_one_query():
+    start = datetime.date(2024, 3, 4)
+    BankTransaction.objects.bulk_create(
+        [
+            bank_transaction("T0", "40.00", start - datetime.timedelta(days=10)),
+            bank_transaction("T1", "10.00", start + datetime.timedelta(days=1)),
+        ]
+    )
+    derive_cash_flows()
+    refresh_cash_positions()
+
+    with CaptureQueriesContext(connection) as queries:
+        series = cash_position_series(start=start, end=DAY)
+    assert len(queries) == 1
+    assert len(series["date"]) == 365
+    assert series["balance"][:3] == [Decimal("40.00"), Decimal("50.00"), Decimal("50.00")]
+    assert series["inflow"][:2] == [Decimal("0.00"), Decimal("10.00")]
+    assert series["balance"][-1] == Decimal("50.00")
+
+
+@pytest.mark.django_db
+def test_forecast(monkeypatch, settings, client_supplier):
+    monkeypatch.setattr("financije.models.posting._schedule_processing", lambda: None)
+    settings.FINANCIJE_PAYABLES_TERM_DAYS = 10
+    suppliers = Account.objects.create(number="2200", name="Dobavljači", account_type="passive")
+    AccountBalance.objects.create(
+        account=suppliers, year=2025, month=2, debit=Decimal("4.00"), credit=Decimal("5.00")
+    )
+    BankTransaction.objects.bulk_create([bank_transaction("T1", "1000.00", DAY)])
+    derive_cash_flows()
+    refresh_cash_positions()
+    Invoice.objects.bulk_create(
+        Invoice(
+            client=client_supplier,
+            invoice_number=f"{n}/1/2025",
+            issue_date=DAY,
+            due_date=DAY + datetime.timedelta(days=days),
+            status_fakture="odobreno",
+            gross_amount=Decimal("200.00"),
+        )
+        for n, days in enumerate((-20, 5, 120))
+    )
+    category = OverheadCategory.objects.create(name="Najam")
+    MonthlyOverhead.objects.create(year=2025, month=2, category=category, amount=Decimal("300.00"))
+
+    result = forecast(today=DAY)
+    assert len(result["date"]) == 90
+    assert result["inflow"][0] == result["inflow"][5] == Decimal("200.00")  # dospjelo: danas
+    assert sum(result["inflow"]) == Decimal("400.00")  # treći račun je izvan horizonta
+    assert result["outflow"][:2] == [Decimal("0.10"), Decimal("0.10")]
+    assert result["outflow"][29] == Decimal("300.00")  # 1. travnja
+    assert result["balance"][0] == Decimal("1199.90")
+    assert result["balance"][-1] == Decimal("1000.00") + 400 - 1 - 600
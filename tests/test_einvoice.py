@@ -0,0 +1,114 @@
+import datetime
+import zipfile
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+
+from financije import einvoice
+from financije.documents import invoices_for_documents
+from financije.models import Invoice, InvoiceLine
+
+SELLER = {
+    "name": "Prodavatelj d.o.o.",
+    "oib": "98765432109",
+    "address": "Glavna 2",
+    "city": "Split",
+    "postal_code": "21000",
+    "country": "HR",
+}
+
+
+@pytest.fixture(autouse=True)
+def seller(settings, tmp_path):
+    settings.FINANCIJE_SELLER = SELLER
+    settings.MEDIA_ROOT = tmp_path
+    cache.clear()
+
+
+@pytest.fixture
+def client_supplier(make_client_supplier):
+    return make_client_supplier(name="Kupac & sin")
+
+
+def make_invoice(client, number, lines, reverse_charge=False):
+    invoice = Invoice.objects.create(
+        client=client,
+        invoice_number=number,
+        issue_date=datetime.date(2025, 3, 3),
+        due_date=datetime.date(2025, 3, 18),
+        status_fakture="odobreno",
+        reverse_charge=reverse_charge,
+    )
+    for price, rate in lines:
+        InvoiceLine.objects.create(
+            invoice=invoice,
+            description="Usluga",
+            quantity=2,
+            unit_price=Decimal(price),
+            tax_rate=Decimal(rate),
+        )
+    return invoices_for_documents().get(pk=invoice.pk)
+
+
+@pytest.mark.django_db
+def test_einvoice_validates_against_shipped_schema(client_supplier):
+    etree = pytest.importorskip("lxml.etree")
+    schema = etree.XMLSchema(etree.parse(str(einvoice.SCHEMA_PATH)))
+    ns = {"cbc": einvoice.CBC_NS, "cac": einvoice.CAC_NS}
+
+    invoice = make_invoice(client_supplier, "1/1/2025", [("50.00", "25"), ("10.00", "0")])
+    document = etree.fromstring(einvoice.einvoice_xml(invoice))
+    schema.assertValid(document)
+    assert document.findtext("cbc:ID", namespaces=ns) == "1/1/2025"
+    assert document.findtext("cac:TaxTotal/cbc:TaxAmount", namespaces=ns) == "25.00"
+    assert document.findtext("cac:LegalMonetaryTotal/cbc:PayableAmount", namespaces=ns) == "145.00"
+    assert (
+        document.findtext("cac:AccountingCustomerParty//cbc:RegistrationName", namespaces=ns)
+        == "Kupac & sin"
+    )
+    categories = document.findall("cac:TaxTotal/cac:TaxSubtotal/cac:TaxCategory", namespaces=ns)
+    assert [c.findtext("cbc:ID", namespaces=ns) for c in categories] == ["E", "S"]
+
+    reverse = make_invoice(client_supplier, "2/1/2025", [("50.00", "0")], reverse_charge=True)
+    schema.assertValid(etree.fromstring(einvoice.einvoice_xml(reverse)))
+
+
+@pytest.mark.django_db
+def test_missing_required_fields_are_reported_up_front(client_supplier, settings):
+    settings.FINANCIJE_SELLER = {"name": "Prodavatelj d.o.o."}
+    client_supplier.country = "Atlantida"
+    client_supplier.save()
+    invoice = make_invoice(client_supplier, "1/1/2025", [])
+    with pytest.raises(ValidationError) as e:
+        einvoice.einvoice_xml(invoice)
+    codes = [message.split(":")[0] for message in e.value.messages]
+    assert codes == ["BT-31", "BT-55", "BG-25"]
+
+
+@pytest.mark.django_db
+def test_einvoice_cached_until_invoice_changes(client_supplier, monkeypatch):
+    invoice = make_invoice(client_supplier, "1/1/2025", [("50.00", "25")])
+    first = einvoice.einvoice_xml(invoice)
+
+    monkeypatch.setattr(einvoice.UblWriter, "invoice", None)  # drugi poziv ne smije pisati XML
+    assert einvoice.einvoice_xml(invoices_for_documents().get(pk=invoice.pk)) == first
+    monkeypatch.undo()
+
+    InvoiceLine.objects.create(
+        invoice=invoice, description="Dodatak", quantity=1, unit_price=Decimal("5.00")
+    )
+    assert einvoice.einvoice_xml(invoices_for_documents().get(pk=invoice.pk)) != first
+
+
+@pytest.mark.django_db
+def test_einvoice_batch_zip(client_supplier):
+    make_invoice(client_supplier, "1/1/2025", [("50.00", "25")])
+    make_invoice(client_supplier, "2/1/2025", [])
+    result = einvoice.einvoice_batch(2025, 3)
+    assert result["created"] == 1
+    assert [error["invoice_number"] for error in result["errors"]] == ["2/1/2025"]
+    with default_storage.open(result["name"]) as stored, zipfile.ZipFile(stored) as archive:
+        assert archive.namelist() == ["1_1_2025.xml"]
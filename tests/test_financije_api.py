@@ -0,0 +1,61 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from financije.models import Invoice, InvoiceLine
+from financije.views import InvoiceViewSet
+
+invoice_list = InvoiceViewSet.as_view({"get": "list"})
+
+
+@pytest.fixture
+def invoices(client_supplier):
+    invoices = Invoice.objects.bulk_create(
+        Invoice(
+            client=client_supplier,
+            invoice_number=f"{n}/1/2025",
+            issue_date=datetime.date(2025, 3, 3),
+            due_date=datetime.date(2025, 3, 18),
+        )
+        for n in range(1, 131)
+    )
+    InvoiceLine.objects.bulk_create(
+        InvoiceLine(invoice=invoice, description="Usluga", quantity=3, unit_price=Decimal("2.50"))
+        for invoice in invoices
+    )
+    return invoices
+
+
+def get(admin_user, url):
+    request = APIRequestFactory().get(url)
+    force_authenticate(request, user=admin_user)
+    response = invoice_list(request)
+    assert response.status_code == 200
+    return response.data
+
+
+@pytest.mark.django_db
+def test_invoice_list_is_paginated_with_constant_queries(
+    invoices, admin_user, django_assert_num_queries
+):
+    with django_assert_num_queries(2):
+        first = get(admin_user, "/invoices/")
+    assert len(first["results"]) == 100
+    assert first["results"][0]["invoice_number"] == "130/1/2025"
+    assert first["results"][0]["client_name"] == "Kupac"
+    assert first["results"][0]["lines"][0]["total"] == "7.5000"
+
+    with django_assert_num_queries(2):
+        second = get(admin_user, first["next"])
+    assert len(second["results"]) == 30
+    assert second["next"] is None
+
+
+@pytest.mark.django_db
+def test_invoice_list_sparse_fieldset(invoices, admin_user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        data = get(admin_user, "/invoices/?fields=id,invoice_number&page_size=5")
+    assert len(data["results"]) == 5
+    assert set(data["results"][0]) == {"id", "invoice_number"}
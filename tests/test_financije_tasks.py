@@ -0,0 +1,14 @@
+import importlib
+
+from celery import current_app
+
+
+def test_tasks_module_imports_and_registers_tasks():
+    tasks = importlib.import_module("financije.tasks")
+    names = {name for name in current_app.tasks if name.startswith("financije.tasks.")}
+    assert {
+        "financije.tasks.write_break_even_snapshots",
+        "financije.tasks.process_invoice_postings",
+        "financije.tasks.reconcile_bank_transactions",
+    } <= names
+    assert callable(tasks.write_break_even_snapshots)
@@ -0,0 +1,61 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from financije.general_ledger import general_ledger
+from financije.ledger import LedgerEntry, post_entries
+from financije.models import Account
+from financije.models.periods import close_period
+from tenants.models import Tenant
+
+
+@pytest.fixture
+def card():
+    kupci = Account.objects.create(number="1200", name="Kupci", account_type="active")
+    kupci_eu = Account.objects.create(number="1210", name="Kupci EU", account_type="active")
+    prihodi = Account.objects.create(number="7500", name="Prihodi", account_type="income")
+    tenant = Tenant.objects.create(name="A", domain="a.test")
+    post_entries(
+        LedgerEntry(date, "Test", [(account, amount, 0), (prihodi, 0, amount)], tenant=tenant)
+        for date, account, amount in (
+            (datetime.date(2024, 12, 20), kupci, "100.00"),
+            (datetime.date(2025, 1, 5), kupci, "10.00"),
+            (datetime.date(2025, 1, 5), kupci_eu, "20.00"),
+            (datetime.date(2025, 1, 9), kupci, "30.00"),
+            (datetime.date(2025, 2, 1), kupci, "40.00"),
+        )
+    )
+    return tenant
+
+
+@pytest.mark.django_db
+def test_running_balance_starts_from_closed_period(card):
+    close_period(2024, 12, tenant=card)
+    page = general_ledger("1200", tenant=card, start=datetime.date(2025, 1, 1))
+    assert page["opening"] == Decimal("100.00")
+    assert [line["balance"] for line in page["lines"]] == [
+        Decimal("110.00"),
+        Decimal("140.00"),
+        Decimal("180.00"),
+    ]
+    assert page["next"] is None
+
+
+@pytest.mark.django_db
+def test_keyset_pages_carry_running_balance(card):
+    first = general_ledger("1200", "1299", tenant=card, start=datetime.date(2025, 1, 1), limit=2)
+    assert [line["account"] for line in first["lines"]] == ["1200", "1210"]
+    second = general_ledger(
+        "1200", "1299", tenant=card, start=datetime.date(2025, 1, 1), cursor=first["next"], limit=2
+    )
+    assert second["opening"] == Decimal("130.00")
+    assert [line["balance"] for line in second["lines"]] == [Decimal("160.00"), Decimal("200.00")]
+    assert second["next"] is None
+
+
+@pytest.mark.django_db
+def test_tampered_cursor_is_rejected(card):
+    with pytest.raises(ValidationError):
+        general_ledger("1200", tenant=card, cursor="not-a-cursor")
@@ -0,0 +1,83 @@
+import datetime
+import zipfile
+from decimal import Decimal
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from financije import documents
+from financije.models import Invoice, InvoiceLine
+
+
+def weasyprint_available():
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):  # bez sistemskih biblioteka (pango) uvoz baca OSError
+        return False
+    return True
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def invoice(client_supplier):
+    invoice = Invoice.objects.create(
+        client=client_supplier,
+        invoice_number="1/1/2025",
+        issue_date=datetime.date(2025, 3, 3),
+        due_date=datetime.date(2025, 3, 18),
+        status_fakture="odobreno",
+    )
+    InvoiceLine.objects.create(
+        invoice=invoice, description="Usluga", quantity=2, unit_price=Decimal("50.00")
+    )
+    return invoice
+
+
+def context_of(invoice):
+    return documents.invoice_context(documents.invoices_for_documents().get(pk=invoice.pk))
+
+
+def store_pdf(invoice, content=b"%PDF-1.7 cached"):
+    digest = documents.content_hash(documents.INVOICE_TEMPLATE, context_of(invoice))
+    name = documents.document_name(digest)
+    default_storage.save(name, ContentFile(content))
+    return name
+
+
+@pytest.mark.django_db
+def test_content_hash_follows_invoice_data(invoice):
+    first = documents.content_hash(documents.INVOICE_TEMPLATE, context_of(invoice))
+    assert documents.content_hash(documents.INVOICE_TEMPLATE, context_of(invoice)) == first
+    InvoiceLine.objects.create(
+        invoice=invoice, description="Dodatak", quantity=1, unit_price=Decimal("5.00")
+    )
+    assert documents.content_hash(documents.INVOICE_TEMPLATE, context_of(invoice)) != first
+
+
+@pytest.mark.django_db
+def test_cached_pdf_is_returned_without_rendering(invoice, django_assert_num_queries):
+    name = store_pdf(invoice)
+    with django_assert_num_queries(3):
+        assert documents.invoice_pdf(invoice.pk) == name
+
+
+@pytest.mark.django_db
+def test_batch_zip_contains_month_invoices(invoice):
+    store_pdf(invoice)
+    name = documents.invoice_pdf_batch(2025, 3)
+    with default_storage.open(name) as stored, zipfile.ZipFile(stored) as archive:
+        assert archive.namelist() == ["1_1_2025.pdf"]
+        assert archive.read("1_1_2025.pdf") == b"%PDF-1.7 cached"
+
+
+@pytest.mark.skipif(not weasyprint_available(), reason="WeasyPrint nije dostupan")
+@pytest.mark.django_db
+def test_render_invoice_pdf(invoice):
+    name = documents.invoice_pdf(invoice.pk)
+    with default_storage.open(name) as pdf:
+        assert pdf.read(4) == b"%PDF"
@@ -0,0 +1,90 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from financije.invoice_import import import_invoices, invoices_from_csv
+from financije.models import CashFlow, Invoice, InvoicePosting
+
+
+def invoice_row(number, **overrides):
+    row = {
+        "invoice_number": number,
+        "client_oib": "12345678901",
+        "issue_date": "2025-04-01",
+        "due_date": "2025-04-15",
+        "lines": [{"description": "Usluga", "quantity": "2", "unit_price": "50.00"}],
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.django_db
+def test_invalid_rows_are_reported_without_aborting(client_supplier, django_assert_max_num_queries):
+    rows = [
+        invoice_row("U-1", status="odobreno"),
+        invoice_row("U-2", client_oib="99999999999"),
+        invoice_row(
+            "U-3",
+            lines=[{"description": "X", "quantity": "1", "unit_price": "1", "tax_rate": "22"}],
+        ),
+        invoice_row("U-1"),
+        invoice_row("U-5", due_date="2025-03-01"),
+        invoice_row("U-6"),
+    ]
+    with django_assert_max_num_queries(20):
+        result = import_invoices(rows)
+
+    assert result["created"] == 2
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4, 5]
+    assert Invoice.objects.get(invoice_number="U-1").gross_amount == Decimal("125.00")
+    assert CashFlow.objects.filter(iznos=Decimal("100.00")).count() == 2  # osnovica
+    assert InvoicePosting.objects.get().invoice.invoice_number == "U-1"
+
+
+@pytest.mark.django_db
+def test_malformed_rows_and_lines_are_row_errors(client_supplier):
+    rows = [
+        "U-1",
+        invoice_row("U-2", lines=["Usluga"]),
+        invoice_row("U-3", lines="Usluga"),
+        invoice_row("U-4"),
+    ]
+    result = import_invoices(rows)
+    assert result["created"] == 1
+    assert [(error["row"], error["errors"]) for error in result["errors"]] == [
+        (1, ["Redak nije račun."]),
+        (2, ["Neispravna stavka računa."]),
+        (3, ["Stavke računa moraju biti lista."]),
+    ]
+
+
+@pytest.mark.django_db
+def test_csv_rows_are_grouped_into_invoices(client_supplier, tmp_path):
+    path = tmp_path / "racuni.csv"
+    path.write_text(
+        "invoice_number;client_oib;issue_date;due_date;description;quantity;unit_price;tax_rate\n"
+        "C-1;12345678901;2025-04-01;2025-04-15;A;1;100,00;25\n"
+        "C-1;12345678901;2025-04-01;2025-04-15;B;1;10,00;13\n"
+        "C-2;12345678901;2025-04-02;2025-04-16;A;1;10,00;0\n",
+        encoding="utf-8",
+    )
+    with path.open(encoding="utf-8") as fh:
+        assert [len(row["lines"]) for row in invoices_from_csv(fh)] == [2, 1]
+
+    out = io.StringIO()
+    call_command("import_invoices", str(path), stdout=out)
+    assert "Imported 2 invoice(s)" in out.getvalue()
+    assert Invoice.objects.get(invoice_number="C-1").vat_amount == Decimal("26.30")
+
+
+@pytest.mark.django_db
+def test_unnumbered_rows_get_a_reserved_block(client_supplier):
+    result = import_invoices([invoice_row(""), invoice_row("", series="POS2/1"), invoice_row("")])
+    assert result == {"created": 3, "errors": []}
+    assert sorted(Invoice.objects.values_list("invoice_number", flat=True)) == [
+        "1/1/1/2025",
+        "1/POS2/1/2025",
+        "2/1/1/2025",
+    ]
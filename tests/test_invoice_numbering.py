@@ -0,0 +1,80 @@
+import datetime
+import threading
+
+import pytest
+from django.db import OperationalError, connection, transaction
+from django.db.transaction import TransactionManagementError
+
+from financije.models import Invoice, InvoiceSequence
+from financije.models.numbering import allocate_invoice_numbers
+from tenants.models import Tenant
+
+
+def new_invoice(client, **kwargs):
+    return Invoice.objects.create(
+        client=client,
+        issue_date=datetime.date(2025, 4, 1),
+        due_date=datetime.date(2025, 4, 15),
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test_numbers_are_sequential_per_tenant_and_series(client_supplier):
+    tenant = Tenant.objects.create(name="A", domain="a.test")
+    assert new_invoice(client_supplier).invoice_number == "1/1/1/2025"
+    assert new_invoice(client_supplier).invoice_number == "2/1/1/2025"
+    assert new_invoice(client_supplier, number_series="POS2/1").invoice_number == "1/POS2/1/2025"
+    assert new_invoice(client_supplier, tenant=tenant).invoice_number == "1/1/1/2025"
+
+
+@pytest.mark.django_db
+def test_rollback_leaves_no_gap(client_supplier):
+    new_invoice(client_supplier)
+    with pytest.raises(RuntimeError), transaction.atomic():
+        new_invoice(client_supplier)
+        raise RuntimeError
+    assert new_invoice(client_supplier).invoice_number == "2/1/1/2025"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_block_reservation_and_transaction_guard():
+    with transaction.atomic():
+        assert list(allocate_invoice_numbers(2025, count=3)) == [1, 2, 3]
+        assert list(allocate_invoice_numbers(2025, count=2)) == [4, 5]
+    with pytest.raises(TransactionManagementError):
+        allocate_invoice_numbers(2025)  # izvan transakcije bi rollback ostavio rupu
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_allocation_is_gap_free():
+    allocated, lock = [], threading.Lock()
+
+    def worker(index):
+        try:
+            for attempt in range(40):
+                done = False
+                while not done:
+                    try:
+                        with transaction.atomic():
+                            numbers = list(allocate_invoice_numbers(2025, count=1 + attempt % 3))
+                            if attempt % 5 == 4:
+                                raise RuntimeError  # rollback mora vratiti brojeve
+                        with lock:
+                            allocated.extend(numbers)
+                        done = True
+                    except RuntimeError:
+                        done = True
+                    except OperationalError:
+                        pass  # SQLite: tablica zaključana, ponovi (PostgreSQL čeka na lock retka)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(allocated) == list(range(1, len(allocated) + 1))
+    assert InvoiceSequence.objects.get().last_number == len(allocated)
@@ -0,0 +1,115 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from financije import account_map
+from financije.models import Account, Invoice, InvoiceLine, InvoicePosting, JournalEntry
+from financije.posting import process_pending_postings
+from financije.services import InvoiceService
+from tenants.models import Tenant
+
+
+@pytest.fixture
+def invoice(chart_of_accounts, client_supplier):
+    invoice = Invoice.objects.create(
+        client=client_supplier,
+        invoice_number="R-1",
+        issue_date=datetime.date(2025, 4, 1),
+        due_date=datetime.date(2025, 4, 15),
+    )
+    InvoiceLine.objects.create(
+        invoice=invoice, description="Usluga", quantity=2, unit_price=Decimal("50.00")
+    )
+    return invoice
+
+
+@pytest.mark.django_db
+def test_approval_only_records_intent(invoice):
+    InvoiceService.approve_invoices(Invoice.objects.all())
+    posting = InvoicePosting.objects.get()
+    assert (posting.version, posting.status) == (1, InvoicePosting.PENDING)
+    assert not JournalEntry.objects.exists()
+
+
+@pytest.mark.django_db
+def test_each_version_is_posted_once(invoice, chart_of_accounts):
+    InvoiceService.approve_invoices(Invoice.objects.all())
+    process_pending_postings()
+    assert process_pending_postings() == 0
+
+    invoice.refresh_from_db()
+    invoice.paid = True
+    invoice.save()  # sadržaj knjiženja se ne mijenja
+    process_pending_postings()
+
+    assert JournalEntry.objects.count() == 1
+    assert list(InvoicePosting.objects.order_by("version").values_list("status", flat=True)) == [
+        InvoicePosting.POSTED,
+        InvoicePosting.SKIPPED,
+    ]
+    assert chart_of_accounts["1200"].balance == Decimal("125.00")
+
+
+@pytest.mark.django_db
+def test_changed_invoice_is_reversed_and_reposted(invoice, chart_of_accounts):
+    InvoiceService.approve_invoices(Invoice.objects.all())
+    process_pending_postings()
+
+    InvoiceLine.objects.create(
+        invoice=invoice, description="Dodatno", quantity=1, unit_price=Decimal("100.00")
+    )
+    line = invoice.lines.get(description="Usluga")
+    line.quantity = 1
+    line.save()
+    assert process_pending_postings() == 2  # starija PENDING verzija se preskače
+
+    first, stale, latest = InvoicePosting.objects.order_by("version")
+    assert first.status == InvoicePosting.REVERSED and first.reversal_entry_id
+    assert stale.status == InvoicePosting.SKIPPED
+    assert latest.status == InvoicePosting.POSTED
+    assert JournalEntry.objects.count() == 3
+    assert chart_of_accounts["1200"].balance == Decimal("187.50")
+    assert chart_of_accounts["4000"].balance == Decimal("150.00")
+
+
+@pytest.mark.django_db
+def test_cancelled_invoice_is_reversed(invoice, chart_of_accounts):
+    InvoiceService.approve_invoices(Invoice.objects.all())
+    process_pending_postings()
+
+    invoice.refresh_from_db()
+    invoice.status_fakture = "otkazano"
+    invoice.save()
+    process_pending_postings()
+
+    assert InvoicePosting.objects.get(version=1).status == InvoicePosting.REVERSED
+    assert chart_of_accounts["1200"].balance == Decimal("0.00")
+    assert chart_of_accounts["4700"].balance == Decimal("0.00")
+
+
+@pytest.mark.django_db
+def test_queue_posts_each_tenant_with_its_account_map(chart_of_accounts, client_supplier, settings):
+    tenant_a = Tenant.objects.create(name="A", domain="a.test")
+    tenant_b = Tenant.objects.create(name="B", domain="b.test")
+    settings.FINANCIJE_TENANT_ACCOUNT_MAP = {tenant_b.pk: {"receivables": "1210"}}
+    kupci_b = Account.objects.create(number="1210", name="Kupci B", account_type="active")
+    account_map.invalidate()
+    for number, tenant in (("R-1", tenant_a), ("R-2", tenant_b)):
+        invoice = Invoice.objects.create(
+            tenant=tenant,
+            client=client_supplier,
+            invoice_number=number,
+            issue_date=datetime.date(2025, 4, 1),
+            due_date=datetime.date(2025, 4, 15),
+        )
+        InvoiceLine.objects.create(
+            invoice=invoice, description="Usluga", quantity=1, unit_price=Decimal("100.00")
+        )
+
+    InvoiceService.approve_invoices(Invoice.objects.all())
+    assert process_pending_postings() == 2
+
+    assert chart_of_accounts["1200"].get_balance(tenant=tenant_a) == Decimal("125.00")
+    assert chart_of_accounts["1200"].get_balance(tenant=tenant_b) == Decimal("0.00")
+    assert kupci_b.get_balance(tenant=tenant_b) == Decimal("125.00")
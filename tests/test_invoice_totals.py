@@ -0,0 +1,95 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.db.models import Sum
+
+from financije.models import FinancialReports, Invoice, InvoiceLine
+
+
+@pytest.fixture
+def invoice(client_supplier):
+    return Invoice.objects.create(
+        client=client_supplier,
+        invoice_number="R-1",
+        issue_date=datetime.date(2025, 4, 1),
+        due_date=datetime.date(2025, 4, 15),
+    )
+
+
+def totals(invoice):
+    invoice.refresh_from_db()
+    return invoice.net_amount, invoice.vat_amount, invoice.gross_amount
+
+
+@pytest.mark.django_db
+def test_totals_follow_line_changes(invoice):
+    line = InvoiceLine.objects.create(
+        invoice=invoice, description="A", quantity=2, unit_price=Decimal("50.00")
+    )
+    InvoiceLine.objects.create(
+        invoice=invoice,
+        description="B",
+        quantity=1,
+        unit_price=Decimal("10.00"),
+        tax_rate=Decimal("13.00"),
+    )
+    assert totals(invoice) == (Decimal("110.00"), Decimal("26.30"), Decimal("136.30"))
+    assert list(invoice.vat_breakdown.values_list("rate", "base", "vat")) == [
+        (Decimal("13.00"), Decimal("10.00"), Decimal("1.30")),
+        (Decimal("25.00"), Decimal("100.00"), Decimal("25.00")),
+    ]
+
+    line.delete()
+    assert totals(invoice) == (Decimal("10.00"), Decimal("1.30"), Decimal("11.30"))
+
+
+@pytest.mark.django_db
+def test_bulk_paths_keep_totals_in_sync(invoice):
+    InvoiceLine.objects.bulk_create(
+        [
+            InvoiceLine(invoice=invoice, description=str(i), quantity=1, unit_price=Decimal("10"))
+            for i in range(3)
+        ]
+    )
+    assert totals(invoice)[0] == Decimal("30.00")
+
+    InvoiceLine.objects.filter(invoice=invoice).update(quantity=2)
+    assert totals(invoice) == (Decimal("60.00"), Decimal("15.00"), Decimal("75.00"))
+
+    InvoiceLine.objects.filter(invoice=invoice).delete()
+    assert totals(invoice) == (Decimal("0.00"), Decimal("0.00"), Decimal("0.00"))
+    assert not invoice.vat_breakdown.exists()
+
+
+@pytest.mark.django_db
+def test_moving_lines_recalculates_both_invoices(invoice):
+    other = Invoice.objects.create(
+        client=invoice.client,
+        invoice_number="R-2",
+        issue_date=invoice.issue_date,
+        due_date=invoice.due_date,
+    )
+    InvoiceLine.objects.create(
+        invoice=invoice, description="A", quantity=2, unit_price=Decimal("50.00")
+    )
+
+    InvoiceLine.objects.filter(invoice=invoice).update(invoice=other)
+    assert totals(invoice) == (Decimal("0.00"), Decimal("0.00"), Decimal("0.00"))
+    assert totals(other) == (Decimal("100.00"), Decimal("25.00"), Decimal("125.00"))
+    assert list(other.vat_breakdown.values_list("rate", "base", "vat")) == [
+        (Decimal("25.00"), Decimal("100.00"), Decimal("25.00")),
+    ]
+
+    InvoiceLine.objects.filter(invoice=other).update(invoice_id=invoice.pk)
+    assert totals(invoice)[2] == Decimal("125.00")
+    assert totals(other)[2] == Decimal("0.00")
+
+
+@pytest.mark.django_db
+def test_reports_sum_stored_totals(invoice):
+    InvoiceLine.objects.create(
+        invoice=invoice, description="A", quantity=3, unit_price=Decimal("33.33")
+    )
+    assert Invoice.objects.aggregate(total=Sum("gross_amount"))["total"] == Decimal("124.99")
+    assert FinancialReports.profit_and_loss_report(2025, 4)["income"] == Decimal("99.99")
@@ -0,0 +1,62 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from financije.models import Invoice, InvoiceLine
+from reports.ira_export import ira_header, ira_rates, ira_response, ira_rows
+
+
+@pytest.fixture
+def invoices(client_supplier):
+    for day, status, lines in (
+        (2, "odobreno", [("100.00", "25"), ("10.00", "13"), ("5.00", "0")]),
+        (3, "draft", [("999.00", "25")]),
+        (4, "otkazano", [("500.00", "25")]),
+        (1, "odobreno", [("40.00", "5")]),
+    ):
+        invoice = Invoice.objects.create(
+            client=client_supplier,
+            issue_date=datetime.date(2025, 4, day),
+            due_date=datetime.date(2025, 4, 30),
+            status_fakture=status,
+        )
+        for price, rate in lines:
+            InvoiceLine.objects.create(
+                invoice=invoice,
+                description="Usluga",
+                quantity=1,
+                unit_price=Decimal(price),
+                tax_rate=Decimal(rate),
+            )
+
+
+@pytest.mark.django_db
+def test_ira_rows_have_vat_per_rate_columns(invoices, django_assert_num_queries):
+    start, end = datetime.date(2025, 4, 1), datetime.date(2025, 4, 30)
+    header = ira_header(ira_rates())
+    with django_assert_num_queries(1):
+        rows = [dict(zip(header, row, strict=True)) for row in ira_rows(start, end)]
+
+    assert [row["Rb."] for row in rows] == [1, 2]
+    assert rows[0]["Osnovica 5%"] == Decimal("40.00")
+    second = rows[1]
+    assert (second["Osnovica 25%"], second["PDV 25%"]) == (Decimal("100.00"), Decimal("25.00"))
+    assert (second["Osnovica 13%"], second["PDV 13%"]) == (Decimal("10.00"), Decimal("1.30"))
+    assert second["Oslobođeno / 0%"] == Decimal("5.00")
+    assert second["Ukupno"] == Decimal("141.30")
+
+
+@pytest.mark.django_db
+def test_ira_csv_and_xlsx_responses(invoices):
+    import openpyxl
+
+    start, end = datetime.date(2025, 4, 1), datetime.date(2025, 4, 30)
+    csv_content = b"".join(ira_response(start, end, export="csv").streaming_content)
+    assert csv_content.decode("utf-8").count("\n") == 3
+
+    response = ira_response(start, end, export="xlsx")
+    path = response.file_to_stream
+    sheet = openpyxl.load_workbook(path).active
+    assert sheet.max_row == 3
+    assert sheet.cell(row=3, column=sheet.max_column).value == pytest.approx(141.30)
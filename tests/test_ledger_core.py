@@ -0,0 +1,189 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from financije import account_map
+from financije.aging import open_invoices
+from financije.ledger import LedgerEntry, post_entries, post_invoices
+from financije.models import Account, Invoice, InvoiceLine, JournalEntry, JournalItem
+from financije.models.balances import balance_drift
+from financije.posting import process_pending_postings
+from financije.services import InvoiceService
+from financije.vat_return import compute_vat_return
+from reports.ira_export import ira_header, ira_rates, ira_rows
+from tenants.models import Tenant
+
+
+@pytest.mark.django_db
+def test_unbalanced_batch_writes_nothing(chart_of_accounts):
+    good = LedgerEntry(
+        datetime.date(2025, 1, 1),
+        "ok",
+        [(chart_of_accounts["1200"], "10.00", 0), (chart_of_accounts["4000"], 0, "10.00")],
+    )
+    bad = LedgerEntry(
+        datetime.date(2025, 1, 1),
+        "bad",
+        [(chart_of_accounts["1200"], "10.00", 0), (chart_of_accounts["4000"], 0, "9.99")],
+    )
+    with pytest.raises(ValidationError):
+        post_entries([good, bad])
+    assert not JournalEntry.objects.exists()
+
+
+@pytest.mark.django_db
+def test_batch_posting_uses_constant_queries(chart_of_accounts, django_assert_max_num_queries):
+    entries = [
+        LedgerEntry(
+            datetime.date(2025, 3, 1 + i % 28),
+            f"Temeljnica {i}",
+            [(chart_of_accounts["1200"], "12.50", 0), (chart_of_accounts["4000"], 0, "12.50")],
+        )
+        for i in range(300)
+    ]
+    with django_assert_max_num_queries(20):
+        post_entries(entries)
+
+    assert JournalItem.objects.count() == 600
+    assert chart_of_accounts["1200"].balance == Decimal("3750.00")
+    assert balance_drift() == {}
+
+
+@pytest.mark.django_db
+def test_approve_invoices_posts_through_ledger(chart_of_accounts, client_supplier):
+    for number in ("R-1", "R-2"):
+        invoice = Invoice.objects.create(
+            client=client_supplier,
+            invoice_number=number,
+            issue_date=datetime.date(2025, 4, 1),
+            due_date=datetime.date(2025, 4, 15),
+        )
+        InvoiceLine.objects.create(
+            invoice=invoice, description="Usluga", quantity=2, unit_price=Decimal("50.00")
+        )
+
+    assert InvoiceService.approve_invoices(Invoice.objects.all()) == 2
+    assert InvoiceService.approve_invoices(Invoice.objects.all()) == 0
+    assert not JournalEntry.objects.exists()  # odobrenje samo stavlja račune u red
+    assert process_pending_postings() == 2
+
+    assert JournalEntry.objects.count() == 2
+    assert chart_of_accounts["1200"].balance == Decimal("250.00")
+    assert chart_of_accounts["4000"].balance == Decimal("200.00")
+    assert chart_of_accounts["4700"].balance == Decimal("50.00")
+
+
+@pytest.mark.django_db
+def test_reverse_charge_invoice_carries_no_vat(chart_of_accounts, client_supplier):
+    invoice = Invoice.objects.create(
+        client=client_supplier,
+        invoice_number="R-1",
+        issue_date=datetime.date(2025, 4, 1),
+        due_date=datetime.date(2025, 4, 15),
+        reverse_charge=True,
+    )
+    InvoiceLine.objects.create(
+        invoice=invoice, description="Usluga", quantity=2, unit_price=Decimal("50.00")
+    )
+    invoice.refresh_from_db()
+    assert (invoice.net_amount, invoice.vat_amount, invoice.gross_amount) == (
+        Decimal("100.00"),
+        Decimal("0.00"),
+        Decimal("100.00"),
+    )
+    assert list(invoice.vat_breakdown.values_list("rate", "base", "vat")) == [
+        (Decimal("25.00"), Decimal("100.00"), Decimal("0.00"))
+    ]
+
+    InvoiceService.approve_invoices(Invoice.objects.all())
+    process_pending_postings()
+    assert chart_of_accounts["1200"].balance == Decimal("100.00")
+    assert chart_of_accounts["4000"].balance == Decimal("100.00")
+    assert chart_of_accounts["4700"].balance == Decimal("0.00")
+
+    start, end = datetime.date(2025, 4, 1), datetime.date(2025, 4, 30)
+    header = ira_header(ira_rates())
+    (row,) = [dict(zip(header, row, strict=True)) for row in ira_rows(start, end)]
+    assert (row["Osnovica 25%"], row["PDV 25%"]) == (Decimal("0.00"), Decimal("0.00"))
+    assert (row["Oslobođeno / 0%"], row["Ukupno"]) == (Decimal("100.00"), Decimal("100.00"))
+    assert open_invoices().get().outstanding == Decimal("100.00")
+    vat_return = compute_vat_return(2025, 4)
+    assert vat_return["fields"]["I.1"]["base"] == Decimal("100.00")
+    assert vat_return["output_vat"] == Decimal("0.00")
+
+    invoice.reverse_charge = False
+    invoice.save()
+    assert (invoice.vat_amount, invoice.gross_amount) == (Decimal("25.00"), Decimal("125.00"))
+
+
+@pytest.mark.django_db
+def test_post_invoices_uses_each_tenants_account_map(chart_of_accounts, client_supplier, settings):
+    tenant_a = Tenant.objects.create(name="A", domain="a.test")
+    tenant_b = Tenant.objects.create(name="B", domain="b.test")
+    settings.FINANCIJE_TENANT_ACCOUNT_MAP = {tenant_b.pk: {"revenue": "4010"}}
+    prihodi_b = Account.objects.create(number="4010", name="Prihodi B", account_type="income")
+    account_map.invalidate()
+    for number, tenant in (("R-1", tenant_a), ("R-2", tenant_b)):
+        invoice = Invoice.objects.create(
+            tenant=tenant,
+            client=client_supplier,
+            invoice_number=number,
+            issue_date=datetime.date(2025, 4, 1),
+            due_date=datetime.date(2025, 4, 15),
+        )
+        InvoiceLine.objects.create(
+            invoice=invoice, description="Usluga", quantity=1, unit_price=Decimal("100.00")
+        )
+
+    post_invoices(Invoice.objects.order_by("pk"))
+
+    assert chart_of_accounts["4000"].get_balance(tenant=tenant_a) == Decimal("100.00")
+    assert chart_of_accounts["4000"].get_balance(tenant=tenant_b) == Decimal("0.00")
+    assert prihodi_b.get_balance(tenant=tenant_b) == Decimal("100.00")
+
+
+@pytest.mark.django_db
+def test_with_totals_lists_entries_in_one_query(chart_of_accounts, django_assert_num_queries):
+    post_entries(
+        LedgerEntry(
+            datetime.date(2025, 1, day),
+            f"e{day}",
+            [(chart_of_accounts["1200"], "10.00", 0), (chart_of_accounts["4000"], 0, "10.00")],
+        )
+        for day in range(1, 6)
+    )
+    with django_assert_num_queries(1):
+        entries = list(JournalEntry.objects.with_totals())
+        assert all(entry.is_balanced() for entry in entries)
+        assert {entry.total_debit for entry in entries} == {Decimal("10.00")}
+
+
+@pytest.mark.django_db
+def test_journal_item_formset_rejects_unbalanced_items(chart_of_accounts):
+    from django.forms import inlineformset_factory
+
+    from financije.forms import JournalItemInlineFormSet
+
+    entry = JournalEntry.objects.create(date=datetime.date(2025, 1, 1), description="ručno")
+    FormSet = inlineformset_factory(
+        JournalEntry,
+        JournalItem,
+        formset=JournalItemInlineFormSet,
+        fields=["account", "debit", "credit"],
+        extra=0,
+    )
+    data = {
+        "journalitem_set-TOTAL_FORMS": "2",
+        "journalitem_set-INITIAL_FORMS": "0",
+        "journalitem_set-0-account": chart_of_accounts["1200"].pk,
+        "journalitem_set-0-debit": "10.00",
+        "journalitem_set-0-credit": "0",
+        "journalitem_set-1-account": chart_of_accounts["4000"].pk,
+        "journalitem_set-1-debit": "0",
+        "journalitem_set-1-credit": "9.00",
+    }
+    formset = FormSet(data, instance=entry)
+    assert not formset.is_valid()
+    assert not JournalItem.objects.exists()
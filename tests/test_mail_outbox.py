@@ -0,0 +1,99 @@
+import datetime
+import smtplib
+from decimal import Decimal
+
+import pytest
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.utils import timezone
+
+from financije import mail as outbox
+from financije.models import Invoice, OutgoingEmail
+
+TODAY = datetime.date(2025, 6, 30)
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPRecipientsRefused({})
+
+
+@pytest.fixture(autouse=True)
+def backend(settings, monkeypatch):
+    settings.EMAIL_BACKEND = "tests.test_mail_outbox.CountingBackend"
+    CountingBackend.opened = 0
+    cache.clear()
+    scheduled = []
+    monkeypatch.setattr(
+        outbox, "_schedule_sending", lambda countdown=None: scheduled.append(countdown)
+    )
+    return scheduled
+
+
+def make_overdue(client, count):
+    return Invoice.objects.bulk_create(
+        Invoice(
+            client=client,
+            invoice_number=f"{n}/1/2025",
+            issue_date=datetime.date(2025, 1, 1),
+            due_date=datetime.date(2025, 1, 31),
+            status_fakture="odobreno",
+            gross_amount=Decimal("100.00"),
+        )
+        for n in range(1, count + 1)
+    )
+
+
+@pytest.mark.django_db
+def test_dunning_run_sent_in_batches_over_one_connection_each(settings, client_supplier):
+    settings.FINANCIJE_MAIL_RECIPIENT_RATE = (1000, 60)
+    make_overdue(client_supplier, 150)
+    assert outbox.queue_dunning(today=TODAY) == 150
+    assert outbox.queue_dunning(today=TODAY) == 0  # jedna opomena po računu dnevno
+
+    assert outbox.send_pending_emails(batch_size=100) == 150
+    assert len(mail.outbox) == 150
+    assert CountingBackend.opened == 2
+    assert not OutgoingEmail.objects.exclude(status=OutgoingEmail.SENT).exists()
+    assert "1/1/2025" in mail.outbox[0].subject
+
+
+@pytest.mark.django_db
+def test_recipient_throttle_defers_and_reschedules(settings, backend, client_supplier):
+    settings.FINANCIJE_MAIL_RECIPIENT_RATE = (2, 60)
+    make_overdue(client_supplier, 3)
+    outbox.queue_dunning(today=TODAY)
+    backend.clear()
+
+    assert outbox.send_pending_emails() == 3
+    assert len(mail.outbox) == 2
+    deferred = OutgoingEmail.objects.get(status=OutgoingEmail.PENDING)
+    assert deferred.attempts == 0
+    assert deferred.next_attempt_at > timezone.now() + datetime.timedelta(seconds=50)
+    assert len(backend) == 1 and backend[0] >= 60
+    assert outbox.send_pending_emails() == 0  # odgođena poruka još nije dospjela
+    assert len(backend) == 1  # ponovno pokretanje je već zakazano
+
+
+@pytest.mark.django_db
+def test_failed_message_retried_with_backoff_then_failed(settings):
+    settings.EMAIL_BACKEND = "tests.test_mail_outbox.FailingBackend"
+    outbox.queue_email("kupac@example.com", "Naslov", "Sadržaj")
+    message = OutgoingEmail.objects.get()
+
+    for attempt in range(1, outbox.MAX_ATTEMPTS + 1):
+        OutgoingEmail.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        outbox.send_batch()
+        message.refresh_from_db()
+        assert message.attempts == attempt
+    assert message.status == OutgoingEmail.FAILED
+    assert mail.outbox == []
@@ -0,0 +1,88 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from financije.ledger import LedgerEntry, post_entries
+from financije.models import Account, JournalItem, PeriodClosingBalance
+from financije.models.periods import close_period, reopen_period
+from financije.trial_balance import balances_as_of, trial_balance
+from tenants.models import Tenant
+
+
+@pytest.fixture
+def ledger():
+    kupci = Account.objects.create(number="1200", name="Kupci", account_type="active")
+    prihodi = Account.objects.create(number="7500", name="Prihodi", account_type="income")
+    tenant = Tenant.objects.create(name="A", domain="a.test")
+
+    def post(date, amount):
+        return post_entries(
+            [LedgerEntry(date, "t", [(kupci, amount, 0), (prihodi, 0, amount)], tenant=tenant)]
+        )
+
+    return tenant, kupci, post
+
+
+@pytest.mark.django_db
+def test_close_writes_cumulative_snapshot_and_locks(ledger):
+    tenant, kupci, post = ledger
+    post(datetime.date(2024, 11, 3), "100.00")
+    post(datetime.date(2024, 12, 3), "50.00")
+    close_period(2024, 11, tenant)
+    close_period(2024, 12, tenant)
+
+    snapshot = PeriodClosingBalance.objects.get(tenant=tenant, account=kupci, year=2024, month=12)
+    assert snapshot.debit == Decimal("150.00")
+
+    with pytest.raises(ValidationError):
+        post(datetime.date(2024, 11, 20), "1.00")
+    item = JournalItem.objects.filter(account=kupci).first()
+    item.debit = Decimal("1.00")
+    with pytest.raises(ValidationError):
+        item.save()
+
+    post(datetime.date(2025, 1, 10), "25.00")
+    opening = next(
+        line
+        for line in trial_balance(tenant, datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))
+        if line["account"] == kupci
+    )
+    assert opening["opening"] == Decimal("150.00")
+    assert opening["closing"] == Decimal("175.00")
+    assert balances_as_of(tenant, datetime.date(2024, 12, 31))[kupci.pk] == Decimal("150.00")
+
+
+@pytest.mark.django_db
+def test_reopen_only_last_period_and_recompute(ledger):
+    tenant, kupci, post = ledger
+    post(datetime.date(2024, 11, 3), "100.00")
+    close_period(2024, 11, tenant)
+    close_period(2024, 12, tenant)
+
+    with pytest.raises(ValidationError):
+        reopen_period(2024, 11, tenant)
+
+    reopen_period(2024, 12, tenant)
+    assert not PeriodClosingBalance.objects.filter(year=2024, month=12).exists()
+    assert PeriodClosingBalance.objects.filter(year=2024, month=11).exists()
+
+    post(datetime.date(2024, 12, 15), "10.00")
+    close_period(2024, 12, tenant)
+    snapshot = PeriodClosingBalance.objects.get(tenant=tenant, account=kupci, year=2024, month=12)
+    assert snapshot.debit == Decimal("110.00")
+
+
+@pytest.mark.django_db
+def test_snapshot_row_is_unique_per_period_and_account(ledger):
+    tenant, kupci, post = ledger
+    post(datetime.date(2024, 11, 3), "100.00")
+    close_period(2024, 11, tenant)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        PeriodClosingBalance.objects.create(tenant=tenant, account=kupci, year=2024, month=11)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        PeriodClosingBalance.objects.bulk_create(
+            [PeriodClosingBalance(account=kupci, year=2024, month=11) for _ in range(2)]
+        )
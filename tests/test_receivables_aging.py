@@ -0,0 +1,83 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+
+from financije.aging import aging_report, aging_rows
+from financije.models import Invoice, InvoiceLine, Payment
+
+TODAY = datetime.date(2025, 6, 30)
+
+
+@pytest.fixture(autouse=True)
+def no_posting(monkeypatch):
+    cache.clear()
+    monkeypatch.setattr("financije.models.posting._schedule_processing", lambda: None)
+
+
+def make_invoice(client, due_date, price, status="odobreno"):
+    invoice = Invoice.objects.create(
+        client=client,
+        issue_date=datetime.date(2025, 1, 1),
+        due_date=due_date,
+        status_fakture=status,
+    )
+    InvoiceLine.objects.create(
+        invoice=invoice, description="Usluga", quantity=1, unit_price=Decimal(price)
+    )
+    return invoice
+
+
+@pytest.mark.django_db
+def test_aging_buckets_per_client(make_client_supplier, django_assert_num_queries):
+    first = make_client_supplier(name="A d.o.o.", oib="11111111111")
+    second = make_client_supplier(name="B d.o.o.", oib="22222222222")
+    make_invoice(first, TODAY, "100.00")
+    make_invoice(first, TODAY - datetime.timedelta(days=30), "200.00")
+    make_invoice(first, TODAY - datetime.timedelta(days=31), "300.00")
+    paid = make_invoice(second, TODAY - datetime.timedelta(days=90), "400.00")
+    Payment.objects.create(related_invoice=paid, amount=Decimal("100.00"))
+    make_invoice(second, TODAY - datetime.timedelta(days=91), "40.00")
+    make_invoice(second, TODAY - datetime.timedelta(days=200), "999.00", status="draft")
+    settled = make_invoice(second, TODAY - datetime.timedelta(days=5), "8.00")
+    Payment.objects.create(related_invoice=settled, amount=Decimal("10.00"))
+
+    with django_assert_num_queries(1):
+        report = aging_report(today=TODAY)
+
+    a, b = report["clients"]
+    assert (a["current"], a["days_1_30"], a["days_31_60"]) == (
+        Decimal("125.00"),
+        Decimal("250.00"),
+        Decimal("375.00"),
+    )
+    assert (b["days_61_90"], b["days_90_plus"], b["total"]) == (
+        Decimal("400.00"),
+        Decimal("50.00"),
+        Decimal("450.00"),
+    )
+    assert report["totals"]["total"] == Decimal("1200.00")
+    assert next(aging_rows(report))[:3] == ["A d.o.o.", "11111111111", Decimal("125.00")]
+
+
+@pytest.mark.django_db
+def test_aging_cache_refreshed_per_client(
+    client_supplier, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    client = client_supplier
+    with django_capture_on_commit_callbacks(execute=True):
+        invoice = make_invoice(client, TODAY, "100.00")
+    assert aging_report()["totals"]["total"] == Decimal("125.00")
+    with django_assert_num_queries(0):
+        assert aging_report()["totals"]["total"] == Decimal("125.00")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Payment.objects.create(related_invoice=invoice, amount=Decimal("25.00"))
+    with django_assert_num_queries(0):
+        assert aging_report()["totals"]["total"] == Decimal("100.00")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        invoice.status_fakture = "otkazano"
+        invoice.save()
+    assert aging_report()["clients"] == []
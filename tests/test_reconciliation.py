@@ -0,0 +1,137 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from financije.models import BankSyncState, BankTransaction, Invoice, Payment
+from financije.reconciliation import (
+    incoming_transactions,
+    reconcile,
+    reference_key,
+    transaction_keys,
+)
+from tenants.models import Tenant
+
+CLIENT_IBAN = "HR1723600001101234565"
+OTHER_IBAN = "HR6523400091110123456"
+
+
+@pytest.fixture(autouse=True)
+def no_posting(monkeypatch):
+    monkeypatch.setattr("financije.models.posting._schedule_processing", lambda: None)
+
+
+def make_invoices(client, amounts, start=1):
+    return Invoice.objects.bulk_create(
+        Invoice(
+            client=client,
+            invoice_number=f"{start + n}/1/2025",
+            issue_date=datetime.date(2025, 1, 1),
+            due_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=n),
+            status_fakture="odobreno",
+            gross_amount=Decimal(amount),
+        )
+        for n, amount in enumerate(amounts)
+    )
+
+
+def make_transaction(reference, amount, **fields):
+    return BankTransaction.objects.create(
+        referenca=reference,
+        tip_transakcije="priljev",
+        iznos=Decimal(amount),
+        opis=fields.pop("opis", "Uplata"),
+        datum=datetime.date(2025, 2, 1),
+        saldo=Decimal("0.00"),
+        bank_account_number=fields.pop("bank_account_number", "HR1210010051863000160"),
+        **fields,
+    )
+
+
+def test_reference_keys():
+    assert reference_key("HR01 01-1-2025") == reference_key("1/1/2025") == "1-1-2025"
+    assert transaction_keys("", "Plaćanje računa 3/1/2025 i 4-1-2025") == ["3-1-2025", "4-1-2025"]
+    assert transaction_keys("HR00 5-1-2025", "račun 3/1/2025") == ["5-1-2025"]
+
+
+@pytest.mark.django_db
+def test_partial_payments_by_reference(client_supplier):
+    (invoice,) = make_invoices(client_supplier, ["100.00"])
+    first = make_transaction("T1", "40.00", poziv_na_broj="HR01 1-1-2025")
+    assert reconcile()["matched"] == 1
+    invoice.refresh_from_db()
+    first.refresh_from_db()
+    assert first.is_reconciled and not invoice.paid
+    assert Payment.objects.get(bank_transaction=first).amount == Decimal("40.00")
+
+    make_transaction("T2", "70.00", opis="Ostatak po računu 1/1/2025")
+    result = reconcile()
+    assert (result["matched"], result["paid_invoices"]) == (1, 1)
+    assert result["unallocated"] == Decimal("10.00")
+    invoice.refresh_from_db()
+    assert invoice.paid
+    assert sum(p.amount for p in invoice.payments.all()) == Decimal("100.00")
+
+
+@pytest.mark.django_db
+def test_exact_and_combined_payments_by_client_iban(make_client_supplier):
+    client = make_client_supplier(iban="HR17 2360 0001 1012 3456 5")
+    older, newer, oldest_open = make_invoices(client, ["30.00", "50.00", "20.00"])
+    exact = make_transaction("T1", "50.00", protustrana_iban=CLIENT_IBAN)
+    combined = make_transaction("T2", "50.00", protustrana_iban=CLIENT_IBAN)
+    unknown = make_transaction("T3", "30.00", protustrana_iban="HR0000000000000000000")
+
+    result = reconcile()
+    assert (result["matched"], result["unmatched"], result["payments"]) == (2, 1, 3)
+    assert Payment.objects.get(bank_transaction=exact).related_invoice == newer
+    assert sorted(
+        Payment.objects.filter(bank_transaction=combined).values_list("related_invoice", flat=True)
+    ) == [older.pk, oldest_open.pk]
+    assert set(Invoice.objects.filter(paid=True).values_list("pk", flat=True)) == {
+        older.pk,
+        newer.pk,
+        oldest_open.pk,
+    }
+    unknown.refresh_from_db()
+    assert not unknown.is_reconciled
+
+
+@pytest.mark.django_db
+def test_tenant_reconciles_only_its_bank_accounts(client_supplier):
+    tenant = Tenant.objects.create(name="Tvrtka", domain="tvrtka.example.com")
+    BankSyncState.objects.create(
+        bank_account_number="HR1210010051863000160", api_url="https://banka.test", tenant=tenant
+    )
+    make_invoices(client_supplier, ["10.00", "20.00"])
+    Invoice.objects.update(tenant=tenant)
+    own = make_transaction("T1", "10.00", poziv_na_broj="HR01 1-1-2025")
+    other = make_transaction(
+        "T2", "20.00", poziv_na_broj="HR01 2-1-2025", bank_account_number=OTHER_IBAN
+    )
+
+    assert reconcile(tenant)["matched"] == 1
+    own.refresh_from_db()
+    other.refresh_from_db()
+    assert own.is_reconciled and not other.is_reconciled
+    assert not Payment.objects.filter(bank_transaction=other).exists()
+
+
+def test_incoming_transactions_skip_rows_locked_by_another_run():
+    query = incoming_transactions().query
+    assert query.select_for_update and query.select_for_update_skip_locked
+
+
+@pytest.mark.django_db
+def test_query_count_does_not_grow_with_volume(make_client_supplier):
+    def run(count, start):
+        client = make_client_supplier(oib=f"{start:011d}")
+        make_invoices(client, ["10.00"] * count, start=start)
+        for n in range(count):
+            make_transaction(f"T{start + n}", "10.00", poziv_na_broj=f"HR01 {start + n}-1-2025")
+        with CaptureQueriesContext(connection) as queries:
+            assert reconcile()["matched"] == count
+        return len(queries)
+
+    assert run(5, 1) == run(150, 100)
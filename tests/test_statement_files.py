@@ -0,0 +1,202 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from financije.models import BankTransaction, CashFlow
+from financije.statement_files import (
+    CAMT053,
+    MT940,
+    StatementError,
+    detect_format,
+    import_statement_file,
+    statement_entries,
+)
+from financije.views import BankTransactionViewSet
+
+IBAN_A = "HR1210010051863000160"
+IBAN_B = "HR6523400091110123456"
+
+
+def camt_entry(amount, indicator, reference="", text="Uplata"):
+    ref = f"<AcctSvcrRef>{reference}</AcctSvcrRef>" if reference else ""
+    return f"""
+      <Ntry>
+        <Amt Ccy="EUR">{amount}</Amt>
+        <CdtDbtInd>{indicator}</CdtDbtInd>
+        <Sts><Cd>BOOK</Cd></Sts>
+        <BookgDt><Dt>2025-03-03</Dt></BookgDt>
+        <ValDt><Dt>2025-03-04</Dt></ValDt>
+        {ref}
+        <NtryDtls><TxDtls><RmtInf><Ustrd>{text}</Ustrd></RmtInf></TxDtls></NtryDtls>
+      </Ntry>"""
+
+
+def camt_statement(iban, opening, entries):
+    return f"""
+    <Stmt>
+      <Id>1</Id>
+      <Acct><Id><IBAN>{iban}</IBAN></Id></Acct>
+      <Bal>
+        <Tp><CdOrPrtry><Cd>OPBD</Cd></CdOrPrtry></Tp>
+        <Amt Ccy="EUR">{opening}</Amt>
+        <CdtDbtInd>CRDT</CdtDbtInd>
+        <Dt><Dt>2025-03-02</Dt></Dt>
+      </Bal>
+      {"".join(entries)}
+    </Stmt>"""
+
+
+def camt(*statements):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">'
+        f"<BkToCstmrStmt><GrpHdr><MsgId>1</MsgId></GrpHdr>{''.join(statements)}"
+        "</BkToCstmrStmt></Document>"
+    ).encode()
+
+
+CAMT = camt(
+    camt_statement(
+        IBAN_A,
+        "1000.00",
+        [
+            camt_entry("150.00", "CRDT", "A-1", "Uplata po računu 1/1/2025"),
+            camt_entry("50.25", "DBIT", "A-2", "Najam"),
+        ],
+    ),
+    camt_statement(IBAN_B, "10.00", [camt_entry("5.00", "DBIT", text="Naknada")]),
+)
+
+MT940_TEXT = f"""{{1:F01BANKHR2XAXXX0000000000}}{{2:I940BANKHR2XXXXXN}}{{4:
+:20:STMT1
+:25:{IBAN_A}
+:28C:1/1
+:60F:C250302EUR1000,00
+:61:2503040303C150,00NTRFNONREF//A-1
+:86:Uplata po računu
+1/1/2025
+:61:2503030303D50,25NMSCREF2
+:86:Najam HR00 2025-3 HR1723600001101234565
+:62F:C250303EUR1099,75
+-}}
+:20:STMT2
+:25:BANKHR2X/{IBAN_B}
+:60F:D250302EUR10,00
+:61:250303D5,NCHGNONREF
+:86:Naknada
+:62F:D250303EUR15,00
+-
+"""
+
+
+def test_camt053_entries_with_running_balance():
+    entries = list(statement_entries(io.BytesIO(CAMT)))
+    assert [(e["bank_account_number"], e["referenca"]) for e in entries][:2] == [
+        (IBAN_A, "A-1"),
+        (IBAN_A, "A-2"),
+    ]
+    assert [e["saldo"] for e in entries] == [
+        Decimal("1150.00"),
+        Decimal("1099.75"),
+        Decimal("5.00"),
+    ]
+    assert entries[0]["opis"] == "Uplata po računu 1/1/2025"
+    assert (entries[1]["tip_transakcije"], entries[1]["datum_valute"]) == ("odljev", "2025-03-04")
+    assert entries[2]["referenca"].startswith(f"{IBAN_B}:")  # bez bankovne reference
+
+
+def test_mt940_entries():
+    entries = list(statement_entries(io.BytesIO(MT940_TEXT.encode())))
+    assert [(e["bank_account_number"], e["referenca"]) for e in entries][:2] == [
+        (IBAN_A, "A-1"),
+        (IBAN_A, "REF2"),
+    ]
+    assert entries[0]["opis"] == "Uplata po računu 1/1/2025"
+    assert (entries[1]["poziv_na_broj"], entries[1]["protustrana_iban"]) == (
+        "HR00 2025-3",
+        "HR1723600001101234565",
+    )
+    assert (entries[0]["datum"], entries[0]["datum_valute"]) == ("2025-03-03", "2025-03-04")
+    assert [e["saldo"] for e in entries] == [
+        Decimal("1150.00"),
+        Decimal("1099.75"),
+        Decimal("-15.00"),
+    ]
+    assert entries[2]["bank_account_number"] == IBAN_B
+    assert entries[2]["iznos"] == Decimal("5")
+
+
+def test_format_detection_and_errors():
+    assert detect_format(io.BytesIO(b"\xef\xbb\xbf  <?xml")) == CAMT053
+    assert detect_format(io.BytesIO(b":20:X")) == MT940
+    with pytest.raises(StatementError):
+        list(statement_entries(io.BytesIO(b"<Document><Stmt>"), CAMT053))
+
+
+@pytest.mark.parametrize(
+    "content, where",
+    [
+        (camt(camt_statement(IBAN_A, "1000.00", [camt_entry("1.2.3", "CRDT", "A-1")])), "Ntry A-1"),
+        (camt(camt_statement(IBAN_A, "abc", [])), "Bal/Amt"),
+        (
+            camt(camt_statement(IBAN_A, "1.00", [camt_entry("1.00", "CRDT", "A-1")])).replace(
+                b"<BookgDt><Dt>2025-03-03</Dt></BookgDt>", b""
+            ),
+            "Ntry A-1/BookgDt",
+        ),
+        (MT940_TEXT.replace(":60F:C250302EUR1000,00", ":60F:C250302EUR,,").encode(), ":60F:"),
+        (MT940_TEXT.replace("2503040303C150", "2513040303C150").encode(), ":61:2513040303C"),
+    ],
+)
+def test_malformed_values_name_the_element_or_line(content, where):
+    with pytest.raises(StatementError, match=where):
+        list(statement_entries(io.BytesIO(content)))
+
+
+@pytest.mark.django_db
+def test_reimport_updates_in_place_and_creates_cash_flow():
+    assert import_statement_file(io.BytesIO(CAMT), batch_size=2) == {IBAN_A: 2, IBAN_B: 1}
+    assert import_statement_file(io.BytesIO(CAMT)) == {IBAN_A: 2, IBAN_B: 1}
+    assert BankTransaction.objects.count() == 3
+    assert CashFlow.objects.count() == 3
+    assert BankTransaction.objects.get(referenca="A-2").iznos == Decimal("50.25")
+
+
+@pytest.mark.django_db
+def test_command_and_upload_endpoint(tmp_path, admin_user):
+    path = tmp_path / "izvod.sta"
+    path.write_text(MT940_TEXT, encoding="utf-8")
+    out = io.StringIO()
+    call_command("import_bank_statement", str(path), stdout=out)
+    assert "Imported 3 transaction(s)" in out.getvalue()
+
+    view = BankTransactionViewSet.as_view({"post": "statement_import"})
+    request = APIRequestFactory().post(
+        "/bank-transactions/import/",
+        {"file": SimpleUploadedFile("izvod.xml", CAMT)},
+        format="multipart",
+    )
+    force_authenticate(request, user=admin_user)
+    response = view(request)
+    assert response.status_code == 201
+    assert response.data == {"transactions": 3, "accounts": {IBAN_A: 2, IBAN_B: 1}}
+    # A-1 je u oba izvoda (ista bankovna referenca)
+    assert BankTransaction.objects.count() == 5
+
+    broken = MT940_TEXT.replace("2503030303D50,25", "2503031340D50,25")
+    request = APIRequestFactory().post(
+        "/bank-transactions/import/",
+        {"file": SimpleUploadedFile("izvod.sta", broken.encode())},
+        format="multipart",
+    )
+    force_authenticate(request, user=admin_user)
+    response = view(request)
+    assert response.status_code == 400
+    assert ":61:2503031340D50,25" in response.data["detail"]
+    path.write_text(broken, encoding="utf-8")
+    with pytest.raises(CommandError, match="Neispravan datum"):
+        call_command("import_bank_statement", str(path), stdout=out)
@@ -0,0 +1,91 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.handlers.exception import convert_exception_to_response
+
+from financije.ledger import LedgerEntry, post_entries
+from financije.models import Account
+from financije.trial_balance import trial_balance
+from financije.views import TrialBalanceView
+from tenants.models import Tenant
+
+
+@pytest.fixture
+def setup_ledger():
+    kupci = Account.objects.create(number="1200", name="Kupci", account_type="active")
+    prihodi = Account.objects.create(number="7500", name="Prihodi", account_type="income")
+    tenant = Tenant.objects.create(name="A", domain="a.test")
+    other = Tenant.objects.create(name="B", domain="b.test")
+
+    def entry(date, amount, tenant=tenant, division=""):
+        return LedgerEntry(
+            date,
+            "Test",
+            [(kupci, amount, 0), (prihodi, 0, amount)],
+            tenant=tenant,
+            division=division,
+        )
+
+    post_entries(
+        [
+            entry(datetime.date(2024, 12, 20), "100.00"),
+            entry(datetime.date(2025, 1, 5), "10.00"),
+            entry(datetime.date(2025, 1, 20), "20.00", division="BRAVARIJA"),
+            entry(datetime.date(2025, 2, 10), "30.00"),
+            entry(datetime.date(2025, 2, 25), "40.00"),
+            entry(datetime.date(2025, 2, 25), "999.00", tenant=other),
+        ]
+    )
+    return tenant, kupci
+
+
+@pytest.mark.django_db
+def test_month_aligned_trial_balance(setup_ledger):
+    tenant, kupci = setup_ledger
+    lines = trial_balance(tenant, datetime.date(2025, 1, 1), datetime.date(2025, 2, 28))
+    line = next(line for line in lines if line["account"] == kupci)
+    assert line["opening"] == Decimal("100.00")
+    assert line["debit"] == Decimal("100.00")
+    assert line["closing"] == Decimal("200.00")
+
+
+@pytest.mark.django_db
+def test_partial_months_match_item_scan(setup_ledger):
+    tenant, kupci = setup_ledger
+    start, end = datetime.date(2025, 1, 10), datetime.date(2025, 2, 20)
+    line = next(line for line in trial_balance(tenant, start, end) if line["account"] == kupci)
+    assert line["opening"] == Decimal("110.00")
+    assert line["debit"] == Decimal("50.00")
+    assert line["closing"] == Decimal("160.00")
+
+
+@pytest.mark.django_db
+def test_division_filter(setup_ledger):
+    tenant, kupci = setup_ledger
+    lines = trial_balance(
+        tenant, datetime.date(2025, 1, 1), datetime.date(2025, 12, 31), division="BRAVARIJA"
+    )
+    line = next(line for line in lines if line["account"] == kupci)
+    assert line["opening"] == Decimal("0.00")
+    assert line["debit"] == Decimal("20.00")
+
+
+@pytest.mark.django_db
+def test_other_tenant_requires_staff(setup_ledger, rf, django_user_model):
+    tenant, _kupci = setup_ledger
+    user = django_user_model.objects.create_user("knjigovoda", password="x")
+    view = convert_exception_to_response(TrialBalanceView.as_view())
+
+    def get():
+        request = rf.get(
+            "/trial-balance/", {"start": "2025-01-01", "end": "2025-02-28", "tenant": tenant.pk}
+        )
+        request.user = user
+        return view(request)
+
+    assert get().status_code == 403
+    user.is_staff = True
+    lines = json.loads(get().content)["lines"]
+    assert sorted(line["debit"] for line in lines) == ["0", "100"]  # bez tenanta B (999)
@@ -0,0 +1,147 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+
+from financije import account_map
+from financije.models import Account, Invoice, InvoiceLine, JournalEntry, JournalItem
+from financije.vat_return import compute_vat_return, vat_return, vat_return_documents
+from reports.ira_export import ira_header, ira_rates, ira_rows
+from tenants.models import Tenant
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    account_map.invalidate()
+
+
+def make_invoice(client, day, lines, status="odobreno", reverse_charge=False):
+    invoice = Invoice.objects.create(
+        client=client,
+        issue_date=datetime.date(2025, 4, day),
+        due_date=datetime.date(2025, 4, 30),
+        status_fakture=status,
+        reverse_charge=reverse_charge,
+    )
+    for price, rate in lines:
+        InvoiceLine.objects.create(
+            invoice=invoice,
+            description="Usluga",
+            quantity=1,
+            unit_price=Decimal(price),
+            tax_rate=Decimal(rate),
+        )
+    return invoice
+
+
+def book_input_vat(amount, date=datetime.date(2025, 4, 10)):
+    input_vat = Account.objects.get_or_create(
+        number="1400", defaults={"name": "Pretporez", "account_type": "active"}
+    )[0]
+    suppliers = Account.objects.get_or_create(
+        number="2200", defaults={"name": "Dobavljači", "account_type": "passive"}
+    )[0]
+    entry = JournalEntry.objects.create(date=date, description="Ulazni račun")
+    JournalItem.objects.create(entry=entry, account=input_vat, debit=amount)
+    JournalItem.objects.create(entry=entry, account=suppliers, credit=amount)
+    return entry
+
+
+@pytest.mark.django_db
+def test_vat_return_fields(client_supplier, django_assert_max_num_queries):
+    make_invoice(client_supplier, 2, [("100.00", "25"), ("10.00", "13"), ("5.00", "0")])
+    make_invoice(client_supplier, 3, [("999.00", "25")], status="draft")
+    make_invoice(client_supplier, 4, [("300.00", "0")], reverse_charge=True)
+    make_invoice(client_supplier, 5, [("40.00", "5")])
+    book_input_vat(Decimal("12.00"))
+    account_map.resolve()
+
+    with django_assert_max_num_queries(2):
+        result = compute_vat_return(2025, 4)
+
+    fields = result["fields"]
+    assert fields["I.1"]["base"] == Decimal("300.00")
+    assert fields["I.2"]["base"] == Decimal("5.00")
+    assert (fields["II.1"]["base"], fields["II.1"]["vat"]) == (Decimal("40.00"), Decimal("2.00"))
+    assert (fields["II.2"]["base"], fields["II.2"]["vat"]) == (Decimal("10.00"), Decimal("1.30"))
+    assert (fields["II.3"]["base"], fields["II.3"]["vat"]) == (Decimal("100.00"), Decimal("25.00"))
+    assert result["output_vat"] == Decimal("28.30")
+    assert result["input_vat"] == Decimal("12.00")
+    assert result["payable"] == Decimal("16.30")
+    assert compute_vat_return(2025, 5)["output_vat"] == Decimal("0.00")
+
+
+@pytest.mark.django_db
+def test_vat_return_documents(client_supplier):
+    first = make_invoice(client_supplier, 2, [("100.00", "25"), ("10.00", "13")])
+    make_invoice(client_supplier, 3, [("20.00", "13")])
+    entry = book_input_vat(Decimal("12.00"))
+
+    documents = vat_return_documents(2025, 4, "II.3")
+    assert [(d.pk, d.field_base, d.field_vat) for d in documents] == [
+        (first.pk, Decimal("100.00"), Decimal("25.00"))
+    ]
+    assert vat_return_documents(2025, 4, "II.2").count() == 2
+    assert [item.entry_id for item in vat_return_documents(2025, 4, "III")] == [entry.pk]
+
+
+@pytest.mark.django_db
+def test_vat_return_cached_until_period_changes(
+    client_supplier, django_assert_num_queries, django_capture_on_commit_callbacks, monkeypatch
+):
+    monkeypatch.setattr("financije.models.posting._schedule_processing", lambda: None)
+    with django_capture_on_commit_callbacks(execute=True):
+        invoice = make_invoice(client_supplier, 2, [("100.00", "25")])
+    assert vat_return(2025, 4)["output_vat"] == Decimal("25.00")
+    with django_assert_num_queries(0):
+        assert vat_return(2025, 4)["output_vat"] == Decimal("25.00")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        InvoiceLine.objects.create(
+            invoice=invoice, description="B", quantity=1, unit_price=Decimal("40.00")
+        )
+    assert vat_return(2025, 4)["output_vat"] == Decimal("35.00")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        book_input_vat(Decimal("5.00"))
+    assert vat_return(2025, 4)["payable"] == Decimal("30.00")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        invoice.issue_date = datetime.date(2025, 5, 2)
+        invoice.save()
+    assert vat_return(2025, 4)["output_vat"] == Decimal("0.00")
+    assert vat_return(2025, 4, months=3)["output_vat"] == Decimal("35.00")
+
+
+@pytest.mark.django_db
+def test_without_tenant_matches_the_ira_book(
+    client_supplier, django_capture_on_commit_callbacks, monkeypatch
+):
+    monkeypatch.setattr("financije.models.posting._schedule_processing", lambda: None)
+    tenant_a = Tenant.objects.create(name="A", domain="a.test")
+    tenant_b = Tenant.objects.create(name="B", domain="b.test")
+    make_invoice(client_supplier, 2, [("100.00", "25")])
+    for tenant, price in ((tenant_a, "40.00"), (tenant_b, "10.00")):
+        invoice = make_invoice(client_supplier, 3, [(price, "25")])
+        Invoice.objects.filter(pk=invoice.pk).update(tenant=tenant)
+
+    start, end = datetime.date(2025, 4, 1), datetime.date(2025, 4, 30)
+    header = ira_header(ira_rates())
+    rows = [dict(zip(header, row, strict=True)) for row in ira_rows(start, end)]
+    assert len(rows) == 3
+    assert vat_return(2025, 4)["output_vat"] == sum(row["PDV 25%"] for row in rows)
+    assert vat_return(2025, 4)["output_vat"] == Decimal("37.50")
+    assert vat_return(2025, 4, tenant_a)["output_vat"] == Decimal("10.00")
+    assert len(vat_return_documents(2025, 4, "II.3")) == 3
+
+    # Promjena računa tenanta poništava i obračun svih tenanata.
+    with django_capture_on_commit_callbacks(execute=True):
+        InvoiceLine.objects.create(
+            invoice=Invoice.objects.get(tenant=tenant_b),
+            description="B",
+            quantity=1,
+            unit_price=Decimal("20.00"),
+        )
+    assert vat_return(2025, 4)["output_vat"] == Decimal("42.50")